@@ -16,7 +16,8 @@ from django.http import HttpResponseRedirect
 from django.shortcuts import render
 
 # App Imports
-from .models import Facility, Schedule, OpenTime, Category, Location, Alert
+from .forms import ScheduleForm
+from .models import Facility, Schedule, Category, Location, Alert
 
 
 @admin.register(Facility)
@@ -113,7 +114,23 @@ class FacilityAdmin(admin.ModelAdmin):
 
     # Allow filtering by the following fields
     list_filter = ["facility_category", "facility_location"]
-    list_display = ("facility_name", "main_schedule", "modified")
+    list_display = ("facility_name", "main_schedule", "is_open", "modified")
+
+    def get_queryset(self, request):
+        # is_open evaluates every schedule once per request (see
+        # OpenStateContext), with the open times of the page loaded up front
+        return (
+            super(FacilityAdmin, self)
+            .get_queryset(request)
+            .select_related("main_schedule")
+            .prefetch_related("main_schedule__open_times", "special_schedules__open_times")
+        )
+
+    def is_open(self, facility):
+        return facility.is_open()
+
+    is_open.boolean = True
+    is_open.short_description = "Open now"
     # Modify the rendered layout of the "create a new facility" page
     # We are basically reordering things to look nicer to the user here
     fieldsets = (
@@ -145,41 +162,19 @@ class FacilityAdmin(admin.ModelAdmin):
         return initial_data
 
 
-class OpenTimeInline(admin.TabularInline):
-    """
-    A table of time periods that represent an "open time" for a Facility.
-
-    https://docs.djangoproject.com/en/1.11/ref/contrib/admin/#django.contrib.admin.TabularInline
-    """
-    # Columns correspond to each attribute in the OpenTime table
-    model = OpenTime
-    # 7 days of the week, so only have 7 rows
-    extra = 7
-    # We are basically reordering things to look nicer to the user here
-    fieldsets = (
-        (None, {
-            'fields': (
-                ('start_day', 'start_time'),
-                ('end_day', 'end_time')
-            ),
-        }),
-    )
-
-
 @admin.register(Schedule)
 class ScheduleAdmin(admin.ModelAdmin):
     """
     Custom Admin panel for the Schedule model.
 
     Allows admins to create new schedules through the admin interface.
-    Additionally, we append the OpenTimeInline table to allow for open times to
-    be defined for the schedule we are creating.
+    Additionally, the open times of the schedule are edited as a weekly grid
+    (see api/forms.py) that is saved in one go.
     """
 
+    form = ScheduleForm
     # Allow filtering by the following fields
-    list_display = ["name", "modified"]
-    # Append the OpenTimeInline table to the end of our admin panel
-    inlines = [OpenTimeInline]
+    list_display = ["name", "hours_summary", "modified"]
     # Modify the rendered layout of the "create a new facility" page
     fieldsets = (
         (
@@ -190,6 +185,7 @@ class ScheduleAdmin(admin.ModelAdmin):
                     # Pair valid_start and valid_end together on the same line
                     ("valid_start", "valid_end"),
                     "twenty_four_hours",
+                    "open_times",
                 )
             },
         ),
@@ -197,6 +193,26 @@ class ScheduleAdmin(admin.ModelAdmin):
     search_fields = ["name"]  # search terms for autcomplete
     ordering = ["name"]  # autocomplete ordering
 
+    def save_model(self, request, obj, form, change):
+        rows, merged = form.open_time_rows()
+        if obj.pk is None:
+            # The open times need the schedule's id, nothing is derived from
+            # them before they are written
+            obj.deferring_hours = True
+            try:
+                obj.save()
+            finally:
+                obj.deferring_hours = False
+        # Only the rows that changed are written, and the data derived from
+        # the open times is rebuilt once when the schedule is saved below
+        obj.set_open_times(rows, form.stored_open_times)
+        super(ScheduleAdmin, self).save_model(request, obj, form, change)
+        if merged:
+            self.message_user(
+                request,
+                "Merged the overlapping open times of %s." % obj,
+            )
+
 
 # https://docs.djangoproject.com/en/1.11/ref/contrib/gis/admin/#osmgeoadmin
 OSMGeoAdmin.default_lon = -8605757.16502
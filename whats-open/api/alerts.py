@@ -0,0 +1,176 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+api/alerts.py
+
+The set of active alerts, precomputed along with the next moment it changes.
+
+Alerts only become active or inactive at their start_datetime and
+end_datetime, so the active set is computed once and cached until the next
+of those boundaries, or until an Alert is changed (see api/signals.py).
+Every active set has a state token that changes with it. Responses to
+/api/alerts/ are cached per state and clients can long-poll for the next
+one with ?wait= (see wait_for_change()).
+
+A waiting request holds its worker thread the whole time, so only
+ALERTS_MAX_WAITERS requests per process wait at once and the others are
+answered right away.
+"""
+# Python std. lib. imports
+import hashlib
+import math
+import threading
+import time
+import uuid
+from collections import namedtuple
+
+# Django Imports
+from django.conf import settings
+from django.core.cache import cache
+from django.dispatch import Signal
+from django.utils import timezone
+
+# App Imports
+from .campuses import CATALOG_CACHE_SECONDS, request_digest
+from .models import Alert
+
+VERSION_KEY = "alerts:version"
+
+# Query parameters that only say how to wait for a response, not what is in it
+WAIT_PARAMS = ("wait", "since")
+# The longest a client can wait for the active alerts to change
+MAX_WAIT_SECONDS = 25
+# How often a waiting request checks whether an alert was changed
+POLL_SECONDS = 1.0
+# Shortest sleep while waiting, for boundaries that are due
+MIN_SLEEP_SECONDS = 0.01
+
+# The ids of the active alerts at a moment, the first moment that they can
+# change and a token for the set (along with the content of every alert)
+ActiveAlerts = namedtuple("ActiveAlerts", ["ids", "computed_at", "next_boundary", "state"])
+
+# Sent when the cached alert responses are dropped (see api/warming.py)
+alerts_invalidated = Signal()
+
+# The number of requests of this process in wait_for_change()
+waiting = 0
+waiting_lock = threading.Lock()
+
+
+def alerts_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, uuid.uuid4().hex, None)
+        version = cache.get(VERSION_KEY, "")
+    return version
+
+
+def invalidate_alerts():
+    """
+    Drop the active alerts and the cached alert responses by moving them on
+    to a new version.
+    """
+    cache.set(VERSION_KEY, uuid.uuid4().hex, None)
+    alerts_invalidated.send(sender=None)
+
+
+def compute_active_alerts(now, version):
+    """
+    Return the ActiveAlerts at a moment, like Alert.is_active().
+    """
+    ids = []
+    boundaries = []
+    rows = Alert.objects.filter(end_datetime__gt=now).values_list(
+        "pk", "start_datetime", "end_datetime"
+    )
+    for pk, start, end in rows:
+        if start < now:
+            ids.append(pk)
+        else:
+            # The alert becomes active right after it starts
+            boundaries.append(start)
+        boundaries.append(end)
+    ids.sort()
+    state = hashlib.md5(("%s:%s" % (version, ids)).encode("utf-8")).hexdigest()[:16]
+    return ActiveAlerts(tuple(ids), now, min(boundaries, default=None), state)
+
+
+def seconds_until(moment, now):
+    """
+    Return the whole number of seconds from now until a moment (at least one),
+    or CATALOG_CACHE_SECONDS when there is no such moment.
+    """
+    if moment is None:
+        return CATALOG_CACHE_SECONDS
+    seconds = math.ceil((moment - now).total_seconds())
+    return int(max(1, min(CATALOG_CACHE_SECONDS, seconds)))
+
+
+def active_alerts(now=None):
+    """
+    Return the ActiveAlerts now, from the cache unless a boundary has passed.
+    """
+    if now is None:
+        now = timezone.now()
+    version = alerts_version()
+    key = "alerts:active:%s" % version
+    active = cache.get(key)
+    if active is None or (
+        active.next_boundary is not None and active.next_boundary <= now
+    ):
+        active = compute_active_alerts(now, version)
+        cache.set(key, active, seconds_until(active.next_boundary, now))
+    return active
+
+
+def wait_for_change(since, seconds):
+    """
+    Wait up to some seconds for the active alerts to move on from the state a
+    client has, and return the ActiveAlerts then. Return None without
+    waiting when ALERTS_MAX_WAITERS requests are waiting already.
+
+    Boundaries are waited for exactly, changes to alerts are noticed within
+    POLL_SECONDS.
+    """
+    global waiting
+    with waiting_lock:
+        if waiting >= settings.ALERTS_MAX_WAITERS:
+            return None
+        waiting += 1
+    try:
+        deadline = time.monotonic() + min(seconds, MAX_WAIT_SECONDS)
+        while True:
+            active = active_alerts()
+            remaining = deadline - time.monotonic()
+            if active.state != since or remaining <= 0:
+                return active
+            sleep = min(POLL_SECONDS, remaining)
+            if active.next_boundary is not None:
+                until = (active.next_boundary - timezone.now()).total_seconds()
+                sleep = min(sleep, max(MIN_SLEEP_SECONDS, until))
+            time.sleep(sleep)
+    finally:
+        with waiting_lock:
+            waiting -= 1
+
+
+def alerts_cache_key(request, active):
+    return ":".join(
+        (
+            "alerts",
+            active.state,
+            request.accepted_renderer.format,
+            request_digest(request, ignore=WAIT_PARAMS),
+        )
+    )
+
+
+def alerts_stale_key(request):
+    return ":".join(
+        (
+            "alerts",
+            "stale",
+            request.accepted_renderer.format,
+            request_digest(request, ignore=WAIT_PARAMS),
+        )
+    )
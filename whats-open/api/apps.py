@@ -0,0 +1,20 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+api/apps.py
+
+Application configuration for the api app.
+
+https://docs.djangoproject.com/en/2.0/ref/applications/
+"""
+# Django Imports
+from django.apps import AppConfig
+
+
+class ApiConfig(AppConfig):
+    name = "api"
+
+    def ready(self):
+        # Connect the signal handlers
+        from . import export, signals, warming  # noqa: F401
+        from .backends import health  # noqa: F401
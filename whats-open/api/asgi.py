@@ -0,0 +1,191 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+api/asgi.py
+
+Serve the Django (WSGI) application over ASGI.
+
+Django 2.0 can only handle requests synchronously, so every request still
+runs in a thread. What ASGI buys us is that the thread is only held while the
+view runs: reading the request body and writing the response to the client
+happen on the event loop. A client that is slow to send its request or to
+read its response therefore costs an open socket instead of a whole worker
+thread, and the number of threads (and database connections) per process
+stays fixed at WOPEN_ASGI_THREADS. A view that waits itself still holds its
+thread for as long as it waits: a long poll of /api/alerts/?wait= sleeps in
+the view for up to 25 seconds, which is why ALERTS_MAX_WAITERS bounds how
+many of them wait at once (see api/alerts.py).
+
+On top of that, identical anonymous GET requests from one client to the hot
+read endpoints that arrive while one of them is running share its response
+instead of each taking a thread (request coalescing). Requests of different
+clients are kept apart, throttling counts and answers each client on its own
+(see api/throttling.py), and only 200 responses are shared.
+
+https://asgi.readthedocs.io/en/latest/specs/www.html
+"""
+# Python std. lib. imports
+import asyncio
+import io
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+# Endpoints that polling clients hit, whose concurrent identical requests are
+# answered with a single response
+HOT_PATHS = ("/api/facilities/", "/api/alerts/", "/api/map/")
+
+# Requests carrying these headers can get a per user response
+PRIVATE_HEADERS = (b"cookie", b"authorization")
+
+
+def build_environ(scope, body):
+    """
+    Turn an ASGI http scope and the request body into a WSGI environ.
+    """
+    server = scope.get("server") or ("localhost", 80)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode("utf8").decode("latin1"),
+        "PATH_INFO": scope["path"].encode("utf8").decode("latin1"),
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": "HTTP/%s" % scope.get("http_version", "1.1"),
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+    if scope.get("client"):
+        environ["REMOTE_ADDR"] = scope["client"][0]
+        environ["REMOTE_PORT"] = str(scope["client"][1])
+
+    for name, value in scope.get("headers", []):
+        name = name.decode("latin1")
+        if name == "content-length":
+            key = "CONTENT_LENGTH"
+        elif name == "content-type":
+            key = "CONTENT_TYPE"
+        else:
+            key = "HTTP_" + name.upper().replace("-", "_")
+        value = value.decode("latin1")
+        # Repeated headers are folded into one, as a WSGI server would
+        environ[key] = environ[key] + "," + value if key in environ else value
+    return environ
+
+
+class ThreadPoolASGIHandler(object):
+    """
+    ASGI application that runs a WSGI application in a bounded thread pool.
+    """
+
+    def __init__(self, wsgi_application, max_threads):
+        self.wsgi_application = wsgi_application
+        self.executor = ThreadPoolExecutor(max_threads)
+        # Responses being computed for coalesced requests, by request key
+        self.in_flight = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            return await self.lifespan(receive, send)
+        if scope["type"] != "http":
+            raise ValueError("Unsupported ASGI scope type: %s" % scope["type"])
+
+        body = await self.read_body(receive)
+        if body is None:
+            # The client went away before sending the whole request
+            return
+        environ = build_environ(scope, body)
+
+        key = self.coalesce_key(scope)
+        if key is None:
+            response = await self.run(environ)
+        elif key in self.in_flight:
+            response = await asyncio.shield(self.in_flight[key])
+            if response[0] != 200:
+                # Errors (ex. a 429 and its Retry-After) are not handed on
+                response = await self.run(environ)
+        else:
+            future = asyncio.ensure_future(self.run(environ))
+            self.in_flight[key] = future
+            try:
+                response = await asyncio.shield(future)
+            finally:
+                del self.in_flight[key]
+
+        status, headers, content = response
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": content})
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                self.executor.shutdown(wait=True)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def read_body(self, receive):
+        chunks = []
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return None
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                return b"".join(chunks)
+
+    def coalesce_key(self, scope):
+        """
+        Return the key that identical requests share, or None when a request
+        has to get its own response.
+        """
+        if scope["method"] != "GET" or scope["path"] not in HOT_PATHS:
+            return None
+        headers = dict(scope.get("headers", []))
+        if any(name in headers for name in PRIVATE_HEADERS):
+            return None
+        client = scope.get("client") or ("", 0)
+        return (
+            # Whichever of them the throttle identifies the client by
+            client[0],
+            headers.get(b"x-forwarded-for", b""),
+            scope["path"],
+            scope.get("query_string", b""),
+            headers.get(b"accept", b""),
+            headers.get(b"accept-encoding", b""),
+        )
+
+    async def run(self, environ):
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(self.executor, self.run_wsgi, environ)
+
+    def run_wsgi(self, environ):
+        """
+        Call the WSGI application and return its (status, headers, body).
+
+        The whole body is read in the worker thread, and closing the result
+        fires request_finished, so database connections are cleaned up by the
+        thread that used them.
+        """
+        started = {}
+
+        def start_response(status, headers, exc_info=None):
+            started["status"] = int(status.split(" ", 1)[0])
+            started["headers"] = [
+                (name.lower().encode("latin1"), value.encode("latin1"))
+                for name, value in headers
+            ]
+
+        result = self.wsgi_application(environ, start_response)
+        try:
+            content = b"".join(result)
+        finally:
+            if hasattr(result, "close"):
+                result.close()
+        return started["status"], started["headers"], content
@@ -0,0 +1,9 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+api/backends/__init__.py
+
+Database connection handling: health checks for persistent connections and
+a process wide connection pool (see pool.py and the api.backends.mysql
+database engine).
+"""
@@ -0,0 +1,49 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+api/backends/health.py
+
+Health checks for persistent database connections (CONN_MAX_AGE > 0).
+
+Django only checks a persistent connection after a query on it failed, so a
+connection that the database server dropped while it sat idle (ex. MySQL's
+wait_timeout) fails the first query of the next request. Connections that
+have been idle for longer than DB_HEALTH_CHECK_SECONDS are pinged when a
+request starts and closed (to be reopened on demand) if they are gone.
+
+Connected in ApiConfig.ready().
+"""
+# Python std. lib. imports
+import time
+
+# Django Imports
+from django.conf import settings
+from django.core.signals import request_finished, request_started
+from django.db import connections
+from django.dispatch import receiver
+
+
+@receiver(request_started)
+def check_connections(**kwargs):
+    """
+    Close the idle persistent connections that no longer work.
+    """
+    max_idle = getattr(settings, "DB_HEALTH_CHECK_SECONDS", None)
+    if max_idle is None:
+        return
+    now = time.time()
+    for connection in connections.all():
+        if connection.connection is None or connection.in_atomic_block:
+            continue
+        if now - getattr(connection, "last_used", now) < max_idle:
+            continue
+        if not connection.is_usable():
+            connection.close()
+
+
+@receiver(request_finished)
+def mark_connections_used(**kwargs):
+    now = time.time()
+    for connection in connections.all():
+        if connection.connection is not None:
+            connection.last_used = now
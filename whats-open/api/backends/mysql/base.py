@@ -0,0 +1,28 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+api/backends/mysql/base.py
+
+The GeoDjango MySQL database engine with pooled connections.
+
+    "ENGINE": "api.backends.mysql",
+    "CONN_MAX_AGE": 0,
+    "POOL_SIZE": 10,
+"""
+# Django Imports
+from django.contrib.gis.db.backends.mysql.base import (
+    DatabaseWrapper as MySQLDatabaseWrapper,
+)
+
+# App Imports
+from ..pool import PooledDatabaseWrapperMixin
+
+
+class DatabaseWrapper(PooledDatabaseWrapperMixin, MySQLDatabaseWrapper):
+    def validate_connection(self, connection):
+        # A ping is cheaper than a round trip through a cursor
+        try:
+            connection.ping()
+        except self.Database.Error:
+            return False
+        return True
@@ -0,0 +1,171 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+api/backends/pool.py
+
+A connection pool shared by every thread of a worker process.
+
+Django gives each thread its own connection, so a gthread gunicorn worker
+with persistent connections holds one open connection per thread, even while
+most of them sit idle. With a pool each thread borrows a connection for the
+length of a request (CONN_MAX_AGE = 0 closes it, which hands it back) and the
+worker keeps at most POOL_SIZE idle connections around.
+"""
+# Python std. lib. imports
+import os
+import threading
+from collections import OrderedDict, deque
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class ConnectionPool(object):
+    """
+    Idle DB-API connections plus counters of what happened to them.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.idle = deque()
+        self.lock = threading.Lock()
+        self.created = 0
+        self.reused = 0
+        self.discarded = 0
+        self.in_use = 0
+
+    def acquire(self, connect, validate):
+        """
+        Return an idle connection that passes `validate`, or a new one from
+        `connect` if there is none.
+        """
+        while True:
+            with self.lock:
+                connection = self.idle.pop() if self.idle else None
+            if connection is None:
+                connection = connect()
+                with self.lock:
+                    self.created += 1
+                    self.in_use += 1
+                return connection
+            if validate(connection):
+                with self.lock:
+                    self.reused += 1
+                    self.in_use += 1
+                return connection
+            self.close(connection)
+            with self.lock:
+                self.discarded += 1
+
+    def release(self, connection):
+        """
+        Hand a borrowed connection back, closing it if the pool is full.
+        """
+        with self.lock:
+            self.in_use -= 1
+            if len(self.idle) < self.size:
+                self.idle.append(connection)
+                return
+            self.discarded += 1
+        self.close(connection)
+
+    def discard(self, connection):
+        """
+        Close a borrowed connection that must not be used again.
+        """
+        with self.lock:
+            self.in_use -= 1
+            self.discarded += 1
+        self.close(connection)
+
+    def close(self, connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def stats(self):
+        with self.lock:
+            return OrderedDict(
+                (
+                    ("size", self.size),
+                    ("idle", len(self.idle)),
+                    ("in_use", self.in_use),
+                    ("created", self.created),
+                    ("reused", self.reused),
+                    ("discarded", self.discarded),
+                )
+            )
+
+
+def get_pool(alias, size):
+    """
+    Return the pool of a database alias in the current process.
+
+    Pools are keyed on the process id as well, so that a worker forked from a
+    process that already had a pool never shares its connections.
+    """
+    key = (os.getpid(), alias)
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = ConnectionPool(size)
+        return _pools[key]
+
+
+def pool_stats():
+    """
+    Return the counters of every pool in the current worker process.
+    """
+    pid = os.getpid()
+    with _pools_lock:
+        pools = [(alias, pool) for (owner, alias), pool in _pools.items() if owner == pid]
+    return OrderedDict(
+        (("pid", pid), ("pools", OrderedDict((alias, pool.stats()) for alias, pool in pools)))
+    )
+
+
+class PooledDatabaseWrapperMixin(object):
+    """
+    DatabaseWrapper mixin that borrows connections from the worker's pool
+    instead of opening and closing them.
+
+    The pool size is read from the POOL_SIZE key of the database settings.
+    """
+
+    @property
+    def pool(self):
+        return get_pool(self.alias, self.settings_dict.get("POOL_SIZE", 10))
+
+    def get_new_connection(self, conn_params):
+        parent = super(PooledDatabaseWrapperMixin, self)
+        return self.pool.acquire(
+            lambda: parent.get_new_connection(conn_params), self.validate_connection
+        )
+
+    def validate_connection(self, connection):
+        """
+        Return true if an idle connection from the pool still works.
+        """
+        try:
+            cursor = connection.cursor()
+            cursor.execute("SELECT 1")
+            cursor.close()
+        except Exception:
+            return False
+        return True
+
+    def _close(self):
+        if self.connection is None:
+            return
+        if self.in_atomic_block or self.errors_occurred:
+            # Django may keep using a connection that is closed in the middle
+            # of a transaction, and a failed one might be broken
+            self.pool.discard(self.connection)
+            return
+        try:
+            # Never hand out a connection with an open transaction
+            self.connection.rollback()
+        except Exception:
+            self.pool.discard(self.connection)
+        else:
+            self.pool.release(self.connection)
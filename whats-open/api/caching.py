@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+api/caching.py
+
+Cached API responses that only one worker recomputes at a time.
+
+When a cached response expires, or its campus is invalidated (see
+api/campuses.py), the first worker to ask for it takes a lock and recomputes
+it. Every other worker keeps serving the response it replaces (the stale
+copy) in the meantime instead of recomputing it as well, and workers without
+a stale copy wait a little while for the lock holder. The lock is a
+cache.add(), which is atomic in Redis, so only one worker across every process
+gets it. Each holder only releases a lock that still holds its own token, a
+holder that took longer than LOCK_SECONDS leaves the next holder's lock be.
+Redis compares and deletes it in one step (a Lua script). Any other backend
+cannot, so there the lock is left to expire. Every cache key has its own lock
+so that a new campus version or alert state is never held up by it, but a
+response that expires again within LOCK_SECONDS is served stale until then.
+
+api/warming.py recomputes the most requested responses before clients ask
+for them.
+"""
+# Python std. lib. imports
+import time
+import uuid
+
+# Django Imports
+from django.core.cache import cache
+
+# How long a worker may take to recompute a response before another one
+# takes over
+LOCK_SECONDS = 30
+# How long the last response to a request is kept to be served while a new
+# one is computed
+STALE_SECONDS = 60 * 60 * 24
+# How often a worker without a stale copy checks whether the lock holder is
+# done
+WAIT_SECONDS = 0.05
+# How long a worker without a stale copy waits for the lock holder before it
+# computes the response itself. The wait holds a request thread.
+MAX_WAIT_SECONDS = 3
+
+# Deletes a lock (KEYS[1]) only if it still holds a token (ARGV[1])
+RELEASE_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+def redis_client(backend, key):
+    """
+    Return the Redis client that a django-redis-cache backend (the one used
+    in production) keeps a key on, along with the key as it is stored in Redis.
+    Other backends return (None, key).
+    """
+    get_client = getattr(backend, "get_client", None)
+    if get_client is None:
+        return None, key
+    key = backend.make_key(key)
+    return get_client(key, write=True), key
+
+
+def cached(key, stale_key, compute):
+    """
+    Return the value cached under a key, or else have one worker call
+    compute() for it while the others get the value last cached under the
+    stale key.
+
+    compute() returns the value along with the number of seconds to cache
+    it for.
+    """
+    value = cache.get(key)
+    if value is not None:
+        return value
+
+    lock = "lock:%s" % key
+    token = uuid.uuid4().hex
+    if cache.add(lock, token, LOCK_SECONDS):
+        try:
+            return store(key, stale_key, compute)
+        finally:
+            release(lock, token)
+
+    value = cache.get(stale_key)
+    if value is not None:
+        return value
+
+    deadline = time.monotonic() + MAX_WAIT_SECONDS
+    while time.monotonic() < deadline:
+        time.sleep(WAIT_SECONDS)
+        value = cache.get(key)
+        if value is not None:
+            return value
+        if cache.get(lock) is None:
+            # The lock holder gave up (ex. its query failed)
+            break
+    return store(key, stale_key, compute)
+
+
+def release(lock, token):
+    """
+    Delete a lock if it still holds a token. It does not when the lock
+    expired and another worker took it, because this one took longer than
+    LOCK_SECONDS.
+    """
+    client, key = redis_client(cache, lock)
+    if client is not None:
+        # Compare and delete in one atomic step
+        client.eval(RELEASE_SCRIPT, 1, key, cache.prep_value(token))
+    # Other backends cannot compare and delete atomically, the lock expires
+
+
+def store(key, stale_key, compute):
+    value, timeout = compute()
+    cache.set(key, value, timeout)
+    cache.set(stale_key, value, STALE_SECONDS)
+    return value
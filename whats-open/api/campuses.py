@@ -0,0 +1,160 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+api/campuses.py
+
+Partition cached responses by campus_region.
+
+Every campus has its own cache version. A cache key for one campus is built
+from that campus' version, and a key for every campus from all of them, so
+that a change on one campus only drops the cached responses that include it.
+The signals in api/signals.py work out which campuses a change touches.
+"""
+# Python std. lib. imports
+import hashlib
+import uuid
+
+# Django Imports
+from django.core.cache import cache
+from django.db.models import Q
+from django.dispatch import Signal
+from django.utils import translation
+
+# Other Imports
+from rest_framework.exceptions import ParseError
+from rest_framework.settings import api_settings
+
+# App Imports
+from .models import Facility, Location
+
+CAMPUSES = tuple(choice for choice, name in Location.CAMPUS_LOCATIONS)
+
+# Cached catalog responses are rebuilt at least this often even when nothing
+# on their campus has changed.
+CATALOG_CACHE_SECONDS = 300
+
+# Sent with the campuses whose cached responses were dropped, or None for
+# every campus (see api/warming.py)
+campuses_invalidated = Signal(providing_args=["campuses"])
+
+
+def slug(campus):
+    # Memcached does not allow spaces in keys (ex. "prince william")
+    return campus.replace(" ", "-") if campus else "all"
+
+
+def version_key(campus):
+    return "campus:%s:version" % slug(campus)
+
+
+def campus_version(campus=None):
+    """
+    Return the cache version of a campus, or of every campus.
+    """
+    campuses = (campus,) if campus else CAMPUSES
+    versions = cache.get_many([version_key(campus) for campus in campuses])
+    for campus in campuses:
+        key = version_key(campus)
+        if key not in versions:
+            cache.add(key, uuid.uuid4().hex, None)
+            versions[key] = cache.get(key, "")
+    return ".".join(versions[version_key(campus)] for campus in campuses)
+
+
+def campus_cache_key(prefix, campus=None, *parts):
+    """
+    Return a cache key that changes whenever the campus (or any campus) is
+    invalidated.
+    """
+    return ":".join(
+        (prefix, slug(campus), campus_version(campus)) + tuple(str(part) for part in parts)
+    )
+
+
+def invalidate_campuses(campuses=None):
+    """
+    Drop the cached responses of some campuses, or of every campus, by moving
+    them on to a new version.
+    """
+    cache.set_many(
+        {
+            version_key(campus): uuid.uuid4().hex
+            for campus in (CAMPUSES if campuses is None else campuses)
+            if campus
+        },
+        None,
+    )
+    campuses_invalidated.send(sender=None, campuses=campuses)
+
+
+def facility_campuses(facility_ids):
+    """
+    Return the campuses of some facilities.
+    """
+    return set(
+        Facility.objects.filter(pk__in=facility_ids).values_list(
+            "facility_location__campus_region", flat=True
+        )
+    )
+
+
+def schedule_campuses(schedule_ids):
+    """
+    Return the campuses of the facilities that use some schedules, as a main
+    or a special schedule.
+    """
+    return set(
+        Facility.objects.filter(
+            Q(main_schedule__in=schedule_ids) | Q(special_schedules__in=schedule_ids)
+        ).values_list("facility_location__campus_region", flat=True)
+    )
+
+
+def get_campus(request):
+    """
+    Return the ?campus= of a request, or None when it is not given.
+    """
+    campus = request.query_params.get("campus") or None
+    if campus is not None and campus not in CAMPUSES:
+        raise ParseError(
+            "Invalid campus value: %s. Expected one of: %s" % (campus, ", ".join(CAMPUSES))
+        )
+    return campus
+
+
+def request_digest(request, ignore=()):
+    """
+    Return a digest of the query parameters of a request, leaving out the
+    ignored ones, and of the language it is answered in. ?format= is always
+    left out, the format a response is rendered in is part of its cache key
+    either way.
+    """
+    ignore = (api_settings.URL_FORMAT_OVERRIDE,) + tuple(ignore)
+    params = sorted(
+        (name, values)
+        for name, values in request.query_params.lists()
+        if name not in ignore
+    )
+    # Hours summaries are localized (see LocaleMiddleware)
+    params.append(translation.get_language())
+    return hashlib.md5(repr(params).encode("utf-8")).hexdigest()
+
+
+def request_cache_key(prefix, request, campus=None):
+    """
+    Return the cache key of a response to a request, which depends on its
+    query parameters and on the format it is rendered in.
+    """
+    return campus_cache_key(
+        prefix, campus, request.accepted_renderer.format, request_digest(request)
+    )
+
+
+def request_stale_key(prefix, request, campus=None):
+    """
+    Return the key that the last response to a request is kept under, which
+    outlives the campus versions (see api/caching.py).
+    """
+    return ":".join(
+        (prefix, slug(campus), "stale", request.accepted_renderer.format, request_digest(request))
+    )
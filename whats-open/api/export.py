@@ -0,0 +1,294 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+api/export.py
+
+Render the public API into a tree of static, precompressed JSON files that
+nginx (or a CDN) can serve without going through Django.
+
+The tree mirrors the API's URLs. Every response is an index.json, along with
+an index.json.gz for nginx's gzip_static, in the directory of its path:
+
+    api/facilities/index.json                  /api/facilities/
+    api/facilities/campus/<campus>/index.json  /api/facilities/?campus=<campus>
+    api/facilities/<slug>/index.json           /api/facilities/<slug>/
+    api/categories/index.json                  /api/categories/
+    api/locations/index.json                   /api/locations/
+    api/alerts/index.json                      /api/alerts/
+
+Campuses with spaces in their name have dashes instead (ex. prince-william).
+
+Each export is written to a new directory under EXPORT_ROOT/releases and then
+swapped in by renaming the EXPORT_ROOT/current symlink over, so the tree that
+is served is always a complete one. With STATIC_EXPORT on, every change that
+drops cached responses (see api/campuses.py and api/alerts.py) exports the
+tree again in a background thread once its transaction commits.
+
+Facilities open and close, and alerts start and end, without any change to
+the data. The moment a tree goes out of date is kept in its manifest.json,
+run `manage.py export_static --if-expired` from cron to keep up with them.
+"""
+# Python std. lib. imports
+import datetime
+import fcntl
+import gzip
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import uuid
+from collections import namedtuple
+
+# Django Imports
+from django.conf import settings
+from django.db import connections, transaction
+from django.dispatch import receiver
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+# Other Imports
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+
+# App Imports
+from .alerts import alerts_invalidated
+from .campuses import CAMPUSES, CATALOG_CACHE_SECONDS, campuses_invalidated, slug
+from .models import OpenStateContext
+
+logger = logging.getLogger(__name__)
+
+# Releases that are kept besides the current one, for the readers that are
+# still going through them when it is swapped in
+KEEP_RELEASES = 2
+
+# The path and the moment a tree was exported, the number of files in it and
+# the moment it goes out of date
+Export = namedtuple("Export", ["path", "generated_at", "files", "expires_at"])
+
+# Whether the current thread's transaction exports the tree once it commits
+pending = threading.local()
+
+# One background export per process runs at a time, and at most one more
+# waits for it (the waiting one picks up every change made in the meantime)
+running = threading.Lock()
+queued = threading.Event()
+
+
+def build_view(viewset, path, params=None, action="list"):
+    """
+    Return an instance of a viewset that is set up to answer a GET request
+    for JSON, without dispatching the request (which would go through the
+    response caches of the views, see api/caching.py).
+    """
+    view = viewset(action_map={"get": action}, format_kwarg=None, args=(), kwargs={})
+    request = view.initialize_request(
+        APIRequestFactory().get(path, dict(params or {}, format="json"))
+    )
+    view.request = request
+    view.headers = {}
+    request.accepted_renderer, request.accepted_media_type = (
+        view.perform_content_negotiation(request)
+    )
+    return view
+
+
+def serialize(view):
+    return view.get_serializer(view.filter_queryset(view.get_queryset()), many=True)
+
+
+class Tree(object):
+    """
+    A directory of JSON responses being written.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.files = 0
+        self.renderer = JSONRenderer()
+
+    def write(self, url, data):
+        content = self.renderer.render(data)
+        directory = os.path.join(self.path, *url.strip("/").split("/"))
+        os.makedirs(directory, exist_ok=True)
+        target = os.path.join(directory, "index.json")
+        with open(target, "wb") as output:
+            output.write(content)
+        # No timestamp so that the same response always compresses the same
+        with open(target + ".gz", "wb") as output:
+            with gzip.GzipFile(fileobj=output, mode="wb", compresslevel=9, mtime=0) as compressed:
+                compressed.write(content)
+        self.files += 1
+
+
+def write_tree(tree, now):
+    """
+    Write every exported response into a tree and return the moment the
+    first of them goes out of date.
+    """
+    # Imported here, the views import the models this module is loaded with
+    from .views import AlertViewSet, CategoryViewSet, FacilityViewSet, LocationViewSet
+
+    expires_at = now + datetime.timedelta(seconds=CATALOG_CACHE_SECONDS)
+
+    catalog = serialize(build_view(FacilityViewSet, "/api/facilities/"))
+    data = catalog.data
+    tree.write("/api/facilities/", data)
+    # The catalog includes everything that the campus and detail responses
+    # hold, they are written from it rather than serialized again
+    by_campus = {campus: [] for campus in CAMPUSES}
+    for facility, item in zip(catalog.instance, data):
+        tree.write("/api/facilities/%s/" % facility.slug, item)
+        campus = facility.facility_location.campus_region
+        if campus in by_campus:
+            by_campus[campus].append(item)
+    for campus, items in by_campus.items():
+        tree.write("/api/facilities/campus/%s/" % slug(campus), items)
+    next_change = catalog.context.get("next_change")
+    if next_change is not None:
+        expires_at = min(expires_at, next_change)
+
+    alerts = build_view(AlertViewSet, "/api/alerts/")
+    tree.write("/api/alerts/", serialize(alerts).data)
+    next_boundary = alerts.active_alerts().next_boundary
+    if next_boundary is not None:
+        expires_at = min(expires_at, next_boundary)
+
+    tree.write("/api/categories/", serialize(build_view(CategoryViewSet, "/api/categories/")).data)
+    tree.write("/api/locations/", serialize(build_view(LocationViewSet, "/api/locations/")).data)
+    return expires_at
+
+
+def current_path(root):
+    return os.path.join(root, "current")
+
+
+def swap(root, release):
+    """
+    Point root/current at a release in one rename.
+    """
+    link = os.path.join(root, ".current-%s" % uuid.uuid4().hex)
+    os.symlink(os.path.relpath(release, root), link)
+    os.replace(link, current_path(root))
+
+
+def prune(releases, current):
+    """
+    Remove every release but the current one and the KEEP_RELEASES before it.
+    """
+    names = sorted(
+        name for name in os.listdir(releases) if os.path.join(releases, name) != current
+    )
+    for name in names[: max(0, len(names) - KEEP_RELEASES)]:
+        shutil.rmtree(os.path.join(releases, name), ignore_errors=True)
+
+
+def read_manifest(root=None):
+    """
+    Return the manifest of the current tree, or None when there is none.
+    """
+    path = os.path.join(current_path(root or settings.EXPORT_ROOT), "manifest.json")
+    try:
+        with open(path) as manifest:
+            return json.load(manifest)
+    except (OSError, ValueError):
+        return None
+
+
+def is_expired(root=None, now=None):
+    manifest = read_manifest(root)
+    if manifest is None:
+        return True
+    return parse_datetime(manifest["expires_at"]) <= (now or timezone.now())
+
+
+def export_static(root=None):
+    """
+    Export the tree under a root (EXPORT_ROOT by default), swap it in and
+    return its Export.
+    """
+    root = root or settings.EXPORT_ROOT
+    releases = os.path.join(root, "releases")
+    os.makedirs(releases, exist_ok=True)
+    # Exports of every process take turns, so that the last one to be swapped
+    # in is the one that read the data last
+    with open(os.path.join(root, ".lock"), "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        now = timezone.now()
+        # Named after the moment so that releases sort by age
+        path = tempfile.mkdtemp(prefix=now.strftime("%Y%m%dT%H%M%S%f-"), dir=releases)
+        try:
+            tree = Tree(path)
+            # Every facility is evaluated at the same instant
+            with OpenStateContext.activate(OpenStateContext(now)):
+                expires_at = write_tree(tree, now)
+            with open(os.path.join(path, "manifest.json"), "w") as manifest:
+                json.dump(
+                    {
+                        "generated_at": now.isoformat(),
+                        "expires_at": expires_at.isoformat(),
+                        "files": tree.files,
+                    },
+                    manifest,
+                )
+            # Readable by the web server, mkdtemp() leaves it to its owner
+            os.chmod(path, 0o755)
+            swap(root, path)
+        except BaseException:
+            shutil.rmtree(path, ignore_errors=True)
+            raise
+        prune(releases, path)
+    return Export(path, now, tree.files, expires_at)
+
+
+def export_in_background():
+    if queued.is_set():
+        # The export that is waiting will include this change
+        return
+    queued.set()
+
+    def export():
+        try:
+            with running:
+                queued.clear()
+                export_static()
+        except Exception:
+            logger.exception("Static export failed")
+        finally:
+            # The thread's connections are not closed at the end of a request
+            connections.close_all()
+
+    threading.Thread(target=export, daemon=True).start()
+
+
+def start_export():
+    if not getattr(pending, "export", False):
+        # Another callback of the same transaction already started it
+        return
+    pending.export = False
+    export_in_background()
+
+
+def export_after_commit():
+    """
+    Export the tree again in the background once the current transaction
+    commits.
+    """
+    if not settings.STATIC_EXPORT:
+        return
+    pending.export = True
+    # Registered every time, like api/warming.py does
+    transaction.on_commit(start_export)
+
+
+@receiver(campuses_invalidated)
+def campuses_changed(sender, campuses, **kwargs):
+    if campuses is not None and not any(campuses):
+        return
+    export_after_commit()
+
+
+@receiver(alerts_invalidated)
+def alerts_changed(sender, **kwargs):
+    export_after_commit()
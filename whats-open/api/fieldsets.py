@@ -0,0 +1,213 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+api/fieldsets.py
+
+Sparse fieldsets for API responses.
+
+Clients can trim the serialized tree with the following query parameters,
+each taking a comma separated list of (dotted) field names:
+
+- ?fields= only returns the listed fields
+  (ex. ?fields=slug,facility_name,main_schedule.open_times)
+- ?exclude= drops the listed fields
+  (ex. ?exclude=facility_location.coordinate_location)
+- ?expand= only renders the listed relations (and everything inside of them)
+  as nested objects, every other nested object is collapsed to its primary
+  key(s) (ex. ?expand= collapses all of them, ?expand=main_schedule only
+  keeps the main schedule and its open times nested)
+
+The related lookups (select_related / prefetch_related) needed to render a
+response are derived from the pruned serializer tree, so a smaller response
+also runs fewer queries.
+"""
+# Django Imports
+from django.core.exceptions import FieldDoesNotExist
+
+# Other Imports
+from rest_framework import serializers
+
+
+def parse_paths(value):
+    """
+    Turn a "slug,main_schedule.name" query parameter into a set of tuples.
+    """
+    return {
+        tuple(part for part in path.strip().split(".") if part)
+        for path in value.split(",")
+        if path.strip()
+    }
+
+
+class FieldSet(object):
+    """
+    The fields that a client asked for through ?fields=, ?exclude= and
+    ?expand=. Each of them is None when the parameter was not given.
+    """
+
+    def __init__(self, fields=None, exclude=None, expand=None):
+        self.fields = fields
+        self.exclude = exclude
+        self.expand = expand
+
+    @classmethod
+    def from_request(cls, request):
+        """
+        Read the sparse fieldset query parameters off of a request.
+        """
+        if request is None:
+            return cls()
+        params = request.query_params
+        return cls(
+            *(
+                parse_paths(params[name]) if name in params else None
+                for name in ("fields", "exclude", "expand")
+            )
+        )
+
+    def is_empty(self):
+        return self.fields is None and self.exclude is None and self.expand is None
+
+    def includes(self, path):
+        """
+        Return true if the field at `path` should be serialized.
+        """
+        if self.exclude and path in self.exclude:
+            return False
+        if self.fields is None:
+            return True
+        return any(
+            # The field, or one of its parents, was asked for
+            path[: len(field)] == field
+            # A field nested underneath this one was asked for
+            or field[: len(path)] == path
+            for field in self.fields
+        )
+
+    def expands(self, path):
+        """
+        Return true if the relation at `path` should be a nested object.
+        """
+        if self.expand is None:
+            return True
+        return any(
+            path[: len(field)] == field or field[: len(path)] == path
+            for field in self.expand
+        )
+
+
+def field_path(field):
+    """
+    Return the names leading from the root serializer to a bound field.
+    """
+    path = []
+    while field is not None and field.parent is not None:
+        # Children of a ListSerializer are bound with an empty field_name
+        if field.field_name:
+            path.append(field.field_name)
+        field = field.parent
+    return tuple(reversed(path))
+
+
+def collapse(field):
+    """
+    Return a primary key field that replaces a nested serializer field.
+    """
+    kwargs = {"read_only": True}
+    if field.source:
+        kwargs["source"] = field.source
+    if isinstance(field, serializers.ListSerializer):
+        kwargs["many"] = True
+    return serializers.PrimaryKeyRelatedField(**kwargs)
+
+
+class SparseFieldsetsMixin(object):
+    """
+    Serializer mixin that prunes its fields with the FieldSet passed in the
+    serializer context under "fieldset".
+    """
+
+    def get_fields(self):
+        fields = super(SparseFieldsetsMixin, self).get_fields()
+        fieldset = self.context.get("fieldset")
+        if fieldset is None or fieldset.is_empty():
+            return fields
+
+        path = field_path(self)
+        for name, field in list(fields.items()):
+            child_path = path + (name,)
+            if not fieldset.includes(child_path):
+                del fields[name]
+            elif isinstance(field, serializers.BaseSerializer):
+                if not fieldset.expands(child_path):
+                    fields[name] = collapse(field)
+        return fields
+
+
+def related_lookups(serializer, model, prefix="", selectable=True):
+    """
+    Walk a serializer and return the (select_related, prefetch_related)
+    lookups that rendering it needs.
+
+    Nested single objects are joined in with select_related, anything that
+    is many-valued (or sits underneath something many-valued) is prefetched.
+    Relations collapsed to a primary key need no lookup at all, and fields
+    that compute their value from relations list them in `related_lookups`.
+    """
+    select = []
+    prefetch = []
+    for field in serializer.fields.values():
+        # Computed fields can name the relations they read
+        for lookup in getattr(field, "related_lookups", ()):
+            prefetch.append(prefix + lookup)
+        if not field.source or field.source == "*" or "." in field.source:
+            continue
+        try:
+            model_field = model._meta.get_field(field.source)
+        except FieldDoesNotExist:
+            continue
+        if not model_field.is_relation:
+            continue
+
+        lookup = prefix + field.source
+        many = model_field.many_to_many or model_field.one_to_many
+        nested = getattr(field, "child", field)
+        if many:
+            prefetch.append(lookup)
+        elif isinstance(nested, serializers.BaseSerializer):
+            (select if selectable else prefetch).append(lookup)
+        else:
+            # A primary key is read straight off of the foreign key column
+            continue
+
+        if isinstance(nested, serializers.BaseSerializer):
+            nested_select, nested_prefetch = related_lookups(
+                nested,
+                model_field.related_model,
+                prefix=lookup + "__",
+                selectable=selectable and not many,
+            )
+            select.extend(nested_select)
+            prefetch.extend(nested_prefetch)
+    return select, prefetch
+
+
+class SparseFieldsetsViewMixin(object):
+    """
+    ViewSet mixin that hands the request's FieldSet to the serializer and
+    only joins or prefetches the relations that end up being serialized.
+    """
+
+    def get_serializer_context(self):
+        context = super(SparseFieldsetsViewMixin, self).get_serializer_context()
+        context["fieldset"] = FieldSet.from_request(self.request)
+        return context
+
+    def filter_queryset(self, queryset):
+        queryset = super(SparseFieldsetsViewMixin, self).filter_queryset(queryset)
+        select, prefetch = related_lookups(self.get_serializer(), queryset.model)
+        if select:
+            queryset = queryset.select_related(*select)
+        if prefetch:
+            queryset = queryset.prefetch_related(*prefetch)
+        return queryset
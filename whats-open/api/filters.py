@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+api/filters.py
+
+Filter backends for the query parameters that django-filter's field filters
+can not express.
+
+http://www.django-rest-framework.org/api-guide/filtering/#custom-generic-filtering
+"""
+# Python std. lib. imports
+import operator
+from functools import reduce
+
+# Django Imports
+from django.db.models import Q
+
+# Other Imports
+from rest_framework.exceptions import ParseError
+from rest_framework.filters import BaseFilterBackend
+
+
+class TagFilter(BaseFilterBackend):
+    """
+    Filter Facilities on a comma separated list of tag names with ?tags=.
+
+    By default a Facility matches when it has any of the tags, with
+    ?tags_match=all it has to have every one of them. Tag names are matched
+    case insensitively against the denormalized Facility.tag_names column so
+    no join through taggit is needed.
+    """
+
+    tags_param = "tags"
+    match_param = "tags_match"
+    MATCHES = ("any", "all")
+
+    def filter_queryset(self, request, queryset, view):
+        value = request.query_params.get(self.tags_param)
+        if not value:
+            return queryset
+        names = [name.strip() for name in value.split(",") if name.strip()]
+        if not names:
+            return queryset
+
+        match = request.query_params.get(self.match_param, "any")
+        if match not in self.MATCHES:
+            raise ParseError(
+                "%s must be one of: %s" % (self.match_param, ", ".join(self.MATCHES))
+            )
+
+        lookups = [Q(tag_names__icontains=",%s," % name) for name in names]
+        combine = operator.and_ if match == "all" else operator.or_
+        return queryset.filter(reduce(combine, lookups))
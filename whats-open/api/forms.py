@@ -0,0 +1,213 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+api/forms.py
+
+Forms for the admin interface.
+
+A schedule's open times are edited as a weekly grid, one line per day that
+lists the ranges starting on it (ex. "7:00-11:00, 12:00-21:00"). A range that
+ends at or before its start runs past midnight into the next day
+("20:00-2:00"), and one that ends on any other day names it ("20:00-Mon 8:30").
+"""
+# Python std. lib. imports
+import datetime
+import re
+
+# Django Imports
+from django import forms
+from django.core.exceptions import ValidationError
+
+# App Imports
+from .intervals import INVERTED, ZERO_LENGTH, canonical_rows, check_open_times
+from .models import OpenTime, Schedule
+
+DAY_NAMES = [name for day, name in OpenTime.DAY_CHOICES]
+DAY_ABBREVIATIONS = {name[:3].lower(): day for day, name in OpenTime.DAY_CHOICES}
+
+# "7:00-21:00", "20:00-2:00" or "20:00-Mon 8:30", seconds optional
+RANGE = re.compile(
+    r"^(?P<start>\d{1,2}:\d{2}(?::\d{2})?)\s*-\s*"
+    r"(?:(?P<end_day>[a-z]{3})[a-z]*\.?\s+)?"
+    r"(?P<end>\d{1,2}:\d{2}(?::\d{2})?)$",
+    re.IGNORECASE,
+)
+
+
+def format_time(time):
+    if time.second:
+        return "%d:%02d:%02d" % (time.hour, time.minute, time.second)
+    return "%d:%02d" % (time.hour, time.minute)
+
+
+def parse_time(text):
+    parts = [int(part) for part in text.split(":")]
+    try:
+        return datetime.time(*parts)
+    except ValueError:
+        raise ValidationError("%s is not a time of day." % text)
+
+
+def format_range(start_day, start_time, end_day, end_time):
+    """
+    Return the grid text of an open time, on the line of its start day.
+    """
+    text = "%s-%s" % (format_time(start_time), format_time(end_time))
+    if end_day == start_day and end_time > start_time:
+        return text
+    if end_day == (start_day + 1) % 7 and end_time <= start_time:
+        return text
+    return "%s-%s %s" % (
+        format_time(start_time),
+        DAY_NAMES[end_day][:3],
+        format_time(end_time),
+    )
+
+
+def parse_ranges(start_day, text):
+    """
+    Return the (start_day, start_time, end_day, end_time) rows of a line of
+    the grid.
+    """
+    rows = []
+    for part in text.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        match = RANGE.match(part)
+        if match is None:
+            raise ValidationError(
+                '%s: "%s" is not a range of times (ex. 7:00-21:00).'
+                % (DAY_NAMES[start_day], part)
+            )
+        start_time = parse_time(match.group("start"))
+        end_time = parse_time(match.group("end"))
+        if match.group("end_day"):
+            end_day = DAY_ABBREVIATIONS.get(match.group("end_day").lower())
+            if end_day is None:
+                raise ValidationError(
+                    '%s: "%s" is not a day of the week.'
+                    % (DAY_NAMES[start_day], match.group("end_day"))
+                )
+        elif end_time > start_time:
+            end_day = start_day
+        else:
+            end_day = (start_day + 1) % 7
+        rows.append((start_day, start_time, end_day, end_time))
+    return rows
+
+
+def grid_lines(rows):
+    """
+    Return the seven lines of the grid, Monday first, for a schedule's rows.
+    """
+    lines = [[] for _ in DAY_NAMES]
+    for row in sorted(rows):
+        lines[row[0]].append(format_range(*row))
+    return [", ".join(ranges) for ranges in lines]
+
+
+class OpenTimesGridWidget(forms.MultiWidget):
+    """
+    One text input per day of the week, labeled with the day.
+    """
+
+    template_name = "widgets/open_times_grid.html"
+
+    def __init__(self, attrs=None):
+        widgets = [forms.TextInput(attrs={"size": 60}) for _ in DAY_NAMES]
+        super(OpenTimesGridWidget, self).__init__(widgets, attrs)
+
+    def decompress(self, value):
+        return value or [""] * len(DAY_NAMES)
+
+    def get_context(self, name, value, attrs):
+        context = super(OpenTimesGridWidget, self).get_context(name, value, attrs)
+        for day, subwidget in zip(DAY_NAMES, context["widget"]["subwidgets"]):
+            subwidget["day"] = day
+        return context
+
+
+class OpenTimesGridField(forms.MultiValueField):
+    """
+    The rows of a schedule's open times, entered as a weekly grid. Cleans to
+    a list of (start_day, start_time, end_day, end_time) rows.
+    """
+
+    widget = OpenTimesGridWidget
+
+    def __init__(self, **kwargs):
+        fields = [forms.CharField(required=False) for _ in DAY_NAMES]
+        kwargs.setdefault("required", False)
+        super(OpenTimesGridField, self).__init__(
+            fields, require_all_fields=False, **kwargs
+        )
+
+    def compress(self, data_list):
+        rows = []
+        errors = []
+        for day, text in enumerate(data_list or ()):
+            try:
+                rows.extend(parse_ranges(day, text or ""))
+            except ValidationError as error:
+                errors.extend(error.messages)
+        if errors:
+            raise ValidationError(errors)
+
+        open_times = [OpenTime(**dict(zip(OpenTime.ROW_FIELDS, row))) for row in rows]
+        for conflict in check_open_times(open_times):
+            if conflict.kind == INVERTED:
+                errors.append(
+                    "%s is never open. Use a later end time or end day."
+                    % conflict.open_times[0]
+                )
+            elif conflict.kind == ZERO_LENGTH:
+                errors.append(
+                    "%s starts and ends at the same time. Use the 24 hour "
+                    "schedule toggle for schedules that are always open."
+                    % conflict.open_times[0]
+                )
+        if errors:
+            raise ValidationError(errors)
+        return rows
+
+
+class ScheduleForm(forms.ModelForm):
+    """
+    Admin form for a Schedule along with its open times.
+
+    The open times are not saved by the form, see ScheduleAdmin.save_model.
+    """
+
+    open_times = OpenTimesGridField(
+        help_text=(
+            "The times each day opens, ex. 7:00-11:00, 12:00-21:00. Times that "
+            "run past midnight end on the next day (20:00-2:00), name any other "
+            "day that they end on (20:00-Mon 8:30). Overlapping times are merged."
+        )
+    )
+
+    class Meta:
+        model = Schedule
+        fields = ("name", "valid_start", "valid_end", "twenty_four_hours")
+
+    def __init__(self, *args, **kwargs):
+        super(ScheduleForm, self).__init__(*args, **kwargs)
+        if self.instance.pk:
+            self.stored_open_times = list(self.instance.open_times.all())
+        else:
+            self.stored_open_times = []
+        self.initial["open_times"] = grid_lines(
+            tuple(getattr(open_time, name) for name in OpenTime.ROW_FIELDS)
+            for open_time in self.stored_open_times
+        )
+
+    def open_time_rows(self):
+        """
+        Return the minimal rows for the entered open times, and whether any
+        of them were merged.
+        """
+        rows = self.cleaned_data["open_times"]
+        open_times = [OpenTime(**dict(zip(OpenTime.ROW_FIELDS, row))) for row in rows]
+        canonical = canonical_rows(open_times)
+        return canonical, canonical != sorted(rows)
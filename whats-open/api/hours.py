@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+api/hours.py
+
+Human readable summaries of a schedule's hours, ex.
+"Mon–Fri 7 a.m. – 9 p.m.; Sat 10 a.m. – 2 a.m.".
+
+Days and times are localized with Django's own translations and formats for
+the active language. The summary in LANGUAGE_CODE is stored on every Schedule
+(see Schedule.update_hours) so that it is not rebuilt for each response.
+"""
+# Python std. lib. imports
+import datetime
+
+# Django Imports
+from django.conf import settings
+from django.utils import formats, translation
+from django.utils.dates import WEEKDAYS_ABBR
+from django.utils.translation import gettext as _
+# Public in django.utils.translation from Django 2.1 on
+from django.utils.translation.trans_real import get_supported_language_variant
+
+# App Imports
+from .intervals import MINUTES_PER_DAY, daily_hours
+
+
+def format_minute_of_day(minute):
+    """
+    Return the localized time of day of a minute after midnight, the day
+    after included (ex. 26:00 is 2 a.m.).
+    """
+    minute %= MINUTES_PER_DAY
+    return formats.time_format(datetime.time(minute // 60, minute % 60))
+
+
+def format_days(group):
+    if group.first_day == 0 and group.last_day == 6:
+        return _("Daily")
+    if group.first_day == group.last_day:
+        return str(WEEKDAYS_ABBR[group.first_day])
+    return "%s–%s" % (WEEKDAYS_ABBR[group.first_day], WEEKDAYS_ABBR[group.last_day])
+
+
+def format_ranges(ranges):
+    if ranges == ((0, MINUTES_PER_DAY),):
+        return _("Open 24 hours")
+    return ", ".join(
+        "%s – %s" % (format_minute_of_day(opens), format_minute_of_day(closes))
+        for opens, closes in ranges
+    )
+
+
+def hours_summary(open_times, twenty_four_hours=False):
+    """
+    Return the summary of a schedule's hours in the active language.
+    """
+    groups = daily_hours(open_times, twenty_four_hours)
+    if not groups:
+        return _("Closed")
+    return "; ".join(
+        "%s %s" % (format_days(group), format_ranges(group.ranges)) for group in groups
+    )
+
+
+def stored_hours_summary(open_times, twenty_four_hours=False):
+    """
+    Return the summary of a schedule's hours that is stored on it, in
+    LANGUAGE_CODE whatever language is active.
+    """
+    with translation.override(settings.LANGUAGE_CODE):
+        return hours_summary(open_times, twenty_four_hours)
+
+
+def is_stored_language(language):
+    """
+    Return whether the summary stored on schedules is the one in a language.
+
+    LocaleMiddleware activates the supported variant of LANGUAGE_CODE (ex. "en"
+    for "en-us") when a client asks for no other language, which is the same.
+    """
+    if language == settings.LANGUAGE_CODE:
+        return True
+    try:
+        return language == get_supported_language_variant(settings.LANGUAGE_CODE)
+    except LookupError:
+        return False
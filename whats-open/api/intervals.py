@@ -0,0 +1,504 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+api/intervals.py
+
+Reason about a schedule's OpenTimes as minute-of-week intervals.
+
+An OpenTime is open from (start_day, start_time) through (end_day, end_time),
+both ends inclusive, and wraps around the end of the week when start_day comes
+after end_day (see OpenTime.is_open_now). Here every OpenTime is turned into
+half-open [start, end) ranges of minutes counted from Monday 00:00, which lets
+us find overlapping, empty and inverted rows with a single sweep-line pass and
+merge a schedule's rows into a minimal canonical set.
+
+Whether a schedule is open at some instant is decided at a finer resolution
+than minutes (see tick_of_week()), so that it agrees with OpenTime.is_open_now()
+to the second.
+"""
+# Python std. lib. imports
+import base64
+import datetime
+from collections import namedtuple
+
+MINUTES_PER_DAY = 24 * 60
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+
+# Gaps between two open ranges that are shorter than this are reported since
+# they are almost always a typo (ex. 7:00 - 11:58 followed by 12:00 - 17:00).
+SHORT_GAP_MINUTES = 15
+
+# Resolution of the weekly hours bitmap, one bit per slot of the week.
+SLOT_MINUTES = 15
+SLOTS_PER_WEEK = MINUTES_PER_WEEK // SLOT_MINUTES
+
+# Resolution of the exact open states, see tick_of_week()
+TICKS_PER_SECOND = 2
+TICKS_PER_WEEK = MINUTES_PER_WEEK * 60 * TICKS_PER_SECOND
+
+# A half-open [start, end) range of minutes (or ticks) of the week.
+Interval = namedtuple("Interval", ["start", "end"])
+
+# Kinds of problems that check_open_times() can find.
+OVERLAP = "overlap"
+ZERO_LENGTH = "zero-length"
+INVERTED = "inverted"
+GAP = "gap"
+
+# A problem found in a set of OpenTimes. `open_times` holds the rows that are
+# responsible and `interval` the range of the week that is affected.
+Conflict = namedtuple("Conflict", ["kind", "open_times", "interval"])
+
+# The hours of a run of consecutive days (Monday is 0) that are open at the
+# same times, see daily_hours()
+HoursGroup = namedtuple("HoursGroup", ["first_day", "last_day", "ranges"])
+
+
+def minute_of_week(day, time, round_up=False):
+    """
+    Return the minute of the week that the given weekday and time falls on.
+
+    Seconds are dropped unless `round_up` is set, in which case any time past
+    the start of a minute counts as the next minute.
+    """
+    minute = day * MINUTES_PER_DAY + time.hour * 60 + time.minute
+    if round_up and (time.second or time.microsecond):
+        minute += 1
+    return minute
+
+
+def format_minute(minute):
+    """
+    Return a human readable "Monday 13:30" label for a minute of the week.
+    """
+    day, minute = divmod(minute % MINUTES_PER_WEEK, MINUTES_PER_DAY)
+    weekday = datetime.date(2018, 1, 1 + day).strftime("%A")
+    return "%s %02d:%02d" % (weekday, minute // 60, minute % 60)
+
+
+def open_time_intervals(open_time):
+    """
+    Return the intervals of the week that an OpenTime is open for.
+
+    Inverted rows (the same start and end day with the start time after the
+    end time) are never open and produce no intervals.
+    """
+    start = minute_of_week(open_time.start_day, open_time.start_time, round_up=True)
+    # The end time is inclusive, so the range runs through the end minute
+    end = minute_of_week(open_time.end_day, open_time.end_time) + 1
+
+    if open_time.start_day <= open_time.end_day:
+        if start >= end:
+            return []
+        return [Interval(start, end)]
+    # Wrap around the end of the week
+    return [
+        interval
+        for interval in (Interval(start, MINUTES_PER_WEEK), Interval(0, end))
+        if interval.start < interval.end
+    ]
+
+
+def is_zero_length(open_time):
+    """
+    Return true if an OpenTime starts and ends on the same day and time.
+    """
+    return (
+        open_time.start_day == open_time.end_day
+        and open_time.start_time == open_time.end_time
+    )
+
+
+def sweep(tagged_intervals):
+    """
+    Find every stretch of the week covered by more than one interval.
+
+    Takes (interval, tag) pairs and returns a list of (interval, tags) pairs
+    in week order where `tags` holds the tags of every interval that covers
+    that stretch.
+    """
+    events = []
+    for index, (interval, _tag) in enumerate(tagged_intervals):
+        # Ends sort before starts at the same minute so that touching
+        # intervals are not counted as overlapping
+        events.append((interval.start, 1, index))
+        events.append((interval.end, 0, index))
+    events.sort()
+
+    overlaps = []
+    active = set()
+    previous = None
+    for position, is_start, index in events:
+        if len(active) > 1 and previous < position:
+            tags = [tagged_intervals[i][1] for i in sorted(active)]
+            last = overlaps[-1] if overlaps else None
+            # Extend the previous stretch if the same intervals still overlap
+            if last and last[0].end == previous and last[1] == tags:
+                overlaps[-1] = (Interval(last[0].start, position), tags)
+            else:
+                overlaps.append((Interval(previous, position), tags))
+        if is_start:
+            active.add(index)
+        else:
+            active.discard(index)
+        previous = position
+    return overlaps
+
+
+def merge_intervals(intervals):
+    """
+    Return the minimal sorted list of intervals covering the same minutes.
+
+    Overlapping and touching intervals are joined together.
+    """
+    merged = []
+    for interval in sorted(intervals):
+        if merged and interval.start <= merged[-1].end:
+            if interval.end > merged[-1].end:
+                merged[-1] = Interval(merged[-1].start, interval.end)
+        else:
+            merged.append(interval)
+    return merged
+
+
+def find_gaps(merged):
+    """
+    Return the closed stretches of the week between merged intervals.
+
+    The stretch between the last interval of the week and the first one wraps
+    around Sunday night and is returned with an end past MINUTES_PER_WEEK.
+    """
+    if not merged:
+        return []
+    gaps = [
+        Interval(previous.end, current.start)
+        for previous, current in zip(merged, merged[1:])
+    ]
+    wrap_start = merged[-1].end
+    wrap_end = merged[0].start + MINUTES_PER_WEEK
+    if wrap_start < wrap_end:
+        gaps.append(Interval(wrap_start, wrap_end))
+    return gaps
+
+
+def check_open_times(open_times, min_gap=SHORT_GAP_MINUTES):
+    """
+    Check a schedule's OpenTimes and return a list of Conflicts.
+
+    Reports rows that are never open (inverted), rows that are only open for
+    a single instant (zero-length), stretches of the week covered by more
+    than one row (overlap) and closed stretches shorter than `min_gap`
+    minutes (gap).
+    """
+    conflicts = []
+    tagged = []
+    for open_time in open_times:
+        intervals = open_time_intervals(open_time)
+        if not intervals:
+            conflicts.append(Conflict(INVERTED, [open_time], None))
+        elif is_zero_length(open_time):
+            conflicts.append(Conflict(ZERO_LENGTH, [open_time], intervals[0]))
+        tagged.extend((interval, open_time) for interval in intervals)
+
+    for interval, rows in sweep(tagged):
+        conflicts.append(Conflict(OVERLAP, rows, interval))
+
+    for gap in find_gaps(merge_intervals(interval for interval, _ in tagged)):
+        if gap.end - gap.start < min_gap:
+            conflicts.append(Conflict(GAP, [], gap))
+    return conflicts
+
+
+def _minute_to_time(minute, exact_times=None):
+    """
+    Return the time of day for a minute of the week, preferring the exact
+    (seconds included) time that an existing row used for that minute.
+    """
+    if exact_times and minute in exact_times:
+        return exact_times[minute]
+    minute %= MINUTES_PER_DAY
+    return datetime.time(minute // 60, minute % 60)
+
+
+def canonical_rows(open_times):
+    """
+    Return the minimal list of (start_day, start_time, end_day, end_time)
+    rows that are open for exactly the same minutes as the given OpenTimes.
+
+    Overlapping and touching rows are merged and inverted rows are dropped.
+    Intervals that run past Sunday night into Monday morning are joined back
+    into a single wrap-around row whenever an OpenTime can represent it.
+    """
+    intervals = []
+    # Remember the exact end times rows used so that ex. 23:59:59 is preserved
+    end_times = {}
+    for open_time in open_times:
+        open_intervals = open_time_intervals(open_time)
+        if not open_intervals:
+            continue
+        intervals.extend(open_intervals)
+        end = minute_of_week(open_time.end_day, open_time.end_time)
+        end_times[end] = max(end_times.get(end, open_time.end_time), open_time.end_time)
+
+    merged = merge_intervals(intervals)
+    wrap = None
+    if (
+        len(merged) > 1
+        and merged[0].start == 0
+        and merged[-1].end == MINUTES_PER_WEEK
+        # The wrapped row must start on a later day than it ends on
+        and merged[-1].start // MINUTES_PER_DAY
+        > (merged[0].end - 1) // MINUTES_PER_DAY
+    ):
+        wrap = Interval(merged[-1].start, merged[0].end)
+        merged = merged[1:-1]
+
+    rows = []
+    for interval in merged + ([wrap] if wrap else []):
+        last = interval.end - 1
+        rows.append(
+            (
+                interval.start // MINUTES_PER_DAY,
+                _minute_to_time(interval.start),
+                last // MINUTES_PER_DAY,
+                _minute_to_time(last, end_times),
+            )
+        )
+    return sorted(rows)
+
+
+def weekly_bitmap(intervals):
+    """
+    Return a bitmap with one bit per SLOT_MINUTES slot of the week.
+
+    Slots are counted from Monday 00:00 and packed most significant bit
+    first, so slot `i` is `(bitmap[i // 8] >> (7 - i % 8)) & 1`. A slot is
+    only set when it is open for its whole length, which means the bitmap
+    never reports a facility as open when it is closed.
+    """
+    bits = bytearray(SLOTS_PER_WEEK // 8)
+    for interval in merge_intervals(intervals):
+        # Round the start up and the end down to whole slots
+        first = -(-interval.start // SLOT_MINUTES)
+        last = interval.end // SLOT_MINUTES
+        for slot in range(first, last):
+            bits[slot // 8] |= 0x80 >> (slot % 8)
+    return bytes(bits)
+
+
+def weekly_hours(open_times, twenty_four_hours=False):
+    """
+    Return the base64 encoded weekly_bitmap() of a schedule's OpenTimes.
+    """
+    if twenty_four_hours:
+        intervals = [Interval(0, MINUTES_PER_WEEK)]
+    else:
+        intervals = [
+            interval
+            for open_time in open_times
+            for interval in open_time_intervals(open_time)
+        ]
+    return base64.b64encode(weekly_bitmap(intervals)).decode("ascii")
+
+
+def daily_open_minutes(open_times, twenty_four_hours=False):
+    """
+    Return an (open_minutes, first_open, last_close) triple for every day of
+    the week, Monday first.
+
+    first_open and last_close are minutes after midnight, clipped to the day
+    (a facility open past midnight has a last_close of 24:00), and are None
+    on days the schedule is closed. Unlike the intervals, which run through
+    the inclusive end minute, a row that ends at 17:00 closes at 17:00 here
+    and one that ends at 23:59 (or 23:59:59) runs until midnight.
+    """
+    intervals = [
+        Interval(
+            interval.start,
+            interval.end if interval.end % MINUTES_PER_DAY == 0 else interval.end - 1,
+        )
+        for interval in schedule_intervals(open_times, twenty_four_hours)
+    ]
+
+    days = []
+    for day in range(7):
+        day_start = day * MINUTES_PER_DAY
+        day_end = day_start + MINUTES_PER_DAY
+        clipped = [
+            Interval(max(interval.start, day_start), min(interval.end, day_end))
+            for interval in intervals
+            if interval.start < day_end
+            and interval.end > day_start
+            and interval.start < interval.end
+        ]
+        if not clipped:
+            days.append((0, None, None))
+            continue
+        days.append(
+            (
+                sum(interval.end - interval.start for interval in clipped),
+                clipped[0].start - day_start,
+                clipped[-1].end - day_start,
+            )
+        )
+    return days
+
+
+def schedule_intervals(open_times, twenty_four_hours=False):
+    """
+    Return the merged intervals of the week that a schedule is open for.
+    """
+    if twenty_four_hours:
+        return [Interval(0, MINUTES_PER_WEEK)]
+    return merge_intervals(
+        interval for open_time in open_times for interval in open_time_intervals(open_time)
+    )
+
+
+def open_state(intervals, minute):
+    """
+    Return an (is_open, closes_in, opens_in) triple for a minute of the week.
+
+    closes_in is the number of minutes until an open schedule closes and
+    opens_in the number of minutes until a closed one opens next, both are
+    None when that never happens (ex. a 24 hour schedule never closes). An
+    open range closes at its end time, so a row that ends at 17:00 closes in
+    0 minutes at 17:00, while 23:59 closes at midnight.
+    """
+    if not intervals:
+        return False, None, None
+    if intervals[0] == Interval(0, MINUTES_PER_WEEK):
+        return True, None, None
+
+    for index, interval in enumerate(intervals):
+        if interval.start <= minute < interval.end:
+            end = interval.end
+            # Keep going through Sunday night into Monday morning
+            if end == MINUTES_PER_WEEK and intervals[0].start == 0 and index:
+                end += intervals[0].end
+            closes = end if end % MINUTES_PER_DAY == 0 else end - 1
+            return True, closes - minute, None
+
+    following = [interval.start for interval in intervals if interval.start > minute]
+    opens = following[0] if following else intervals[0].start + MINUTES_PER_WEEK
+    return False, None, opens - minute
+
+
+def tick_of_week(day, time):
+    """
+    Return the tick of the week that the given weekday and time falls on.
+
+    Ticks count half seconds from Monday 00:00: tick 2s is second s of the
+    week sharp (ex. 17:00:00.000000) and tick 2s + 1 stands for every instant
+    within that second after it. That is the resolution OpenTime.is_open_now()
+    works at, a row that ends at 17:00 is open at 17:00:00 sharp and closed
+    right after it.
+    """
+    second = (day * MINUTES_PER_DAY + time.hour * 60 + time.minute) * 60 + time.second
+    return second * TICKS_PER_SECOND + (1 if time.microsecond else 0)
+
+
+def exact_intervals(open_times, twenty_four_hours=False):
+    """
+    Return the merged tick intervals of the week that a schedule is open for.
+
+    Rows are open from their start time through their end time, both ends
+    inclusive and to the second, wrapping around the end of the week when
+    start_day comes after end_day just like OpenTime.is_open_now(). Unlike
+    schedule_intervals(), a row that ends at 23:59 is closed from 23:59:01,
+    and one that ends at 23:59:59 is not joined with one that starts at 0:00
+    (the instants within the second in between are closed).
+    """
+    if twenty_four_hours:
+        return [Interval(0, TICKS_PER_WEEK)]
+    intervals = []
+    for open_time in open_times:
+        start = tick_of_week(open_time.start_day, open_time.start_time)
+        # Open through the end time sharp
+        end = tick_of_week(open_time.end_day, open_time.end_time) + 1
+        if open_time.start_day <= open_time.end_day:
+            candidates = (Interval(start, end),)
+        else:
+            candidates = (Interval(start, TICKS_PER_WEEK), Interval(0, end))
+        intervals.extend(
+            interval for interval in candidates if interval.start < interval.end
+        )
+    return merge_intervals(intervals)
+
+
+def exact_open_state(intervals, tick):
+    """
+    Return an (is_open, closes_in, opens_in) triple for a tick of the week,
+    given a schedule's exact_intervals().
+
+    Like open_state() but in seconds, counted from the whole second of the
+    tick: closes_in is the number of seconds until the last instant an open
+    schedule is open at (its end time) and opens_in the number of seconds
+    until a closed one opens. Both are None when that never happens.
+    """
+    if not intervals:
+        return False, None, None
+    if intervals[0] == Interval(0, TICKS_PER_WEEK):
+        return True, None, None
+
+    second = tick // TICKS_PER_SECOND
+    for index, interval in enumerate(intervals):
+        if interval.start <= tick < interval.end:
+            end = interval.end
+            # Keep going through Sunday night into Monday morning
+            if end == TICKS_PER_WEEK and intervals[0].start == 0 and index:
+                end += intervals[0].end
+            return True, (end - 1) // TICKS_PER_SECOND - second, None
+
+    following = [interval.start for interval in intervals if interval.start > tick]
+    opens = following[0] if following else intervals[0].start + TICKS_PER_WEEK
+    return False, None, -(-opens // TICKS_PER_SECOND) - second
+
+
+def daily_hours(open_times, twenty_four_hours=False):
+    """
+    Return the (first_day, last_day, ranges) HoursGroups of a schedule,
+    consecutive days with the same hours being grouped together.
+
+    ranges holds (opens, closes) pairs of minutes after midnight of each day
+    in the group. Hours that run past midnight stay with the day they start
+    on, with a closes past 24:00, unless the day is open from midnight on
+    (ex. the last day of a stretch that is open around the clock). Closing
+    times follow daily_open_minutes(), a row that ends at 17:00 closes at
+    17:00 and one that ends at 23:59 at midnight. Closed days are left out.
+    """
+    days = [[] for _ in range(7)]
+    for interval in schedule_intervals(open_times, twenty_four_hours):
+        close = interval.end if interval.end % MINUTES_PER_DAY == 0 else interval.end - 1
+        start = interval.start
+        while start < close:
+            day = start // MINUTES_PER_DAY
+            day_start = day * MINUTES_PER_DAY
+            end = min(close, day_start + MINUTES_PER_DAY)
+            days[day].append([start - day_start, end - day_start])
+            start = end
+
+    # Join the early morning of the next day (Monday after Sunday) onto
+    # the evening it continues
+    for day, ranges in enumerate(days):
+        following = days[(day + 1) % 7]
+        if (
+            ranges
+            and 0 < ranges[-1][0]
+            and ranges[-1][1] == MINUTES_PER_DAY
+            and following
+            and following[0][0] == 0
+            and following[0][1] < MINUTES_PER_DAY
+        ):
+            ranges[-1][1] += following.pop(0)[1]
+
+    groups = []
+    for day, ranges in enumerate(days):
+        ranges = tuple(tuple(pair) for pair in ranges)
+        if not ranges:
+            continue
+        if groups and groups[-1].last_day == day - 1 and groups[-1].ranges == ranges:
+            groups[-1] = groups[-1]._replace(last_day=day)
+        else:
+            groups.append(HoursGroup(day, day, ranges))
+    return groups
@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+api/management/commands/benchmark.py
+
+Run the performance benchmarks in the top level `benchmarks` package.
+
+https://docs.djangoproject.com/en/2.0/howto/custom-management-commands/
+"""
+# Python std. lib. imports
+import json
+from importlib import import_module
+
+# Django Imports
+from django.core.management.base import BaseCommand, CommandError
+
+# App Imports
+from benchmarks import BENCHMARKS
+
+
+class Command(BaseCommand):
+    help = "Run the API performance benchmarks against the configured database."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "names",
+            nargs="*",
+            metavar="name",
+            help="Benchmarks to run (default: %s)." % ", ".join(BENCHMARKS),
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=10,
+            help="Number of times each measurement is repeated.",
+        )
+        parser.add_argument(
+            "--output", help="Also write the results to this JSON file."
+        )
+
+    def handle(self, *args, **options):
+        names = options["names"] or BENCHMARKS
+        unknown = set(names) - set(BENCHMARKS)
+        if unknown:
+            raise CommandError("Unknown benchmark(s): %s" % ", ".join(sorted(unknown)))
+
+        results = {}
+        for name in names:
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            module = import_module("benchmarks.%s" % name)
+            results[name] = []
+            for label, value, unit in module.run(options["repeat"]):
+                results[name].append({"label": label, "value": value, "unit": unit})
+                if isinstance(value, float):
+                    value = "%.3f" % value
+                self.stdout.write("  %-40s %12s %s" % (label, value, unit))
+
+        if options["output"]:
+            with open(options["output"], "w") as output:
+                json.dump(results, output, indent=4)
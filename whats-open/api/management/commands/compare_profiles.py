@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+api/management/commands/compare_profiles.py
+
+Compare two saved request profiles (see api/profiling.py).
+
+https://docs.djangoproject.com/en/2.0/howto/custom-management-commands/
+"""
+# Django Imports
+from django.core.management.base import BaseCommand, CommandError
+
+# App Imports
+from api.profiling import frame_counts, load_report, parse_folded
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare two saved request profiles, listing the functions whose share "
+        "of the samples changed the most."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("before", help="Report file, absolute or in PROFILE_ROOT.")
+        parser.add_argument("after", help="Report file, absolute or in PROFILE_ROOT.")
+        parser.add_argument(
+            "--limit", type=int, default=20, help="Number of functions to list."
+        )
+
+    def handle(self, *args, **options):
+        try:
+            before = load_report(options["before"])
+            after = load_report(options["after"])
+        except (OSError, ValueError) as error:
+            raise CommandError(error)
+
+        self.stdout.write("%-20s %12s %12s" % ("", "before", "after"))
+        self.stdout.write(
+            "%-20s %12.1f %12.1f" % ("milliseconds", before["milliseconds"], after["milliseconds"])
+        )
+        self.stdout.write("%-20s %12d %12d" % ("queries", before["sql"]["count"], after["sql"]["count"]))
+        self.stdout.write(
+            "%-20s %12.1f %12.1f"
+            % ("sql milliseconds", before["sql"]["milliseconds"], after["sql"]["milliseconds"])
+        )
+
+        # Shares of the samples, so that profiles taken at different
+        # intervals (or of slower and faster requests) can be compared
+        before_shares = self.shares(before)
+        after_shares = self.shares(after)
+        frames = set(before_shares) | set(after_shares)
+        changes = sorted(
+            frames,
+            key=lambda frame: abs(after_shares.get(frame, 0) - before_shares.get(frame, 0)),
+            reverse=True,
+        )
+        self.stdout.write("")
+        self.stdout.write("%8s %8s %8s  %s" % ("before", "after", "change", "function (% of samples)"))
+        for frame in changes[: options["limit"]]:
+            old = before_shares.get(frame, 0)
+            new = after_shares.get(frame, 0)
+            self.stdout.write("%7.1f%% %7.1f%% %+7.1f%%  %s" % (old, new, new - old, frame))
+
+    def shares(self, report):
+        _, total = frame_counts(parse_folded(report["folded"]))
+        samples = float(report["samples"]) or 1.0
+        return {frame: 100 * count / samples for frame, count in total.items()}
@@ -0,0 +1,41 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+api/management/commands/export_static.py
+
+Export the public API as a tree of static, precompressed JSON files (see
+api/export.py).
+
+https://docs.djangoproject.com/en/2.0/howto/custom-management-commands/
+"""
+# Django Imports
+from django.core.management.base import BaseCommand, CommandError
+
+# App Imports
+from api.export import export_static, is_expired
+
+
+class Command(BaseCommand):
+    help = "Export the public API as a tree of static, precompressed JSON files."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--root", help="Directory to export to, EXPORT_ROOT by default."
+        )
+        parser.add_argument(
+            "--if-expired",
+            action="store_true",
+            help="Only export when the current tree is out of date (for cron).",
+        )
+
+    def handle(self, *args, **options):
+        if options["if_expired"] and not is_expired(options["root"]):
+            return
+        try:
+            export = export_static(options["root"])
+        except OSError as error:
+            raise CommandError(error)
+        self.stdout.write(
+            "Exported %d responses to %s, up to date until %s"
+            % (export.files, export.path, export.expires_at.isoformat())
+        )
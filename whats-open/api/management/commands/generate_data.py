@@ -0,0 +1,414 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+api/management/commands/generate_data.py
+
+Generate a large, realistic and reproducible dataset for load testing.
+
+The same --seed always produces the same facilities, schedules, tags and
+alerts. Dates are relative to the day the command is run, so that some of
+the special schedules and alerts are always in effect.
+
+https://docs.djangoproject.com/en/2.0/howto/custom-management-commands/
+"""
+# Python std. lib. imports
+import datetime
+import random
+from collections import Counter
+
+# Django Imports
+from django.contrib.contenttypes.models import ContentType
+from django.contrib.gis.geos import Point
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.text import slugify
+
+# Other Imports
+from taggit.models import Tag, TaggedItem
+
+# App Imports
+from api.campuses import invalidate_campuses
+from api.hours import stored_hours_summary
+from api.intervals import weekly_hours
+from api.models import (
+    Alert,
+    Category,
+    Facility,
+    Location,
+    OpenTime,
+    Schedule,
+    join_tags,
+)
+from api.rollups import refresh_open_hours
+
+MIN_FACILITIES = 10
+MAX_FACILITIES = 100000
+BATCH_SIZE = 1000
+
+CATEGORIES = (
+    "Dining",
+    "Coffee",
+    "Fast Food",
+    "Convenience",
+    "Library",
+    "Fitness",
+    "Bank",
+    "Printing",
+    "Retail",
+    "Student Services",
+)
+
+# (campus_region, longitude, latitude, share of the buildings)
+CAMPUSES = (
+    ("fairfax", -77.3075, 38.8308, 0.7),
+    ("arlington", -77.1020, 38.8850, 0.15),
+    ("prince william", -77.5150, 38.7560, 0.1),
+    ("front royal", -78.1600, 38.8830, 0.05),
+)
+
+BUILDING_NAMES = ("Hall", "Center", "Commons", "Library", "Pavilion", "House")
+VENDORS = (
+    "Starbucks",
+    "Chick-fil-A",
+    "Panera",
+    "Subway",
+    "Einstein Bros",
+    "Taco Bell",
+    "Dunkin",
+    "Panda Express",
+    "Market",
+    "Grill",
+    "Cafe",
+    "Print Shop",
+)
+TAGS = (
+    "coffee",
+    "tea",
+    "breakfast",
+    "lunch",
+    "dinner",
+    "late night",
+    "vegan",
+    "vegetarian",
+    "halal",
+    "kosher",
+    "gluten free",
+    "pizza",
+    "burgers",
+    "sushi",
+    "mexican",
+    "asian",
+    "salads",
+    "snacks",
+    "grocery",
+    "cheap",
+    "mason money",
+    "meal swipes",
+)
+
+# Timestamps are drawn in 15 minute steps
+STEP = 15
+
+
+def clock(minutes):
+    """
+    Turn minutes after midnight into a time, 24:00 being the last second of
+    the day.
+    """
+    if minutes >= 24 * 60:
+        return datetime.time(23, 59, 59)
+    return datetime.time(minutes // 60, minutes % 60)
+
+
+class Generator(object):
+    """
+    Build unsaved model instances for a dataset from a seeded random source.
+    """
+
+    def __init__(self, seed, today):
+        self.random = random.Random(seed)
+        self.today = today
+
+    def step(self, low, high):
+        """
+        Return a number of minutes between low and high, in 15 minute steps.
+        """
+        return self.random.randrange(low // STEP, high // STEP + 1) * STEP
+
+    def point(self, longitude, latitude, spread):
+        return Point(
+            self.random.gauss(longitude, spread),
+            self.random.gauss(latitude, spread),
+            srid=4326,
+        )
+
+    def open_times(self):
+        """
+        Return the (start_day, start, end_day, end) rows, in minutes, of a weekly
+        schedule.
+        """
+        kind = self.random.random()
+        rows = []
+        if kind < 0.15:
+            # Late night: every evening until after midnight, including the
+            # Sunday night to Monday morning row that wraps around the week
+            opens = self.step(16 * 60, 20 * 60)
+            closes = self.step(60, 3 * 60)
+            for day in range(7):
+                rows.append((day, opens, (day + 1) % 7, closes))
+        elif kind < 0.3:
+            # Split shift with a break in the afternoon
+            for day in range(5):
+                rows.append((day, self.step(7 * 60, 9 * 60), day, self.step(13 * 60, 14 * 60)))
+                rows.append((day, self.step(16 * 60, 17 * 60), day, self.step(20 * 60, 24 * 60)))
+        else:
+            opens = self.step(6 * 60, 10 * 60)
+            closes = self.step(15 * 60, 24 * 60)
+            for day in range(5):
+                rows.append((day, opens, day, closes))
+            if self.random.random() < 0.6:
+                for day in (5, 6):
+                    rows.append((day, opens + 120, day, min(closes, 20 * 60)))
+        return rows
+
+    def schedule(self, name, valid_start=None, valid_end=None):
+        """
+        Return a Schedule along with its OpenTimes.
+        """
+        twenty_four_hours = self.random.random() < 0.05
+        open_times = []
+        if not twenty_four_hours:
+            open_times = [
+                OpenTime(
+                    start_day=start_day,
+                    start_time=clock(start),
+                    end_day=end_day,
+                    end_time=clock(end),
+                )
+                for start_day, start, end_day, end in self.open_times()
+            ]
+        schedule = Schedule(
+            name=name,
+            valid_start=valid_start,
+            valid_end=valid_end,
+            twenty_four_hours=twenty_four_hours,
+            # Bulk inserts skip the signals that would fill this in
+            weekly_hours=weekly_hours(open_times, twenty_four_hours),
+            hours_summary=stored_hours_summary(open_times, twenty_four_hours),
+        )
+        return schedule, open_times
+
+    def special_dates(self):
+        """
+        Return the (valid_start, valid_end) of a past, current or future
+        special schedule, current ones overlapping each other.
+        """
+        start = self.today + datetime.timedelta(days=self.random.randint(-400, 60))
+        end = start + datetime.timedelta(days=self.random.randint(1, 120))
+        return start, end
+
+    def alert(self, number):
+        start = self.today + datetime.timedelta(
+            days=self.random.randint(-730, 7), hours=self.random.randint(0, 23)
+        )
+        return Alert(
+            urgency_tag=self.random.choice(Alert.URGENCY_CHOICES)[0],
+            subject="Generated alert %d" % number,
+            body="Hours change number %d." % number,
+            start_datetime=start,
+            end_datetime=start + datetime.timedelta(hours=self.random.randint(2, 240)),
+        )
+
+
+class Command(BaseCommand):
+    help = "Generate a large, reproducible dataset of facilities, schedules and alerts."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--facilities",
+            type=int,
+            default=100,
+            help="Number of facilities to create (%d to %d)."
+            % (MIN_FACILITIES, MAX_FACILITIES),
+        )
+        parser.add_argument(
+            "--seed", type=int, default=0, help="Seed of the random data."
+        )
+        parser.add_argument(
+            "--clear",
+            action="store_true",
+            help="Delete every facility, schedule, location, category and alert first.",
+        )
+
+    def handle(self, *args, **options):
+        count = options["facilities"]
+        if not MIN_FACILITIES <= count <= MAX_FACILITIES:
+            raise CommandError(
+                "--facilities must be between %d and %d" % (MIN_FACILITIES, MAX_FACILITIES)
+            )
+
+        today = timezone.localtime().replace(hour=0, minute=0, second=0, microsecond=0)
+        generator = Generator(options["seed"], today)
+        self.first_ids = {}
+        with transaction.atomic():
+            if options["clear"]:
+                for model in (Facility, Schedule, Location, Category, Alert):
+                    model.objects.all().delete()
+            self.generate(generator, count)
+        invalidate_campuses()
+
+    def generate(self, generator, count):
+        rand = generator.random
+
+        categories = [
+            Category.objects.get_or_create(name=name)[0] for name in CATEGORIES
+        ]
+
+        # Roughly four facilities share each building
+        locations = []
+        for number in range(max(1, count // 4)):
+            campus, longitude, latitude, share = rand.choices(
+                CAMPUSES, weights=[campus[3] for campus in CAMPUSES]
+            )[0]
+            locations.append(
+                Location(
+                    id=self.next_id(Location, len(locations)),
+                    building="%s %s %d"
+                    % (campus.title(), rand.choice(BUILDING_NAMES), number + 1),
+                    address="%d University Dr" % (4400 + number),
+                    campus_region=campus,
+                    on_campus=rand.random() < 0.9,
+                    coordinate_location=generator.point(longitude, latitude, 0.004),
+                )
+            )
+        self.insert(Location, locations)
+
+        tags = self.tags()
+        content_type = ContentType.objects.get_for_model(Facility)
+
+        taken = set(Facility.objects.values_list("slug", flat=True))
+        names = Counter()
+        schedules = []
+        open_times = []
+        facilities = []
+        specials = []
+        tagged_items = []
+        for number in range(count):
+            location = rand.choice(locations)
+            name = "%s %s" % (rand.choice(VENDORS), location.building)
+            names[name] += 1
+            if names[name] > 1:
+                name = "%s %d" % (name, names[name])
+            slug = slugify(name)
+            while slug in taken:
+                slug += "-%d" % number
+            taken.add(slug)
+
+            main, rows = generator.schedule("%s [Main]" % name)
+            main.id = self.next_id(Schedule, len(schedules))
+            schedules.append(main)
+            open_times.extend(self.attach(rows, main))
+
+            facility = Facility(
+                id=self.next_id(Facility, number),
+                facility_name=name,
+                slug=slug,
+                facility_category=rand.choice(categories),
+                facility_location=location,
+                main_schedule=main,
+            )
+            facilities.append(facility)
+
+            facility_tags = rand.sample(tags, rand.randint(1, 4))
+            # Bulk inserts skip the signals that would fill this in
+            facility.tag_names = join_tags(tag.name for tag in facility_tags)
+            tagged_items.extend(
+                TaggedItem(tag=tag, content_type=content_type, object_id=facility.id)
+                for tag in facility_tags
+            )
+
+            if rand.random() < 0.3:
+                for special_number in range(rand.randint(1, 3)):
+                    start, end = generator.special_dates()
+                    special, rows = generator.schedule(
+                        "%s [Special %d]" % (name, special_number + 1), start, end
+                    )
+                    special.id = self.next_id(Schedule, len(schedules))
+                    schedules.append(special)
+                    open_times.extend(self.attach(rows, special))
+                    specials.append(
+                        Facility.special_schedules.through(
+                            facility_id=facility.id, schedule_id=special.id
+                        )
+                    )
+
+        self.insert(Schedule, schedules)
+        self.insert(OpenTime, open_times)
+        # A raw insert skips the AutoSlugField's uniqueness query for every
+        # row, the slugs were made unique above
+        self.insert(Facility, facilities, raw=True)
+        self.insert(Facility.special_schedules.through, specials)
+        self.insert(TaggedItem, tagged_items)
+
+        alerts = [generator.alert(number + 1) for number in range(max(1, count // 5))]
+        self.insert(Alert, alerts)
+
+        # Rebuilding everything is quicker than going facility by facility
+        refresh_open_hours()
+
+        self.stdout.write(
+            "Created %d facilities, %d locations, %d schedules, %d open times, "
+            "%d special schedule links and %d alerts."
+            % (
+                len(facilities),
+                len(locations),
+                len(schedules),
+                len(open_times),
+                len(specials),
+                len(alerts),
+            )
+        )
+
+    def insert(self, model, objs, raw=False):
+        """
+        Insert rows in batches of at most BATCH_SIZE, or less when the database
+        limits the size of a query (ex. SQLite).
+
+        A raw insert works like loaddata and skips every field's pre_save().
+        """
+        fields = model._meta.local_concrete_fields
+        size = max(1, min(BATCH_SIZE, connection.ops.bulk_batch_size(fields, objs)))
+        for start in range(0, len(objs), size):
+            batch = objs[start : start + size]
+            if raw:
+                model.objects._insert(batch, fields=fields, raw=True)
+            else:
+                model.objects.bulk_create(batch)
+
+    def next_id(self, model, offset):
+        """
+        Return the primary key for the offset-th new row of a model.
+
+        Ids are assigned up front since MySQL does not return them from bulk
+        inserts, and rows reference each other.
+        """
+        if model not in self.first_ids:
+            last = model.objects.order_by("-pk").values_list("pk", flat=True).first()
+            self.first_ids[model] = (last or 0) + 1
+        return self.first_ids[model] + offset
+
+    def attach(self, open_times, schedule):
+        for open_time in open_times:
+            open_time.schedule = schedule
+        return open_times
+
+    def tags(self):
+        """
+        Return the Tags for every one of the TAGS, creating the missing ones.
+        """
+        existing = {tag.name: tag for tag in Tag.objects.filter(name__in=TAGS)}
+        Tag.objects.bulk_create(
+            [Tag(name=name, slug=slugify(name)) for name in TAGS if name not in existing]
+        )
+        return list(Tag.objects.filter(name__in=TAGS).order_by("name"))
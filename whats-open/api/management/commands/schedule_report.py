@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+api/management/commands/schedule_report.py
+
+Report overlapping, empty and inverted open times across every Schedule.
+
+https://docs.djangoproject.com/en/2.0/howto/custom-management-commands/
+"""
+# Python std. lib. imports
+from itertools import groupby
+
+# Django Imports
+from django.core.management.base import BaseCommand
+
+# App Imports
+from api.intervals import (
+    GAP,
+    SHORT_GAP_MINUTES,
+    canonical_rows,
+    check_open_times,
+    format_minute,
+)
+from api.models import OpenTime, Schedule
+
+
+class Command(BaseCommand):
+    help = "Report overlapping, empty and inverted open times across all schedules."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--fix",
+            action="store_true",
+            help="Rewrite each schedule's open times as a minimal set of rows.",
+        )
+        parser.add_argument(
+            "--min-gap",
+            type=int,
+            default=SHORT_GAP_MINUTES,
+            help="Report closed stretches shorter than this many minutes.",
+        )
+
+    def handle(self, *args, **options):
+        schedules = Schedule.objects.in_bulk()
+        # Load every open time in a single query, grouped by schedule
+        open_times = OpenTime.objects.order_by("schedule_id", "start_day", "start_time")
+
+        problems = 0
+        fixed = 0
+        for schedule_id, rows in groupby(open_times, lambda ot: ot.schedule_id):
+            rows = list(rows)
+            schedule = schedules[schedule_id]
+            lines = []
+            if schedule.twenty_four_hours:
+                lines.append(
+                    "24 hour schedule ignores its %d open times" % len(rows)
+                )
+            for conflict in check_open_times(rows, min_gap=options["min_gap"]):
+                if conflict.kind == GAP:
+                    where = "closed %s to %s" % (
+                        format_minute(conflict.interval.start),
+                        format_minute(conflict.interval.end),
+                    )
+                elif conflict.interval:
+                    where = "%s at %s" % (
+                        ", ".join(str(ot) for ot in conflict.open_times),
+                        format_minute(conflict.interval.start),
+                    )
+                else:
+                    where = str(conflict.open_times[0])
+                lines.append("%s: %s" % (conflict.kind, where))
+
+            redundant = len(rows) - len(canonical_rows(rows))
+            if redundant > 0:
+                lines.append("%d open times could be merged away" % redundant)
+            if not lines:
+                continue
+
+            problems += 1
+            self.stdout.write("%s (id %d)" % (schedule, schedule_id))
+            for line in lines:
+                self.stdout.write("    %s" % line)
+            if options["fix"]:
+                # Reuse the rows we already have loaded for this schedule
+                if schedule.normalize_open_times(rows):
+                    fixed += 1
+
+        self.stdout.write(
+            "%d of %d schedules have problems" % (problems, len(schedules))
+        )
+        if options["fix"]:
+            self.stdout.write(self.style.SUCCESS("Rewrote %d schedules" % fixed))
@@ -0,0 +1,40 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+api/management/commands/warm_cache.py
+
+Compute the most requested API responses that are not cached (see
+api/warming.py).
+
+https://docs.djangoproject.com/en/2.0/howto/custom-management-commands/
+"""
+# Django Imports
+from django.core.management.base import BaseCommand
+
+# App Imports
+from api.campuses import CAMPUSES
+from api.warming import warm_cache
+
+
+class Command(BaseCommand):
+    help = "Compute the most requested API responses that are not cached."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--campus",
+            action="append",
+            choices=CAMPUSES,
+            dest="campuses",
+            help="Only warm the responses of this campus (can be repeated).",
+        )
+        parser.add_argument(
+            "--no-alerts",
+            action="store_false",
+            dest="alerts",
+            help="Leave the alert responses out.",
+        )
+
+    def handle(self, *args, **options):
+        for path, params, seconds in warm_cache(options["campuses"], options["alerts"]):
+            query = "&".join("%s=%s" % item for item in sorted(params.items()))
+            self.stdout.write("%-50s %8.3fs" % ("%s?%s" % (path, query), seconds))
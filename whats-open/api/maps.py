@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+api/maps.py
+
+Build the GeoJSON facility layers served by /api/map/.
+
+A layer is a FeatureCollection of every facility on a campus (or on every
+campus) along with whether it is open. Layers are cached per campus_region
+(see api/campuses.py) and per zoom level, and at low zoom levels facilities
+that are close to each other are grouped into a single cluster feature on a
+fixed grid.
+"""
+# Python std. lib. imports
+from collections import OrderedDict
+
+# Django Imports
+from django.core.cache import cache
+
+# App Imports
+from .campuses import campus_cache_key
+from .models import Facility
+from .serializers import FacilityFeatureSerializer
+
+# Open state is part of a layer, so cached layers are rebuilt at least this
+# often even when no facility has changed.
+LAYER_CACHE_SECONDS = 60
+
+# Facilities are clustered below this zoom level.
+CLUSTER_MAX_ZOOM = 17
+# Number of grid cells along each side of a 256px map tile.
+CLUSTER_CELLS_PER_TILE = 4
+
+
+def feature_collection(features):
+    return OrderedDict((("type", "FeatureCollection"), ("features", features)))
+
+
+def build_features(campus=None):
+    """
+    Serialize every facility (on a campus) into a list of GeoJSON features.
+    """
+    facilities = Facility.objects.select_related(
+        "facility_category", "facility_location", "main_schedule"
+    ).prefetch_related("main_schedule__open_times", "special_schedules__open_times")
+    if campus:
+        facilities = facilities.filter(facility_location__campus_region=campus)
+    return FacilityFeatureSerializer(many=True).to_representation(facilities)["features"]
+
+
+def in_extent(features, extent):
+    """
+    Return the features whose point falls inside a (xmin, ymin, xmax, ymax)
+    extent.
+    """
+    xmin, ymin, xmax, ymax = extent
+    return [
+        feature
+        for feature in features
+        if xmin <= feature["geometry"]["coordinates"][0] <= xmax
+        and ymin <= feature["geometry"]["coordinates"][1] <= ymax
+    ]
+
+
+def cluster_features(features, zoom):
+    """
+    Group the features that fall in the same grid cell at a zoom level.
+
+    Cells that hold more than one facility are replaced by a single feature
+    placed at the center of its members, with `cluster`, `count`,
+    `open_count` and `facilities` (member slugs) properties.
+    """
+    size = 360.0 / 2 ** zoom / CLUSTER_CELLS_PER_TILE
+    cells = OrderedDict()
+    for feature in features:
+        x, y = feature["geometry"]["coordinates"][:2]
+        cells.setdefault((int(x // size), int(y // size)), []).append(feature)
+
+    clustered = []
+    for (column, row), members in cells.items():
+        if len(members) == 1:
+            clustered.append(members[0])
+            continue
+        xs = [member["geometry"]["coordinates"][0] for member in members]
+        ys = [member["geometry"]["coordinates"][1] for member in members]
+        clustered.append(
+            OrderedDict(
+                (
+                    ("id", "cluster-%d-%d-%d" % (zoom, column, row)),
+                    ("type", "Feature"),
+                    (
+                        "geometry",
+                        {"type": "Point", "coordinates": [sum(xs) / len(xs), sum(ys) / len(ys)]},
+                    ),
+                    (
+                        "properties",
+                        OrderedDict(
+                            (
+                                ("cluster", True),
+                                ("count", len(members)),
+                                (
+                                    "open_count",
+                                    sum(1 for m in members if m["properties"]["is_open"]),
+                                ),
+                                ("facilities", [member["id"] for member in members]),
+                            )
+                        ),
+                    ),
+                )
+            )
+        )
+    return clustered
+
+
+def facility_layer(campus=None, zoom=None):
+    """
+    Return the cached FeatureCollection of facilities for a campus (or every
+    campus), clustered for the given zoom level.
+    """
+    if zoom is not None and zoom >= CLUSTER_MAX_ZOOM:
+        zoom = None
+    key = campus_cache_key("facility-layer", campus, "full" if zoom is None else zoom)
+    layer = cache.get(key)
+    if layer is None:
+        if zoom is None:
+            features = build_features(campus)
+        else:
+            features = cluster_features(facility_layer(campus)["features"], zoom)
+        layer = feature_collection(features)
+        cache.set(key, layer, LAYER_CACHE_SECONDS)
+    return layer
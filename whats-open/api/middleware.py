@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+api/middleware.py
+
+Request middleware for the api app.
+
+https://docs.djangoproject.com/en/2.0/topics/http/middleware/
+"""
+# Django Imports
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse
+from django.urls import NoReverseMatch, reverse
+
+# App Imports
+from .models import OpenStateContext
+from .profiling import Profile, save_report
+from .routers import replica_reads, replicas
+
+# Requests that can be served from a replica
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+def admin_prefix():
+    """
+    Return the path the admin is served under, or None when the URLconf has
+    no admin (ex. settings.api).
+    """
+    try:
+        return reverse("admin:index")
+    except NoReverseMatch:
+        return None
+
+
+class ReplicaMiddleware(object):
+    """
+    Serve safe API requests from a read replica (see api/routers.py).
+
+    Writes, the admin and requests from clients that wrote something in the
+    last REPLICA_PIN_SECONDS stay on the primary, so that nobody reads data
+    that is older than their own changes while the replicas catch up.
+    """
+
+    PIN_COOKIE = "wopen_primary"
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not replicas():
+            return self.get_response(request)
+
+        if not self.use_replica(request):
+            response = self.get_response(request)
+            if request.method not in SAFE_METHODS:
+                response.set_cookie(
+                    self.PIN_COOKIE, "1", max_age=settings.REPLICA_PIN_SECONDS
+                )
+            return response
+
+        with replica_reads():
+            return self.get_response(request)
+
+    def use_replica(self, request):
+        prefix = admin_prefix()
+        return (
+            request.method in SAFE_METHODS
+            and self.PIN_COOKIE not in request.COOKIES
+            and not (prefix and request.path.startswith(prefix))
+        )
+
+
+class OpenStateMiddleware(object):
+    """
+    Evaluate every facility a request looks at at the same instant, and
+    every schedule once (see OpenStateContext in api/models.py).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with OpenStateContext.activate():
+            return self.get_response(request)
+
+
+class ProfileMiddleware(object):
+    """
+    Answer a staff user's request to an api.views endpoint that asks for it
+    with `?profile=1` (or an `X-Profile: 1` header) with a profile of the
+    request instead of its response (see api/profiling.py).
+
+    The report holds the sampled call stacks, the functions most samples
+    were taken in and every SQL query that ran, and is saved under
+    PROFILE_ROOT as well. `?profile=folded` answers with just the stacks in
+    the folded format that flamegraph.pl and speedscope read.
+
+    The request runs as it would otherwise, cached responses included, so
+    profile a request with a query string that was not asked for recently
+    to see it computed.
+    """
+
+    PARAM = "profile"
+    HEADER = "HTTP_X_PROFILE"
+    # Any other value (ex. ?profile=0) leaves the request alone
+    MODES = ("1", "folded")
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        mode = request.GET.get(self.PARAM) or request.META.get(self.HEADER)
+        if mode not in self.MODES or not self.can_profile(request, view_func):
+            return None
+
+        with Profile() as profile:
+            response = view_func(request, *view_args, **view_kwargs)
+            # Rendering is part of the work, serializers run lazily in there
+            if hasattr(response, "render") and callable(response.render):
+                response.render()
+        report = profile.report(request)
+        report["status_code"] = response.status_code
+        report["saved_as"] = save_report(
+            report, request.resolver_match.url_name or view_func.__name__
+        )
+
+        if mode == "folded":
+            return HttpResponse(report["folded"], content_type="text/plain")
+        return JsonResponse(report)
+
+    def can_profile(self, request, view_func):
+        view = getattr(view_func, "cls", view_func)
+        return view.__module__ == "api.views" and getattr(
+            request.user, "is_staff", False
+        )
@@ -0,0 +1,35 @@
+# Generated by Django 2.0.13 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+from api.intervals import weekly_hours
+
+
+def compute_weekly_hours(apps, schema_editor):
+    Schedule = apps.get_model('api', 'Schedule')
+    OpenTime = apps.get_model('api', 'OpenTime')
+    open_times = {}
+    for open_time in OpenTime.objects.all():
+        open_times.setdefault(open_time.schedule_id, []).append(open_time)
+    for schedule in Schedule.objects.all():
+        Schedule.objects.filter(pk=schedule.pk).update(
+            weekly_hours=weekly_hours(
+                open_times.get(schedule.pk, []), schedule.twenty_four_hours
+            )
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_auto_20190219_1729'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='schedule',
+            name='weekly_hours',
+            field=models.CharField(blank=True, editable=False, max_length=112),
+        ),
+        migrations.RunPython(compute_weekly_hours, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 2.0.13 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+
+def compute_tag_names(apps, schema_editor):
+    Facility = apps.get_model('api', 'Facility')
+    TaggedItem = apps.get_model('taggit', 'TaggedItem')
+    ContentType = apps.get_model('contenttypes', 'ContentType')
+    content_type = ContentType.objects.filter(
+        app_label='api', model='facility'
+    ).first()
+    if content_type is None:
+        return
+    names = {}
+    items = TaggedItem.objects.filter(content_type=content_type).values_list(
+        'object_id', 'tag__name'
+    )
+    for object_id, name in items:
+        names.setdefault(object_id, []).append(name)
+    for object_id, tag_names in names.items():
+        tag_names = sorted(set(tag_names), key=str.lower)
+        Facility.objects.filter(pk=object_id).update(
+            tag_names=',%s,' % ','.join(tag_names)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_schedule_weekly_hours'),
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('taggit', '0002_auto_20150616_2121'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='facility',
+            name='tag_names',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.RunPython(compute_tag_names, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,86 @@
+# Generated by Django 2.0.13 on 2026-10-18 12:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+from api.intervals import daily_open_minutes
+
+
+def compute_open_hours(apps, schema_editor):
+    Facility = apps.get_model('api', 'Facility')
+    OpenHoursRollup = apps.get_model('api', 'OpenHoursRollup')
+    facilities = Facility.objects.select_related(
+        'facility_location', 'main_schedule'
+    ).prefetch_related('main_schedule__open_times', 'special_schedules__open_times')
+    for facility in facilities:
+        schedules = [(facility.main_schedule, True)] + [
+            (schedule, False) for schedule in facility.special_schedules.all()
+        ]
+        rows = []
+        for schedule, main in schedules:
+            days = daily_open_minutes(
+                schedule.open_times.all(), schedule.twenty_four_hours
+            )
+            for day, (open_minutes, first_open, last_close) in enumerate(days):
+                rows.append(
+                    OpenHoursRollup(
+                        facility_id=facility.pk,
+                        schedule_id=schedule.pk,
+                        main=main,
+                        valid_start=schedule.valid_start,
+                        valid_end=schedule.valid_end,
+                        category_id=facility.facility_category_id,
+                        building=facility.facility_location.building,
+                        campus_region=facility.facility_location.campus_region,
+                        day=day,
+                        open_minutes=open_minutes,
+                        first_open=first_open,
+                        last_close=last_close,
+                    )
+                )
+        OpenHoursRollup.objects.bulk_create(rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_facility_tag_names'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OpenHoursRollup',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('main', models.BooleanField(default=True)),
+                ('valid_start', models.DateTimeField(null=True)),
+                ('valid_end', models.DateTimeField(null=True)),
+                ('building', models.CharField(max_length=100)),
+                ('campus_region', models.CharField(max_length=100)),
+                ('day', models.IntegerField(choices=[(0, 'Monday'), (1, 'Tuesday'), (2, 'Wednesday'), (3, 'Thursday'), (4, 'Friday'), (5, 'Saturday'), (6, 'Sunday')])),
+                ('open_minutes', models.IntegerField(default=0)),
+                ('first_open', models.IntegerField(null=True)),
+                ('last_close', models.IntegerField(null=True)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='open_hours', to='api.Category')),
+                ('facility', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='open_hours', to='api.Facility')),
+                ('schedule', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='open_hours', to='api.Schedule')),
+            ],
+            options={
+                'verbose_name': 'open hours rollup',
+                'verbose_name_plural': 'open hours rollups',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='openhoursrollup',
+            index=models.Index(fields=['day', 'campus_region'], name='api_openhou_day_d3d25d_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='openhoursrollup',
+            index=models.Index(fields=['day', 'building'], name='api_openhou_day_fad898_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='openhoursrollup',
+            index=models.Index(fields=['main', 'valid_start', 'valid_end'], name='api_openhou_main_07630a_idx'),
+        ),
+        migrations.RunPython(compute_open_hours, migrations.RunPython.noop),
+    ]
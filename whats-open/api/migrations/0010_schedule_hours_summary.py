@@ -0,0 +1,35 @@
+# Generated by Django 2.0.13 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+from api.hours import stored_hours_summary
+
+
+def compute_hours_summary(apps, schema_editor):
+    Schedule = apps.get_model('api', 'Schedule')
+    OpenTime = apps.get_model('api', 'OpenTime')
+    open_times = {}
+    for open_time in OpenTime.objects.all():
+        open_times.setdefault(open_time.schedule_id, []).append(open_time)
+    for schedule in Schedule.objects.all():
+        Schedule.objects.filter(pk=schedule.pk).update(
+            hours_summary=stored_hours_summary(
+                open_times.get(schedule.pk, []), schedule.twenty_four_hours
+            )
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_openhoursrollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='schedule',
+            name='hours_summary',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.RunPython(compute_hours_summary, migrations.RunPython.noop),
+    ]
@@ -10,9 +10,12 @@ https://docs.djangoproject.com/en/1.11/topics/db/models/
 """
 # Python Imports
 import datetime
+import threading
+from collections import Counter, namedtuple
+from contextlib import contextmanager
 
 # Django Imports
-from django.db import models
+from django.db import models, transaction
 from django.contrib.gis.db.models import PointField
 from django.contrib.auth.models import User
 from django.core.validators import RegexValidator
@@ -23,6 +26,123 @@ from model_utils.models import TimeStampedModel
 from autoslug import AutoSlugField
 from taggit.managers import TaggableManager
 
+# App Imports
+from .hours import stored_hours_summary
+from .intervals import (
+    canonical_rows,
+    exact_intervals,
+    exact_open_state,
+    tick_of_week,
+    weekly_hours,
+)
+
+# Whether a Facility is open at some moment, when it closes if it is and when
+# it opens next if it is not (see Facility.open_state)
+OpenState = namedtuple("OpenState", ["is_open", "closes_at", "next_opens_at"])
+
+
+class OpenStateContext(object):
+    """
+    Evaluate whether facilities are open at one instant.
+
+    Every schedule is evaluated once however many facilities follow it, and
+    prefetch() loads the open times of the schedules in effect together, so
+    that the cost of a request grows with the number of distinct schedules
+    rather than with the number of facilities. OpenStateMiddleware (see
+    api/middleware.py) activates one context for every request, which
+    Facility.is_open() and Facility.open_state() then go through.
+
+    Schedules are evaluated to the second, the same way as
+    OpenTime.is_open_now(): a row that ends at 17:00 is open at 17:00:00 and
+    closed at 17:00:01, and one that starts at 7:00:30 opens at 7:00:30.
+    """
+
+    _active = threading.local()
+
+    def __init__(self, moment=None):
+        self.moment = timezone.now() if moment is None else moment
+        local = timezone.localtime(self.moment)
+        self.tick = tick_of_week(local.weekday(), local.time())
+        self.local = local.replace(microsecond=0)
+        # Open times and OpenStates by schedule id
+        self.open_times = {}
+        self.states = {}
+
+    @classmethod
+    def current(cls):
+        """
+        Return the context activated in this thread, if there is one.
+        """
+        return getattr(cls._active, "context", None)
+
+    @classmethod
+    @contextmanager
+    def activate(cls, context=None):
+        previous = cls.current()
+        cls._active.context = context or cls()
+        try:
+            yield cls._active.context
+        finally:
+            cls._active.context = previous
+
+    def after(self, seconds):
+        """
+        Return the moment some seconds after this context's (whole) second.
+        """
+        if seconds is None:
+            return None
+        # Count on the wall clock so that a change to or from daylight saving
+        # time does not shift the result by an hour
+        wall = timezone.make_naive(self.local) + datetime.timedelta(seconds=seconds)
+        return timezone.make_aware(wall, is_dst=False)
+
+    def prefetch(self, facilities):
+        """
+        Load the open times of the schedules that some facilities follow at
+        this instant in a single query, leaving out the ones that are
+        already known or prefetched. The facilities' schedules should be
+        fetched along with them.
+        """
+        missing = set()
+        for facility in facilities:
+            schedule = facility.schedule_at(self.moment)
+            if schedule.pk in self.open_times:
+                continue
+            prefetched = getattr(schedule, "_prefetched_objects_cache", {})
+            if "open_times" in prefetched:
+                self.open_times[schedule.pk] = list(prefetched["open_times"])
+            else:
+                missing.add(schedule.pk)
+        if missing:
+            for schedule_id in missing:
+                self.open_times[schedule_id] = []
+            for open_time in OpenTime.objects.filter(schedule__in=missing):
+                self.open_times[open_time.schedule_id].append(open_time)
+
+    def schedule_state(self, schedule):
+        """
+        Return the OpenState of a schedule at this instant.
+        """
+        state = self.states.get(schedule.pk)
+        if state is None:
+            open_times = self.open_times.get(schedule.pk)
+            if open_times is None:
+                open_times = self.open_times[schedule.pk] = list(schedule.open_times.all())
+            is_open, closes_in, opens_in = exact_open_state(
+                exact_intervals(open_times, schedule.twenty_four_hours), self.tick
+            )
+            state = self.states[schedule.pk] = OpenState(
+                is_open, self.after(closes_in), self.after(opens_in)
+            )
+        return state
+
+    def facility_state(self, facility):
+        """
+        Return the OpenState of a facility at this instant, which is that of
+        the schedule it follows then.
+        """
+        return self.schedule_state(facility.schedule_at(self.moment))
+
 
 class Category(TimeStampedModel):
     """
@@ -89,6 +209,21 @@ class Location(TimeStampedModel):
         return "%s on %s Campus" % (self.building, self.campus_region.title())
 
 
+def join_tags(names):
+    """
+    Return the tag_names column value for a list of tag names.
+    """
+    names = sorted(set(names), key=str.lower)
+    return ",%s," % ",".join(names) if names else ""
+
+
+def split_tags(value):
+    """
+    Return the list of tag names stored in a tag_names column value.
+    """
+    return value.strip(",").split(",") if value else []
+
+
 class Facility(TimeStampedModel):
     """
     Represents a specific facility location. A Facility is some type of
@@ -175,6 +310,11 @@ class Facility(TimeStampedModel):
         related_name="product_tags",
         help_text="A comma seperate list of words that neatly and aptly describe the product that this facility produces. These words are not shown to the use but are rather used in search.",
     )
+    # The names of the facility_product_tags, sorted and wrapped in commas
+    # (ex. ",cheap,mexican,taco,") so that a single tag can be matched with
+    # tag_names__contains=",taco," without joining through taggit. Kept up to
+    # date by the signals in api/signals.py.
+    tag_names = models.TextField(blank=True, editable=False)
 
     # Tag a Facility to be shown on the ShopMason
     # What's Open sites.
@@ -191,18 +331,45 @@ class Facility(TimeStampedModel):
         Return true if this facility is currently open.
 
         First checks any valid special schedules and then checks the main,
-        default, schedule.
+        default, schedule. Goes through the OpenStateContext of the current
+        request, if there is one.
+        """
+        context = OpenStateContext.current() or OpenStateContext()
+        return context.facility_state(self).is_open
+
+    def schedule_at(self, moment):
+        """
+        Return the schedule in effect at a moment, the first special schedule
+        whose dates hold the moment or else the main schedule.
+
+        Only goes through prefetched special schedules when there are some.
         """
-        today = timezone.now()
-        # Check special schedules first
         for schedule in self.special_schedules.all():
-            # Special schedules must have valid_start and valid_end set
             if schedule.valid_start and schedule.valid_end:
-                if schedule.valid_start <= today <= schedule.valid_end:
-                    return schedule.is_open_now()
+                if schedule.valid_start <= moment <= schedule.valid_end:
+                    return schedule
+        return self.main_schedule
+
+    def open_state(self, moment=None):
+        """
+        Return the OpenState of this facility at a moment (now by default).
+
+        closes_at and next_opens_at follow the schedule in effect at the
+        moment and are None when it never closes or never opens. With the
+        schedules and their open times prefetched this runs no queries.
+        """
+        context = OpenStateContext.current()
+        if context is None or (moment is not None and moment != context.moment):
+            context = OpenStateContext(moment)
+        return context.facility_state(self)
 
-        # If no special schedule is in effect then check the main_schedule
-        return self.main_schedule.is_open_now()
+    def update_tag_names(self):
+        """
+        Recompute tag_names from this facility's tags and store it.
+        """
+        self.tag_names = join_tags(self.facility_product_tags.names())
+        # Only write the one column so that modified is left alone
+        Facility.objects.filter(pk=self.pk).update(tag_names=self.tag_names)
 
     class Meta:
         verbose_name = "facility"
@@ -251,6 +418,15 @@ class Schedule(TimeStampedModel):
         help_text="Toggle to True if the Facility is open 24 hours. You do not need to specify any Open Times, it will always be displayed as open.",
     )
 
+    # Base64 encoded bitmap of the hours this schedule is open during a week,
+    # one bit per 15 minutes (see api/intervals.py). Kept up to date from the
+    # open times by the signals in api/signals.py.
+    weekly_hours = models.CharField(max_length=112, blank=True, editable=False)
+
+    # Human readable summary of the hours this schedule is open during a week
+    # in LANGUAGE_CODE (see api/hours.py), kept up to date like weekly_hours.
+    hours_summary = models.TextField(blank=True, editable=False)
+
     def is_open_now(self):
         """
         Return true if this schedule is open right now.
@@ -260,12 +436,135 @@ class Schedule(TimeStampedModel):
             return True
         else:
             # Loop through all the open times that correspond to this schedule
-            for open_time in OpenTime.objects.filter(schedule=self):
+            # (going through the related manager uses any prefetched rows)
+            for open_time in self.open_times.all():
                 if open_time.is_open_now():
                     return True
             # Closed (all open times are not open)
             return False
 
+    def update_hours(self, open_times=None):
+        """
+        Recompute weekly_hours and hours_summary from this schedule's open
+        times and store them.
+        """
+        if open_times is None:
+            open_times = list(self.open_times.all())
+        self.weekly_hours = weekly_hours(open_times, self.twenty_four_hours)
+        self.hours_summary = stored_hours_summary(open_times, self.twenty_four_hours)
+        # Only write these columns so that modified is left alone
+        Schedule.objects.filter(pk=self.pk).update(
+            weekly_hours=self.weekly_hours, hours_summary=self.hours_summary
+        )
+
+    # Set while a new schedule is saved only to give it an id for the open
+    # times that are about to be written, the Schedule signals then leave the
+    # data derived from them to the save that follows
+    deferring_hours = False
+
+    # The ids of the schedules whose open times the current thread is
+    # replacing with set_open_times(), the OpenTime signals leave them alone
+    _replacing = threading.local()
+
+    @classmethod
+    def replacing_open_times(cls, schedule_id):
+        """
+        Return true if the open times of a schedule are being replaced as a
+        whole, in which case the data derived from them is rebuilt once when
+        the schedule is saved rather than for each row.
+        """
+        return schedule_id in getattr(cls._replacing, "ids", ())
+
+    def set_open_times(self, rows, open_times=None):
+        """
+        Make this schedule's open times exactly the given (start_day,
+        start_time, end_day, end_time) rows.
+
+        Only the difference with the stored rows is written, in one
+        transaction: rows that are left are kept, changed rows are updated
+        in place with one UPDATE, and the rest are deleted and inserted in
+        bulk. The OpenTime signals skip these rows, save the schedule
+        afterwards to rebuild the data derived from its open times.
+
+        Return true if the stored open times were changed.
+        """
+        if open_times is None:
+            open_times = list(self.open_times.all())
+        wanted = Counter(rows)
+        stale = []
+        for open_time in open_times:
+            row = (
+                open_time.start_day,
+                open_time.start_time,
+                open_time.end_day,
+                open_time.end_time,
+            )
+            if wanted[row]:
+                wanted[row] -= 1
+            else:
+                stale.append(open_time.pk)
+        new = list(wanted.elements())
+        if not stale and not new:
+            return False
+
+        # Reuse as many stale rows as there are new ones
+        updated = list(zip(stale, new))
+        deleted = stale[len(new):]
+        inserted = new[len(stale):]
+        ids = getattr(self._replacing, "ids", set())
+        self._replacing.ids = ids | {self.pk}
+        try:
+            with transaction.atomic():
+                if updated:
+                    # Django 2.0 has no bulk_update(), this is what it runs
+                    OpenTime.objects.filter(pk__in=[pk for pk, row in updated]).update(
+                        modified=timezone.now(),
+                        **{
+                            name: models.Case(
+                                *[
+                                    models.When(
+                                        pk=pk, then=models.Value(row[index], output_field=field)
+                                    )
+                                    for pk, row in updated
+                                ],
+                                output_field=field
+                            )
+                            for index, name, field in (
+                                (index, name, OpenTime._meta.get_field(name))
+                                for index, name in enumerate(OpenTime.ROW_FIELDS)
+                            )
+                        }
+                    )
+                if deleted:
+                    OpenTime.objects.filter(pk__in=deleted).delete()
+                OpenTime.objects.bulk_create(
+                    [
+                        OpenTime(schedule=self, **dict(zip(OpenTime.ROW_FIELDS, row)))
+                        for row in inserted
+                    ]
+                )
+        finally:
+            self._replacing.ids = ids
+        return True
+
+    def normalize_open_times(self, open_times=None):
+        """
+        Replace this schedule's open times with the minimal set of rows that
+        is open for the same hours. Overlapping and touching rows are merged
+        and rows that are never open are dropped.
+
+        Return true if the stored open times were changed.
+        """
+        if open_times is None:
+            open_times = list(self.open_times.all())
+        with transaction.atomic():
+            if not self.set_open_times(canonical_rows(open_times), open_times):
+                return False
+            # Bump modified so that clients pick up the rewritten open times,
+            # which also rebuilds the data derived from them
+            self.save(update_fields=["modified"])
+        return True
+
     class Meta:
         # Sort by name in admin view
         ordering = ["name"]
@@ -304,6 +603,10 @@ class OpenTime(TimeStampedModel):
         (SUNDAY, "Sunday"),
     )
 
+    # The fields that make up a (start_day, start_time, end_day, end_time)
+    # row, see Schedule.set_open_times
+    ROW_FIELDS = ("start_day", "start_time", "end_day", "end_time")
+
     # The schedule that this period of open time is a part of
     schedule = models.ForeignKey(
         "Schedule", related_name="open_times", on_delete=models.CASCADE
@@ -444,3 +747,57 @@ class Alert(TimeStampedModel):
         String representation of an Alert object.
         """
         return "{0} \n {1} \n {2}".format(self.subject, self.body, self.url)
+
+
+class OpenHoursRollup(models.Model):
+    """
+    The open minutes of a Facility on one day of the week under one of its
+    schedules, along with the category, building and campus of the facility
+    so that reports are a single GROUP BY away.
+
+    Rows are derived from the open times and are rebuilt by api/rollups.py
+    whenever anything they depend on changes.
+    """
+
+    facility = models.ForeignKey(
+        "Facility", related_name="open_hours", on_delete=models.CASCADE
+    )
+    schedule = models.ForeignKey(
+        "Schedule", related_name="open_hours", on_delete=models.CASCADE
+    )
+    # Whether this is the facility's main schedule or one of its special ones
+    main = models.BooleanField(default=True)
+    # The validity window of the schedule
+    valid_start = models.DateTimeField(null=True)
+    valid_end = models.DateTimeField(null=True)
+
+    category = models.ForeignKey(
+        "Category", related_name="open_hours", on_delete=models.CASCADE
+    )
+    building = models.CharField(max_length=100)
+    campus_region = models.CharField(max_length=100)
+
+    day = models.IntegerField(choices=OpenTime.DAY_CHOICES)
+    # Minutes the facility is open on this day
+    open_minutes = models.IntegerField(default=0)
+    # Minutes after midnight of the first opening and last closing of the
+    # day, null on days it is closed
+    first_open = models.IntegerField(null=True)
+    last_close = models.IntegerField(null=True)
+
+    class Meta:
+        verbose_name = "open hours rollup"
+        verbose_name_plural = "open hours rollups"
+        indexes = [
+            models.Index(fields=["day", "campus_region"]),
+            models.Index(fields=["day", "building"]),
+            # Finds the special schedules in effect at some moment
+            models.Index(fields=["main", "valid_start", "valid_end"]),
+        ]
+
+    def __str__(self):
+        return "%s %s: %d minutes" % (
+            self.facility_id,
+            OpenTime.DAY_CHOICES[self.day][1],
+            self.open_minutes,
+        )
@@ -0,0 +1,30 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+api/parsers.py
+
+Request body parsers that match the formats in api/renderers.py.
+
+http://www.django-rest-framework.org/api-guide/parsers/#custom-parsers
+"""
+# Other Imports
+import msgpack
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+
+class MessagePackParser(BaseParser):
+    """
+    Parse `Content-Type: application/msgpack` request bodies.
+
+    Timestamp extension values are decoded into timezone aware datetimes,
+    which the serializer DateTimeFields accept as they are.
+    """
+
+    media_type = "application/msgpack"
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return msgpack.unpackb(stream.read(), raw=False, timestamp=3)
+        except (ValueError, msgpack.UnpackException) as exc:
+            raise ParseError("MessagePack parse error - %s" % exc)
@@ -0,0 +1,229 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+api/profiling.py
+
+Profile a single API request for staff users (see ProfileMiddleware in
+api/middleware.py).
+
+A sampling profiler records the call stack of the thread serving the request
+every PROFILE_INTERVAL seconds, while every SQL query on every database
+connection is recorded along with how long it took. The stacks are kept in
+the "folded" format that flamegraph.pl and speedscope read, one
+"outer;inner;innermost count" line per distinct stack.
+
+The sampler is a thread of its own, so while the request holds the GIL it
+only gets to take a sample once every switch interval (5 ms by default,
+see sys.getswitchinterval()). The switch interval is process wide and is left
+alone, lowering it would slow down every other request of the worker.
+"""
+# Python std. lib. imports
+import datetime
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import ExitStack
+
+# Django Imports
+from django.conf import settings
+from django.db import connections
+
+
+class Sampler(threading.Thread):
+    """
+    Count the call stacks a thread is in, sampled at a fixed interval.
+    """
+
+    def __init__(self, thread_id, interval):
+        super(Sampler, self).__init__(daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.finished = threading.Event()
+
+    def run(self):
+        # Only the code objects are collected while sampling, naming them
+        # takes far longer and is done once per distinct stack afterwards
+        samples = Counter()
+        while not self.finished.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(frame.f_code)
+                frame = frame.f_back
+            if stack:
+                samples[tuple(stack)] += 1
+
+        names = {}
+        for stack, count in samples.items():
+            for code in stack:
+                if code not in names:
+                    names[code] = code_name(code)
+            self.stacks[";".join(names[code] for code in reversed(stack))] += count
+
+    def stop(self):
+        self.finished.set()
+        self.join()
+
+
+def code_name(code):
+    """
+    Return "function (path/to/module.py:line)" for a function's code.
+    """
+    filename = code.co_filename
+    for path in sys.path:
+        if path and filename.startswith(path.rstrip(os.sep) + os.sep):
+            filename = filename[len(path.rstrip(os.sep)) + 1 :]
+            break
+    return "%s (%s:%d)" % (code.co_name, filename, code.co_firstlineno)
+
+
+class QueryLog(object):
+    """
+    Database execute wrapper that records the SQL of every query it runs.
+
+    The time is the time the database took to run the query, drivers that
+    fetch the rows lazily (ex. sqlite3) spend more time in the frames that
+    iterate over the results.
+    """
+
+    def __init__(self, alias):
+        self.alias = alias
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append(
+                {
+                    "database": self.alias,
+                    "sql": sql,
+                    "params": [str(param) for param in params or ()],
+                    "milliseconds": round((time.perf_counter() - start) * 1000, 3),
+                }
+            )
+
+
+class Profile(object):
+    """
+    Context manager that profiles the code it wraps, in the current thread.
+    """
+
+    def __init__(self, interval=None):
+        self.interval = interval or settings.PROFILE_INTERVAL
+        self.sampler = None
+        self.logs = []
+
+    def __enter__(self):
+        self.exit_stack = ExitStack()
+        for alias in connections:
+            log = QueryLog(alias)
+            self.logs.append(log)
+            self.exit_stack.enter_context(connections[alias].execute_wrapper(log))
+        self.sampler = Sampler(threading.get_ident(), self.interval)
+        self.sampler.start()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.milliseconds = (time.perf_counter() - self.start) * 1000
+        self.sampler.stop()
+        self.exit_stack.close()
+
+    @property
+    def queries(self):
+        return [query for log in self.logs for query in log.queries]
+
+    def folded(self):
+        """
+        Return the sampled stacks in the folded format.
+        """
+        return "".join(
+            "%s %d\n" % (stack, count) for stack, count in sorted(self.sampler.stacks.items())
+        )
+
+    def hot_frames(self, limit=25):
+        """
+        Return the functions that the most samples were taken in, counting
+        both the samples where a function was running itself ("self") and
+        the ones where it was anywhere on the stack ("total").
+        """
+        own, total = frame_counts(self.sampler.stacks)
+        return [
+            {"frame": name, "total": count, "self": own[name]}
+            for name, count in total.most_common(limit)
+        ]
+
+    def report(self, request):
+        queries = self.queries
+        return {
+            "method": request.method,
+            "path": request.get_full_path(),
+            "user": request.user.get_username(),
+            "created": datetime.datetime.utcnow().isoformat() + "Z",
+            "milliseconds": round(self.milliseconds, 3),
+            "interval": self.interval,
+            "samples": sum(self.sampler.stacks.values()),
+            "hot_frames": self.hot_frames(),
+            "folded": self.folded(),
+            "sql": {
+                "count": len(queries),
+                "milliseconds": round(sum(query["milliseconds"] for query in queries), 3),
+                "queries": queries,
+            },
+        }
+
+
+def frame_counts(stacks):
+    """
+    Return how many samples every function was running in itself, and how
+    many it was anywhere on the stack for, given the sample count by stack.
+    """
+    own = Counter()
+    total = Counter()
+    for stack, count in stacks.items():
+        frames = stack.split(";")
+        own[frames[-1]] += count
+        for name in set(frames):
+            total[name] += count
+    return own, total
+
+
+def parse_folded(folded):
+    """
+    Return the sample count by stack of stacks in the folded format.
+    """
+    stacks = Counter()
+    for line in folded.splitlines():
+        stack, _, count = line.rpartition(" ")
+        if stack:
+            stacks[stack] += int(count)
+    return stacks
+
+
+def save_report(report, name):
+    """
+    Save a profile report under PROFILE_ROOT and return its file name.
+    """
+    os.makedirs(settings.PROFILE_ROOT, exist_ok=True)
+    filename = "%s-%s-%s.json" % (
+        datetime.datetime.utcnow().strftime("%Y%m%d-%H%M%S"),
+        name,
+        uuid.uuid4().hex[:8],
+    )
+    with open(os.path.join(settings.PROFILE_ROOT, filename), "w") as report_file:
+        json.dump(report, report_file, indent=2)
+    return filename
+
+
+def load_report(path):
+    if not os.path.isabs(path) and not os.path.exists(path):
+        path = os.path.join(settings.PROFILE_ROOT, path)
+    with open(path) as report_file:
+        return json.load(report_file)
@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+api/renderers.py
+
+Compact binary response formats for API clients.
+
+MessagePack keeps the same structure as the JSON responses but drops the
+quoting and whitespace, and encodes temporal values as integers:
+
+- datetimes use the MessagePack timestamp extension (type -1), which most
+  client libraries decode straight into a native date object
+- times of day are the number of seconds since midnight
+- dates are the number of days since 1970-01-01
+
+http://www.django-rest-framework.org/api-guide/renderers/#custom-renderers
+"""
+# Python std. lib. imports
+import datetime
+
+# Other Imports
+import msgpack
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+EPOCH = datetime.date(1970, 1, 1)
+
+
+def encode_value(obj):
+    """
+    Encode the values that MessagePack does not know how to pack natively.
+    """
+    if isinstance(obj, datetime.time):
+        return obj.hour * 3600 + obj.minute * 60 + obj.second
+    if isinstance(obj, datetime.date) and not isinstance(obj, datetime.datetime):
+        return (obj - EPOCH).days
+    # Fall back to how the JSON renderer handles everything else (ex. Decimal)
+    return JSONEncoder().default(obj)
+
+
+class MessagePackRenderer(BaseRenderer):
+    """
+    Render responses as MessagePack when a client sends
+    `Accept: application/msgpack` or asks for `?format=msgpack`.
+
+    Serializers hand this renderer native datetime and time objects (see
+    NativeTemporalMixin) so that they can be packed as integers.
+    """
+
+    media_type = "application/msgpack"
+    format = "msgpack"
+    charset = None
+    render_style = "binary"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return msgpack.packb(
+            data, default=encode_value, use_bin_type=True, datetime=True
+        )
@@ -0,0 +1,203 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+api/rollups.py
+
+Precomputed open hours for the /api/analytics/open-hours/ reports.
+
+Every facility gets one OpenHoursRollup row per day of the week for its main
+schedule and for each of its special schedules. The signals in api/signals.py
+rebuild the rows of the facilities that a change touches, and reports are
+answered by aggregating the rows of the schedules in effect at some moment.
+"""
+# Python std. lib. imports
+from collections import OrderedDict
+
+# Django Imports
+from django.db import connection, transaction
+from django.db.models import Count, F, Max, Min, OuterRef, Q, Subquery, Sum
+
+# App Imports
+from .intervals import daily_open_minutes
+from .models import Facility, OpenHoursRollup
+
+# A report can be grouped by any of these, each one adds the listed columns
+# (lookup, output name) to every row of the report.
+DIMENSIONS = OrderedDict(
+    (
+        (
+            "facility",
+            (("facility__slug", "facility"), ("facility__facility_name", "facility_name")),
+        ),
+        ("category", (("category__name", "category"),)),
+        ("building", (("building", "building"), ("campus_region", "campus"))),
+        ("campus", (("campus_region", "campus"),)),
+        ("day", (("day", "day"),)),
+    )
+)
+METRICS = OrderedDict(
+    (
+        ("facilities", Count("facility", distinct=True)),
+        ("total_minutes", Sum("open_minutes")),
+        ("opens_at", Min("first_open")),
+        ("closes_at", Max("last_close")),
+    )
+)
+
+BATCH_SIZE = 1000
+
+
+def facility_rollups(facility):
+    """
+    Return the unsaved OpenHoursRollup rows of a Facility.
+
+    The facility's location, main schedule and special schedules should be
+    fetched along with it, with their open times prefetched.
+    """
+    location = facility.facility_location
+    schedules = [(facility.main_schedule, True)] + [
+        (schedule, False) for schedule in facility.special_schedules.all()
+    ]
+    rows = []
+    for schedule, main in schedules:
+        days = daily_open_minutes(schedule.open_times.all(), schedule.twenty_four_hours)
+        for day, (open_minutes, first_open, last_close) in enumerate(days):
+            rows.append(
+                OpenHoursRollup(
+                    facility_id=facility.pk,
+                    schedule_id=schedule.pk,
+                    main=main,
+                    valid_start=schedule.valid_start,
+                    valid_end=schedule.valid_end,
+                    category_id=facility.facility_category_id,
+                    building=location.building,
+                    campus_region=location.campus_region,
+                    day=day,
+                    open_minutes=open_minutes,
+                    first_open=first_open,
+                    last_close=last_close,
+                )
+            )
+    return rows
+
+
+def refresh_open_hours(facility_ids=None):
+    """
+    Rebuild the rollup rows of some facilities, or of every facility.
+    """
+    facilities = Facility.objects.select_related(
+        "facility_location", "main_schedule"
+    ).prefetch_related("main_schedule__open_times", "special_schedules__open_times")
+    stale = OpenHoursRollup.objects.all()
+    if facility_ids is not None:
+        facility_ids = list(facility_ids)
+        if not facility_ids:
+            return
+        facilities = facilities.filter(pk__in=facility_ids)
+        stale = stale.filter(facility__in=facility_ids)
+
+    rows = [row for facility in facilities for row in facility_rollups(facility)]
+    fields = OpenHoursRollup._meta.concrete_fields
+    size = max(1, min(BATCH_SIZE, connection.ops.bulk_batch_size(fields, rows)))
+    with transaction.atomic():
+        stale.delete()
+        OpenHoursRollup.objects.bulk_create(rows, batch_size=size)
+
+
+def schedule_facility_ids(schedule_ids):
+    """
+    Return the ids of the facilities that use some schedules, as a main or a
+    special schedule.
+    """
+    return set(
+        Facility.objects.filter(
+            Q(main_schedule__in=schedule_ids) | Q(special_schedules__in=schedule_ids)
+        ).values_list("pk", flat=True)
+    )
+
+
+def in_effect(at):
+    """
+    Return the rollup rows of the schedule every facility follows at a moment.
+
+    Like Facility.is_open(), that is the first special schedule (by name) whose
+    validity window holds the moment, or else the main schedule.
+    """
+    current = OpenHoursRollup.objects.filter(
+        main=False, valid_start__lte=at, valid_end__gte=at
+    )
+    first = (
+        current.filter(facility=OuterRef("facility"))
+        .order_by("schedule__name", "schedule")
+        .values("schedule")[:1]
+    )
+    # Only the few special schedules in effect go through the correlated
+    # subquery, every other facility follows its main schedule
+    specials = current.annotate(first=Subquery(first)).filter(schedule=F("first"))
+    return OpenHoursRollup.objects.filter(
+        Q(main=True) & ~Q(facility__in=current.values("facility"))
+        | Q(pk__in=specials.values("pk"))
+    )
+
+
+def format_minutes(minutes):
+    if minutes is None:
+        return None
+    return "%02d:%02d" % divmod(minutes, 60)
+
+
+def report_columns(group_by):
+    """
+    Return the (lookup, output name) pairs of the group_by columns of a report.
+    """
+    return OrderedDict(
+        column for dimension in group_by for column in DIMENSIONS[dimension]
+    )
+
+
+def ordering_lookups(group_by):
+    """
+    Return the lookups of the columns a report can be ordered by, by name.
+    """
+    lookups = {name: lookup for lookup, name in report_columns(group_by).items()}
+    lookups.update((metric, metric) for metric in METRICS)
+    lookups["total_hours"] = "total_minutes"
+    return lookups
+
+
+def open_hours_report(at, group_by, day=None, campus=None, ordering=None):
+    """
+    Aggregate the open hours in effect at a moment by some DIMENSIONS.
+
+    Every row holds the group_by columns along with the number of
+    facilities, their total open minutes (and hours) and the earliest
+    opening and latest closing time. Only one day of the week and one
+    campus are looked at when they are given. `ordering` is a list of output
+    columns, prefixed with "-" for descending order.
+    """
+    columns = report_columns(group_by)
+    lookups = ordering_lookups(group_by)
+
+    rows = in_effect(at)
+    if day is not None:
+        rows = rows.filter(day=day)
+    if campus is not None:
+        rows = rows.filter(campus_region=campus)
+    rows = rows.values(*columns).annotate(**METRICS)
+
+    order_by = []
+    for column in ordering or ():
+        descending = column.startswith("-")
+        order_by.append(("-" if descending else "") + lookups[column.lstrip("-")])
+    rows = rows.order_by(*(order_by or list(columns)))
+
+    report = []
+    for row in rows:
+        item = OrderedDict((name, row[lookup]) for lookup, name in columns.items())
+        item["facilities"] = row["facilities"]
+        item["total_minutes"] = row["total_minutes"] or 0
+        item["total_hours"] = round(item["total_minutes"] / 60.0, 2)
+        item["opens_at"] = format_minutes(row["opens_at"])
+        item["closes_at"] = format_minutes(row["closes_at"])
+        report.append(item)
+    return report
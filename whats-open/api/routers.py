@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+api/routers.py
+
+Send the read-only traffic of the API to read replicas.
+
+Every query goes to the primary ("default") database unless the current
+request was marked as safe to read from a replica by ReplicaMiddleware (see
+api/middleware.py). Management commands, the shell and anything else that
+runs outside of a request therefore keep using the primary.
+
+https://docs.djangoproject.com/en/2.0/topics/db/multi-db/#database-routers
+"""
+# Python std. lib. imports
+import random
+import threading
+from contextlib import contextmanager
+
+# Django Imports
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+_state = threading.local()
+
+
+def replicas():
+    """
+    Return the database aliases of the configured read replicas.
+    """
+    return getattr(settings, "DATABASE_REPLICAS", [])
+
+
+def reading_from_replica():
+    return getattr(_state, "replica", None)
+
+
+@contextmanager
+def replica_reads():
+    """
+    Route the reads made inside of the block to one of the replicas.
+
+    A single replica is picked for the whole block so that a request sees a
+    consistent view of the data.
+    """
+    previous = reading_from_replica()
+    _state.replica = random.choice(replicas()) if replicas() else None
+    try:
+        yield _state.replica
+    finally:
+        _state.replica = previous
+
+
+def pin_to_primary():
+    """
+    Send the rest of the reads in the current block to the primary.
+    """
+    _state.replica = None
+
+
+class ReplicaRouter(object):
+    """
+    Read from a replica inside of replica_reads(), everything else uses the
+    primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        return reading_from_replica() or DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        # Read your own writes for the rest of the request
+        pin_to_primary()
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        databases = {DEFAULT_DB_ALIAS} | set(replicas())
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas are migrated through replication
+        return db == DEFAULT_DB_ALIAS
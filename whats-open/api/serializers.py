@@ -8,15 +8,130 @@ can then be easily rendered into JSON, XML or other content types.
 
 http://www.django-rest-framework.org/api-guide/serializers
 """
+# Django Imports
+from django.utils import translation
+
 # Other Imports
 from rest_framework import serializers
-from taggit_serializer.serializers import TagListSerializerField
+from rest_framework_gis.fields import GeometryField
+from rest_framework_gis.serializers import GeoFeatureModelSerializer
 
 # App Imports
-from .models import Category, Facility, Schedule, OpenTime, Location, Alert
+from .fieldsets import SparseFieldsetsMixin
+from .hours import hours_summary, is_stored_language
+from .models import (
+    Alert,
+    Category,
+    Facility,
+    Location,
+    OpenStateContext,
+    OpenTime,
+    Schedule,
+    split_tags,
+)
+from .renderers import MessagePackRenderer
+
+
+class NativeTemporalMixin(object):
+    """
+    Leave datetimes and times as Python objects when the response is rendered
+    as MessagePack, which encodes them as integers instead of ISO 8601 strings.
+    """
+
+    TEMPORAL_FIELDS = (
+        serializers.DateTimeField,
+        serializers.DateField,
+        serializers.TimeField,
+    )
 
+    def get_fields(self):
+        fields = super(NativeTemporalMixin, self).get_fields()
+        request = self.context.get("request")
+        renderer = getattr(request, "accepted_renderer", None)
+        if isinstance(renderer, MessagePackRenderer):
+            for field in fields.values():
+                if isinstance(field, self.TEMPORAL_FIELDS):
+                    # A format of None skips the string conversion entirely
+                    field.format = None
+        return fields
 
-class AlertSerializer(serializers.ModelSerializer):
+
+class TagNamesField(serializers.Field):
+    """
+    Read a list of tag names from a denormalized tag_names column.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs["read_only"] = True
+        super(TagNamesField, self).__init__(**kwargs)
+
+    def to_representation(self, value):
+        return split_tags(value)
+
+
+class OpenStateMixin(object):
+    """
+    Read one attribute of a Facility's OpenState (see Facility.open_state).
+
+    Every facility in a response is evaluated at the same instant, the "now"
+    of the serializer context, through one OpenStateContext that evaluates
+    every schedule once. The earliest time any of them changes is kept in
+    the context as "next_change" so that the response can be cached until
+    then.
+    """
+
+    # The schedules that OpenStateContext.prefetch() needs, picked up by
+    # api/fieldsets.py. Their open times are loaded in one query for the
+    # schedules in effect, or taken from the nested schedules' prefetches.
+    related_lookups = ("main_schedule", "special_schedules")
+
+    def __init__(self, **kwargs):
+        kwargs["source"] = "*"
+        kwargs["read_only"] = True
+        super(OpenStateMixin, self).__init__(**kwargs)
+
+    def open_states(self):
+        """
+        Return the OpenStateContext of the serializer, the request's one
+        unless the context asks for another instant.
+        """
+        states = self.context.get("open_states")
+        if states is None:
+            states = OpenStateContext.current()
+            now = self.context.get("now")
+            if states is None or (now is not None and now != states.moment):
+                states = OpenStateContext(now)
+            self.context["open_states"] = states
+            self.context["now"] = states.moment
+
+        # Load the open times for every facility being serialized at once
+        root = self.root.instance
+        if root is not None and self.context.get("open_states_of") is not root:
+            self.context["open_states_of"] = root
+            states.prefetch([root] if isinstance(root, Facility) else root)
+        return states
+
+    def get_attribute(self, instance):
+        state = self.open_states().facility_state(instance)
+        for change in (state.closes_at, state.next_opens_at):
+            if change is not None:
+                next_change = self.context.get("next_change")
+                if next_change is None or change < next_change:
+                    self.context["next_change"] = change
+        return getattr(state, self.field_name)
+
+
+class OpenStateBooleanField(OpenStateMixin, serializers.BooleanField):
+    pass
+
+
+class OpenStateDateTimeField(OpenStateMixin, serializers.DateTimeField):
+    pass
+
+
+class AlertSerializer(
+    NativeTemporalMixin, SparseFieldsetsMixin, serializers.ModelSerializer
+):
     """
     """
 
@@ -25,7 +140,9 @@ class AlertSerializer(serializers.ModelSerializer):
         fields = "__all__"
 
 
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(
+    NativeTemporalMixin, SparseFieldsetsMixin, serializers.ModelSerializer
+):
     """
     """
 
@@ -36,7 +153,9 @@ class CategorySerializer(serializers.ModelSerializer):
         fields = "__all__"
 
 
-class LocationSerializer(serializers.ModelSerializer):
+class LocationSerializer(
+    NativeTemporalMixin, SparseFieldsetsMixin, serializers.ModelSerializer
+):
     """
     Serializer for the Location model.
     """
@@ -48,7 +167,9 @@ class LocationSerializer(serializers.ModelSerializer):
         fields = "__all__"
 
 
-class OpenTimeSerializer(serializers.ModelSerializer):
+class OpenTimeSerializer(
+    NativeTemporalMixin, SparseFieldsetsMixin, serializers.ModelSerializer
+):
     """
     Serializer for the OpenTime model.
     """
@@ -67,13 +188,20 @@ class OpenTimeSerializer(serializers.ModelSerializer):
         )
 
 
-class ScheduleSerializer(serializers.ModelSerializer):
+class ScheduleSerializer(
+    NativeTemporalMixin, SparseFieldsetsMixin, serializers.ModelSerializer
+):
     """
     Serializer for the Schedule model.
+
+    With ?hours=bitmap the open_times list is replaced by weekly_hours, a
+    fixed size base64 encoded bitmap of the hours the schedule is open, and
+    with ?hours=summary by hours_summary, a human readable summary of them.
     """
 
     # Append a serialized OpenTime object
     open_times = OpenTimeSerializer(many=True, read_only=True)
+    hours_summary = serializers.SerializerMethodField()
 
     class Meta:
         # Choose the model to be serialized
@@ -82,6 +210,8 @@ class ScheduleSerializer(serializers.ModelSerializer):
         fields = (
             "id",
             "open_times",
+            "weekly_hours",
+            "hours_summary",
             "modified",
             "name",
             "valid_start",
@@ -89,8 +219,37 @@ class ScheduleSerializer(serializers.ModelSerializer):
             "twenty_four_hours",
         )
 
+    def get_fields(self):
+        fields = super(ScheduleSerializer, self).get_fields()
+        request = self.context.get("request")
+        hours = request.query_params.get("hours") if request is not None else None
+        if hours == "bitmap":
+            fields.pop("open_times", None)
+            fields.pop("hours_summary", None)
+        elif hours == "summary":
+            fields.pop("open_times", None)
+            fields.pop("weekly_hours", None)
+            if "hours_summary" in fields and not is_stored_language(
+                translation.get_language()
+            ):
+                # Built from the open times, which are prefetched for it
+                fields["hours_summary"].related_lookups = ("open_times",)
+        else:
+            fields.pop("weekly_hours", None)
+            fields.pop("hours_summary", None)
+        return fields
+
+    def get_hours_summary(self, schedule):
+        if is_stored_language(translation.get_language()):
+            return schedule.hours_summary
+        # Only the summary in LANGUAGE_CODE is stored, others are built from
+        # the open times
+        return hours_summary(schedule.open_times.all(), schedule.twenty_four_hours)
 
-class FacilitySerializer(serializers.HyperlinkedModelSerializer):
+
+class FacilitySerializer(
+    NativeTemporalMixin, SparseFieldsetsMixin, serializers.HyperlinkedModelSerializer
+):
     """
     Serializer for the Facility model.
 
@@ -106,7 +265,11 @@ class FacilitySerializer(serializers.HyperlinkedModelSerializer):
     facility_location = LocationSerializer(many=False, read_only=True)
     main_schedule = ScheduleSerializer(many=False, read_only=True)
     special_schedules = ScheduleSerializer(many=True, read_only=True)
-    facility_product_tags = TagListSerializerField()
+    # Read from the denormalized column instead of through taggit
+    facility_product_tags = TagNamesField(source="tag_names")
+    is_open = OpenStateBooleanField()
+    closes_at = OpenStateDateTimeField()
+    next_opens_at = OpenStateDateTimeField()
 
     class Meta:
         # Choose the model to be serialized
@@ -125,5 +288,42 @@ class FacilitySerializer(serializers.HyperlinkedModelSerializer):
             "note",
             "main_schedule",
             "special_schedules",
+            "is_open",
+            "closes_at",
+            "next_opens_at",
             "modified",
         )
+
+
+class FacilityFeatureSerializer(GeoFeatureModelSerializer):
+    """
+    Serialize a Facility as a GeoJSON Feature for the map layer.
+
+    Only the properties needed to draw and filter a map marker are included,
+    the full Facility can be looked up with its slug (the feature id).
+    """
+
+    coordinate_location = GeometryField(
+        source="facility_location.coordinate_location", read_only=True
+    )
+    category = serializers.CharField(source="facility_category.name", read_only=True)
+    building = serializers.CharField(source="facility_location.building", read_only=True)
+    campus_region = serializers.CharField(
+        source="facility_location.campus_region", read_only=True
+    )
+    is_open = OpenStateBooleanField()
+
+    class Meta:
+        # Choose the model to be serialized
+        model = Facility
+        geo_field = "coordinate_location"
+        id_field = "slug"
+        # List the fields that we are serializing
+        fields = (
+            "slug",
+            "facility_name",
+            "category",
+            "building",
+            "campus_region",
+            "is_open",
+        )
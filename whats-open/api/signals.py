@@ -0,0 +1,234 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+api/signals.py
+
+Keep data that is derived from other models up to date when they change.
+Connected in ApiConfig.ready().
+
+https://docs.djangoproject.com/en/2.0/topics/signals/
+"""
+# Django Imports
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.dispatch import receiver
+
+# Other Imports
+from taggit.models import Tag
+
+# App Imports
+from .alerts import invalidate_alerts
+from .campuses import (
+    facility_campuses,
+    invalidate_campuses,
+    schedule_campuses,
+)
+from .models import Alert, Category, Facility, Location, OpenTime, Schedule
+from .rollups import refresh_open_hours, schedule_facility_ids
+
+
+@receiver(post_save, sender=Schedule)
+def schedule_saved(sender, instance, **kwargs):
+    """
+    Recompute the weekly hours bitmap and summary when a Schedule is saved
+    (ex. when it is toggled to a 24 hour schedule).
+    """
+    if instance.deferring_hours:
+        return
+    instance.update_hours()
+
+
+@receiver([post_save, post_delete], sender=OpenTime)
+def open_time_changed(sender, instance, **kwargs):
+    """
+    Recompute the weekly hours bitmap and summary of the Schedule an OpenTime
+    belongs to and drop the cached responses of the campuses that use it.
+    """
+    if Schedule.replacing_open_times(instance.schedule_id):
+        # Rebuilt once the schedule is saved (see Schedule.set_open_times)
+        return
+    # The schedule is gone when this is a cascading delete
+    schedule = Schedule.objects.filter(pk=instance.schedule_id).first()
+    if schedule is not None:
+        schedule.update_hours()
+        invalidate_campuses(schedule_campuses([schedule.pk]))
+
+
+@receiver([post_save, post_delete], sender=Alert)
+def alert_changed(sender, **kwargs):
+    """
+    Drop the cached alert responses (see api/caching.py).
+    """
+    invalidate_alerts()
+
+
+@receiver([post_save, post_delete], sender=Category)
+def category_changed(sender, **kwargs):
+    """
+    Drop the cached responses (see api/campuses.py) of every campus, a
+    Category is not tied to one.
+    """
+    invalidate_campuses()
+
+
+@receiver(pre_save, sender=Location)
+def location_saving(sender, instance, **kwargs):
+    # A Location can be moved to another campus
+    instance._old_campuses = set(
+        Location.objects.filter(pk=instance.pk).values_list("campus_region", flat=True)
+    )
+
+
+@receiver([post_save, post_delete], sender=Location)
+def location_changed(sender, instance, **kwargs):
+    """
+    Drop the cached responses of the campus a Location is (or was) on.
+    """
+    invalidate_campuses(
+        getattr(instance, "_old_campuses", set()) | {instance.campus_region}
+    )
+
+
+@receiver(pre_save, sender=Facility)
+def facility_saving(sender, instance, **kwargs):
+    # A Facility can be moved to a Location on another campus
+    instance._old_campuses = facility_campuses([instance.pk]) if instance.pk else set()
+
+
+@receiver([post_save, post_delete], sender=Facility)
+def facility_changed(sender, instance, **kwargs):
+    """
+    Drop the cached responses of the campus a Facility is (or was) on.
+    """
+    campuses = set(
+        Location.objects.filter(pk=instance.facility_location_id).values_list(
+            "campus_region", flat=True
+        )
+    )
+    invalidate_campuses(getattr(instance, "_old_campuses", set()) | campuses)
+
+
+@receiver(post_save, sender=Schedule)
+@receiver(pre_delete, sender=Schedule)
+def schedule_changed(sender, instance, **kwargs):
+    """
+    Drop the cached responses of the campuses of the facilities that use a
+    Schedule. Deletes are handled before the schedule is unlinked.
+    """
+    if instance.deferring_hours:
+        return
+    invalidate_campuses(schedule_campuses([instance.pk]))
+
+
+@receiver(m2m_changed, sender=Facility.special_schedules.through)
+def special_schedules_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Drop the cached responses of the campuses of facilities whose special
+    schedules were changed, from either side of the relation.
+    """
+    if action not in ("post_add", "post_remove", "pre_clear"):
+        return
+    if reverse:
+        # The instance is a Schedule and pk_set holds Facility ids
+        campuses = schedule_campuses([instance.pk]) | facility_campuses(pk_set or ())
+    else:
+        campuses = facility_campuses([instance.pk])
+    invalidate_campuses(campuses)
+
+
+@receiver(m2m_changed, sender=Facility.facility_product_tags.through)
+def facility_tags_changed(sender, instance, action, **kwargs):
+    """
+    Recompute the tag names of a Facility when tags are added or removed.
+    """
+    if action in ("post_add", "post_remove", "post_clear") and isinstance(
+        instance, Facility
+    ):
+        instance.update_tag_names()
+        invalidate_campuses(facility_campuses([instance.pk]))
+
+
+@receiver(post_save, sender=Tag)
+def tag_saved(sender, instance, created, **kwargs):
+    """
+    Recompute the tag names of every Facility with a Tag that was renamed.
+    """
+    if not created:
+        facilities = list(Facility.objects.filter(facility_product_tags=instance))
+        for facility in facilities:
+            facility.update_tag_names()
+        invalidate_campuses(facility_campuses([facility.pk for facility in facilities]))
+
+
+@receiver(pre_delete, sender=Tag)
+def tag_deleting(sender, instance, **kwargs):
+    # Remember who was tagged, the tagged items are deleted along with the tag
+    instance._facility_ids = list(
+        Facility.objects.filter(facility_product_tags=instance).values_list(
+            "pk", flat=True
+        )
+    )
+
+
+@receiver(post_delete, sender=Tag)
+def tag_deleted(sender, instance, **kwargs):
+    """
+    Recompute the tag names of every Facility that had a Tag that was deleted.
+    """
+    facility_ids = getattr(instance, "_facility_ids", [])
+    for facility in Facility.objects.filter(pk__in=facility_ids):
+        facility.update_tag_names()
+    invalidate_campuses(facility_campuses(facility_ids))
+
+
+@receiver(post_save, sender=Schedule)
+def schedule_open_hours(sender, instance, **kwargs):
+    """
+    Rebuild the open hours rollups (see api/rollups.py) of the facilities
+    that use a Schedule. Their rows go away with the schedule on delete.
+    """
+    if instance.deferring_hours:
+        return
+    refresh_open_hours(schedule_facility_ids([instance.pk]))
+
+
+@receiver([post_save, post_delete], sender=OpenTime)
+def open_time_open_hours(sender, instance, **kwargs):
+    if Schedule.replacing_open_times(instance.schedule_id):
+        return
+    refresh_open_hours(schedule_facility_ids([instance.schedule_id]))
+
+
+@receiver(post_save, sender=Facility)
+def facility_open_hours(sender, instance, **kwargs):
+    refresh_open_hours([instance.pk])
+
+
+@receiver(post_save, sender=Location)
+def location_open_hours(sender, instance, **kwargs):
+    refresh_open_hours(instance.facilities.values_list("pk", flat=True))
+
+
+@receiver(m2m_changed, sender=Facility.special_schedules.through)
+def special_schedules_open_hours(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Rebuild the open hours rollups of facilities whose special schedules were
+    changed, from either side of the relation.
+    """
+    if not reverse:
+        facility_ids = [instance.pk]
+    elif action == "pre_clear":
+        # The facilities are only known before the schedule is unlinked
+        instance._facility_ids = list(instance.facility_special.values_list("pk", flat=True))
+        return
+    elif action == "post_clear":
+        facility_ids = getattr(instance, "_facility_ids", [])
+    else:
+        facility_ids = pk_set or []
+    if action in ("post_add", "post_remove", "post_clear"):
+        refresh_open_hours(facility_ids)
@@ -0,0 +1,126 @@
+import datetime
+import threading
+import time
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from api.alerts import active_alerts, invalidate_alerts
+from api.models import Alert
+
+# Run with `python manage.py test api.tests.AlertTests`
+
+CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "throttle": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+}
+
+
+def alert(subject, start, end, now=None):
+    now = now or timezone.now()
+    return Alert.objects.create(
+        subject=subject,
+        body=subject,
+        urgency_tag="info",
+        start_datetime=now + datetime.timedelta(seconds=start),
+        end_datetime=now + datetime.timedelta(seconds=end),
+    )
+
+
+@override_settings(CACHES=CACHES)
+class ActiveAlertsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.now = timezone.now()
+        self.snow = alert("Snow day", -60, 600, self.now)
+        self.election = alert("Election", 300, 900, self.now)
+        alert("Spring break", -900, -60, self.now)
+
+    def test_active_set_and_next_boundary(self):
+        active = active_alerts(self.now)
+        self.assertEqual(active.ids, (self.snow.pk,))
+        self.assertEqual(active.next_boundary, self.election.start_datetime)
+
+    def test_cached_until_the_boundary(self):
+        active = active_alerts(self.now)
+        with self.assertNumQueries(0):
+            self.assertEqual(active_alerts(self.now + datetime.timedelta(seconds=299)), active)
+        later = active_alerts(self.now + datetime.timedelta(seconds=301))
+        self.assertEqual(later.ids, (self.snow.pk, self.election.pk))
+        self.assertNotEqual(later.state, active.state)
+        self.assertEqual(later.next_boundary, self.snow.end_datetime)
+
+    def test_changed_alert(self):
+        active = active_alerts(self.now)
+        self.snow.subject = "Snow days"
+        self.snow.save()
+        self.assertNotEqual(active_alerts(self.now).state, active.state)
+
+
+@override_settings(CACHES=CACHES)
+class LongPollTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def get(self, query=""):
+        return self.client.get("/api/alerts/?format=json" + query)
+
+    def test_etag(self):
+        alert("Snow day", -60, 600)
+        response = self.get()
+        self.assertEqual(response["ETag"], '"%s"' % active_alerts().state)
+        self.assertEqual([item["subject"] for item in response.json()], ["Snow day"])
+
+    def test_not_modified(self):
+        state = active_alerts().state
+        start = time.monotonic()
+        response = self.get("&wait=0.2&since=%s" % state)
+        self.assertEqual(response.status_code, 304)
+        self.assertGreaterEqual(time.monotonic() - start, 0.2)
+
+    def test_outdated_state(self):
+        response = self.get("&wait=5&since=outdated")
+        self.assertEqual(response.status_code, 200)
+
+    def test_wakes_up_at_the_boundary(self):
+        alert("Snow day", 0.3, 600)
+        state = active_alerts().state
+        response = self.get("&wait=5&since=%s" % state)
+        self.assertEqual([item["subject"] for item in response.json()], ["Snow day"])
+        self.assertNotEqual(response["ETag"], '"%s"' % state)
+
+    def test_wakes_up_on_a_change(self):
+        state = active_alerts().state
+        timer = threading.Timer(0.2, invalidate_alerts)
+        timer.start()
+        self.addCleanup(timer.cancel)
+        start = time.monotonic()
+        response = self.get("&wait=5&since=%s" % state)
+        self.assertEqual(response.status_code, 200)
+        self.assertLess(time.monotonic() - start, 2)
+
+    def test_invalid_wait(self):
+        for wait in ("soon", "-1", "nan", "inf"):
+            self.assertEqual(self.get("&wait=%s" % wait).status_code, 400)
+
+    @override_settings(ALERTS_MAX_WAITERS=1)
+    def test_too_many_waiters(self):
+        state = active_alerts().state
+        responses = []
+        waiter = threading.Thread(
+            target=lambda: responses.append(self.get("&wait=0.5&since=%s" % state))
+        )
+        waiter.start()
+        self.addCleanup(waiter.join)
+        time.sleep(0.1)
+        # The only spot is taken, so the current state is returned right away
+        start = time.monotonic()
+        response = self.get("&wait=5&since=%s" % state)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["ETag"], '"%s"' % state)
+        self.assertLess(time.monotonic() - start, 0.4)
+        waiter.join()
+        self.assertEqual(responses[0].status_code, 304)
@@ -0,0 +1,133 @@
+import asyncio
+import threading
+
+from django.test import SimpleTestCase
+
+from api.asgi import ThreadPoolASGIHandler, build_environ
+
+# Run with `python manage.py test api.tests.AsgiTests`
+# These call the ASGI handler directly with a fake WSGI application.
+
+
+def scope(path="/api/facilities/", method="GET", headers=(), client="10.0.0.1"):
+    return {
+        "type": "http",
+        "method": method,
+        "path": path,
+        "query_string": b"format=json",
+        "headers": [(b"accept", b"application/json")] + list(headers),
+        "client": (client, 50000),
+    }
+
+
+class FakeApplication(object):
+    """
+    A WSGI application that echoes the path back, optionally blocking until
+    `release` is set.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.status = "200 OK"
+        self.release = threading.Event()
+        self.release.set()
+
+    def __call__(self, environ, start_response):
+        self.calls += 1
+        self.release.wait(5)
+        start_response(self.status, [("Content-Type", "text/plain")])
+        return [environ["PATH_INFO"].encode("latin1")]
+
+
+def call(handler, *scopes):
+    """
+    Send requests for `scopes` at the same time and return the messages sent
+    back for each of them.
+    """
+    async def request(scope):
+        messages = []
+
+        async def receive():
+            return {"type": "http.request", "body": b""}
+
+        async def send(message):
+            messages.append(message)
+
+        await handler(scope, receive, send)
+        return messages
+
+    async def requests():
+        return await asyncio.gather(*(request(scope) for scope in scopes))
+
+    return asyncio.get_event_loop().run_until_complete(requests())
+
+
+class BuildEnvironTests(SimpleTestCase):
+    def test_build_environ(self):
+        environ = build_environ(
+            scope(headers=[(b"content-type", b"text/plain"), (b"x-tag", b"a"), (b"x-tag", b"b")]),
+            b"body",
+        )
+        self.assertEqual(environ["REQUEST_METHOD"], "GET")
+        self.assertEqual(environ["PATH_INFO"], "/api/facilities/")
+        self.assertEqual(environ["QUERY_STRING"], "format=json")
+        self.assertEqual(environ["CONTENT_TYPE"], "text/plain")
+        self.assertEqual(environ["HTTP_ACCEPT"], "application/json")
+        self.assertEqual(environ["HTTP_X_TAG"], "a,b")
+        self.assertEqual(environ["REMOTE_ADDR"], "10.0.0.1")
+        self.assertEqual(environ["wsgi.input"].read(), b"body")
+
+
+class ThreadPoolASGIHandlerTests(SimpleTestCase):
+    def setUp(self):
+        self.application = FakeApplication()
+        self.handler = ThreadPoolASGIHandler(self.application, 2)
+
+    def tearDown(self):
+        self.handler.executor.shutdown()
+
+    def test_response(self):
+        (messages,) = call(self.handler, scope())
+        self.assertEqual(messages[0]["status"], 200)
+        self.assertIn((b"content-type", b"text/plain"), messages[0]["headers"])
+        self.assertEqual(messages[1]["body"], b"/api/facilities/")
+
+    def test_identical_requests_are_coalesced(self):
+        self.application.release.clear()
+        loop = asyncio.get_event_loop()
+        loop.call_later(0.1, self.application.release.set)
+        responses = call(self.handler, scope(), scope(), scope())
+        self.assertEqual(self.application.calls, 1)
+        self.assertEqual(len({messages[1]["body"] for messages in responses}), 1)
+
+    def test_private_and_cold_requests_are_not_coalesced(self):
+        call(
+            self.handler,
+            scope(headers=[(b"cookie", b"sessionid=1")]),
+            scope(headers=[(b"cookie", b"sessionid=2")]),
+            scope(path="/api/schedules/"),
+            scope(path="/api/schedules/"),
+        )
+        self.assertEqual(self.application.calls, 4)
+
+    def test_clients_are_not_coalesced(self):
+        self.application.release.clear()
+        loop = asyncio.get_event_loop()
+        loop.call_later(0.1, self.application.release.set)
+        call(
+            self.handler,
+            scope(client="10.0.0.1"),
+            scope(client="10.0.0.2"),
+            scope(client="10.0.0.2", headers=[(b"x-forwarded-for", b"10.1.0.1")]),
+        )
+        self.assertEqual(self.application.calls, 3)
+
+    def test_errors_are_not_shared(self):
+        self.application.status = "429 Too Many Requests"
+        self.application.release.clear()
+        loop = asyncio.get_event_loop()
+        loop.call_later(0.1, self.application.release.set)
+        responses = call(self.handler, scope(), scope(), scope())
+        # The first request ran, every request waiting on it ran on its own
+        self.assertEqual(self.application.calls, 3)
+        self.assertEqual({messages[0]["status"] for messages in responses}, {429})
@@ -0,0 +1,87 @@
+from django.contrib.gis.geos import Point
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from api.models import Category, Facility, Location, Schedule
+
+# Run with `python manage.py test api.tests.BatchLookupTests`
+
+
+def facility(name, campus="fairfax"):
+    return Facility.objects.create(
+        facility_name=name,
+        facility_category=Category.objects.get_or_create(name="Dining")[0],
+        facility_location=Location.objects.create(
+            building="%s Hall" % name,
+            address="4400 University Dr",
+            campus_region=campus,
+            coordinate_location=Point(-77.3, 38.8),
+        ),
+        main_schedule=Schedule.objects.create(name="%s [Main]" % name),
+    )
+
+
+@override_settings(
+    CACHES={
+        "default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"},
+        "throttle": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    }
+)
+class BatchLookupTests(TestCase):
+    def setUp(self):
+        for name in ("Southside", "The Globe", "Ike's", "Burrito Bros"):
+            facility(name)
+        self.client = APIClient()
+
+    def slugs(self, response):
+        return [item["slug"] for item in response.json()["facilities"]]
+
+    def test_input_order_and_missing(self):
+        response = self.client.get(
+            "/api/facilities/batch/?slugs=the-globe,closed-for-good,southside,the-globe&format=json"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.slugs(response), ["the-globe", "southside"])
+        self.assertEqual(response.json()["missing"], ["closed-for-good"])
+
+    def test_post(self):
+        response = self.client.post(
+            "/api/facilities/batch/?format=json",
+            {"slugs": ["ikes", "burrito-bros"]},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.slugs(response), ["ikes", "burrito-bros"])
+        self.assertEqual(response.json()["missing"], [])
+
+    def test_one_lookup_for_every_slug(self):
+        def queries(slugs):
+            url = "/api/facilities/batch/?slugs=%s&format=json" % slugs
+            with CaptureQueriesContext(connection) as context:
+                self.client.get(url)
+            return len(context)
+
+        self.assertEqual(
+            queries("southside"), queries("southside,the-globe,ikes,burrito-bros")
+        )
+
+    def test_other_parameters_apply(self):
+        facility("Mason Pond", campus="arlington")
+        response = self.client.get(
+            "/api/facilities/batch/?slugs=mason-pond,southside&campus=arlington&fields=slug&format=json"
+        )
+        self.assertEqual(response.json()["facilities"], [{"slug": "mason-pond"}])
+        self.assertEqual(response.json()["missing"], ["southside"])
+
+    def test_invalid(self):
+        for url in ("/api/facilities/batch/?format=json", "/api/facilities/batch/?slugs=,&format=json"):
+            self.assertEqual(self.client.get(url).status_code, 400)
+        response = self.client.post(
+            "/api/facilities/batch/?format=json", {"slugs": [1, 2]}, format="json"
+        )
+        self.assertEqual(response.status_code, 400)
+        slugs = ",".join("facility-%d" % number for number in range(101))
+        response = self.client.get("/api/facilities/batch/?slugs=%s&format=json" % slugs)
+        self.assertEqual(response.status_code, 400)
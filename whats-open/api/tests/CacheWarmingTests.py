@@ -0,0 +1,194 @@
+import datetime
+import threading
+import time
+from unittest import mock
+
+from django.contrib.gis.geos import Point
+from django.core.cache import cache
+from django.db import transaction
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from api.caching import cached
+from api.models import Alert, Category, Facility, Location, Schedule
+from api.warming import pending, warm_cache
+
+# Run with `python manage.py test api.tests.CacheWarmingTests`
+
+CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "throttle": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+}
+
+
+def facility(name, campus):
+    return Facility.objects.create(
+        facility_name=name,
+        facility_category=Category.objects.get_or_create(name="Dining")[0],
+        facility_location=Location.objects.create(
+            building="%s Hall" % name,
+            address="4400 University Dr",
+            campus_region=campus,
+            coordinate_location=Point(-77.3, 38.8),
+        ),
+        main_schedule=Schedule.objects.create(name="%s [Main]" % name),
+    )
+
+
+def alert(subject, start, end):
+    return Alert.objects.create(
+        subject=subject,
+        body=subject,
+        urgency_tag="info",
+        start_datetime=timezone.now() + datetime.timedelta(seconds=start),
+        end_datetime=timezone.now() + datetime.timedelta(seconds=end),
+    )
+
+
+@override_settings(CACHES=CACHES)
+class SingleFlightTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_stale_value_while_locked(self):
+        cache.set("stale", "old")
+        cache.add("lock:key", "another worker")
+        self.assertEqual(cached("key", "stale", self.fail), "old")
+
+    def test_one_worker_computes(self):
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return "new", 60
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(cached("key", "stale", compute)))
+            for _ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(calls, [1])
+        self.assertEqual(results, ["new"] * 4)
+        self.assertEqual(cache.get("stale"), "new")
+
+    def test_only_releases_its_own_lock(self):
+        def compute():
+            # The lock expired and another worker took it in the meantime
+            cache.set("lock:key", "another worker")
+            return "new", 60
+
+        self.assertEqual(cached("key", "stale", compute), "new")
+        self.assertEqual(cache.get("lock:key"), "another worker")
+
+    @mock.patch("api.caching.MAX_WAIT_SECONDS", 0.2)
+    def test_bounded_wait_without_stale_value(self):
+        cache.add("lock:key", "another worker")
+        start = time.monotonic()
+        self.assertEqual(cached("key", "stale", lambda: ("new", 60)), "new")
+        self.assertLess(time.monotonic() - start, 2)
+        self.assertEqual(cache.get("lock:key"), "another worker")
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "api.tests.fakes.FakeRedisCache"}}
+)
+class RedisLockTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_releases_its_lock(self):
+        self.assertEqual(cached("key", "stale", lambda: ("new", 60)), "new")
+        self.assertIsNone(cache.get("lock:key"))
+
+    def test_only_releases_its_own_lock(self):
+        def compute():
+            # The lock expired and another worker took it in the meantime
+            cache.set("lock:key", "another worker")
+            return "new", 60
+
+        client = cache.get_client("lock:key")
+        self.assertEqual(cached("key", "stale", compute), "new")
+        # GET, ADD, SET by the other worker, two SETs of the value and the
+        # compare and delete in one round trip
+        self.assertEqual(client.round_trips, 6)
+        self.assertEqual(cache.get("lock:key"), "another worker")
+
+
+@override_settings(CACHES=CACHES)
+class AlertCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def subjects(self):
+        response = self.client.get("/api/alerts/?format=json")
+        return [item["subject"] for item in response.json()]
+
+    def test_saving_an_alert(self):
+        self.assertEqual(self.subjects(), [])
+        alert("Snow day", -60, 3600)
+        self.assertEqual(self.subjects(), ["Snow day"])
+
+
+@override_settings(CACHES=CACHES)
+class WarmCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        facility("Southside", "fairfax")
+
+    def test_warmed_responses_are_cached(self):
+        warmed = warm_cache()
+        self.assertEqual(len(warmed), 1 + 4 + 1)
+        with self.assertNumQueries(0):
+            self.client.get("/api/facilities/?format=json")
+            self.client.get("/api/facilities/?campus=fairfax&format=json")
+            self.client.get("/api/alerts/?format=json")
+
+    def test_only_changed_campuses(self):
+        warmed = warm_cache(["arlington"], alerts=False)
+        self.assertEqual(
+            [params for path, params, seconds in warmed],
+            [{"format": "json"}, {"format": "json", "campus": "arlington"}],
+        )
+
+
+@override_settings(CACHES=CACHES, CACHE_WARMING=True)
+class WarmAfterCommitTests(TransactionTestCase):
+    def setUp(self):
+        self.warmed = []
+        self.done = threading.Event()
+
+        def record(campuses, alerts):
+            self.warmed.append((campuses, alerts))
+            self.done.set()
+
+        patcher = mock.patch("api.warming.warm_in_background", record)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        # Changes that were rolled back stay pending
+        self.addCleanup(pending.__dict__.clear)
+
+    def test_one_warming_per_transaction(self):
+        # A new Category drops the responses of every campus
+        Category.objects.create(name="Dining")
+        self.done.wait(5)
+        self.done.clear()
+        del self.warmed[:]
+        with transaction.atomic():
+            facility("Southside", "fairfax")
+            alert("Snow day", -60, 3600)
+            self.assertEqual(self.warmed, [])
+        self.assertTrue(self.done.wait(5))
+        self.assertEqual(self.warmed, [({"fairfax"}, True)])
+
+    def test_rolled_back(self):
+        with self.assertRaises(ValueError), transaction.atomic():
+            facility("Southside", "fairfax")
+            raise ValueError
+        self.assertEqual(self.warmed, [])
@@ -0,0 +1,119 @@
+from django.contrib.gis.geos import Point
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from api.campuses import campus_version
+from api.models import Category, Facility, Location, OpenTime, Schedule
+
+# Run with `python manage.py test api.tests.CampusTests`
+
+CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+def facility(name, campus):
+    return Facility.objects.create(
+        facility_name=name,
+        facility_category=Category.objects.get_or_create(name="Dining")[0],
+        facility_location=Location.objects.create(
+            building="%s Hall" % name,
+            address="4400 University Dr",
+            campus_region=campus,
+            coordinate_location=Point(-77.3, 38.8),
+        ),
+        main_schedule=Schedule.objects.create(name="%s [Main]" % name),
+    )
+
+
+@override_settings(CACHES=CACHES)
+class CampusInvalidationTests(TestCase):
+    def setUp(self):
+        self.southside = facility("Southside", "fairfax")
+        self.spice = facility("Spice", "arlington")
+
+    def versions(self):
+        return campus_version("fairfax"), campus_version("arlington")
+
+    def assertInvalidates(self, change, fairfax, arlington):
+        before = self.versions()
+        change()
+        after = self.versions()
+        self.assertEqual(
+            (before[0] != after[0], before[1] != after[1]), (fairfax, arlington)
+        )
+
+    def test_open_time(self):
+        self.assertInvalidates(
+            lambda: OpenTime.objects.create(
+                schedule=self.spice.main_schedule,
+                start_day=0,
+                start_time="08:00",
+                end_day=0,
+                end_time="17:00",
+            ),
+            fairfax=False,
+            arlington=True,
+        )
+
+    def test_special_schedule(self):
+        special = Schedule.objects.create(name="Spring Break")
+        self.assertInvalidates(
+            lambda: self.southside.special_schedules.add(special),
+            fairfax=True,
+            arlington=False,
+        )
+        self.assertInvalidates(special.delete, fairfax=True, arlington=False)
+
+    def test_moving_a_location(self):
+        location = self.spice.facility_location
+
+        def move():
+            location.campus_region = "fairfax"
+            location.save()
+
+        self.assertInvalidates(move, fairfax=True, arlington=True)
+
+    def test_tags(self):
+        self.assertInvalidates(
+            lambda: self.southside.facility_product_tags.add("pizza"),
+            fairfax=True,
+            arlington=False,
+        )
+
+    def test_category(self):
+        self.assertInvalidates(
+            lambda: Category.objects.create(name="Coffee"), fairfax=True, arlington=True
+        )
+
+    def test_every_campus_version(self):
+        self.assertEqual(campus_version(), campus_version())
+        self.assertIn(campus_version("arlington"), campus_version())
+
+
+@override_settings(CACHES=CACHES)
+class CampusFacilityListTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        facility("Southside", "fairfax")
+        self.spice = facility("Spice", "arlington")
+
+    def names(self, query=""):
+        response = self.client.get("/api/facilities/?format=json&fields=facility_name" + query)
+        self.assertEqual(response.status_code, 200)
+        return [item["facility_name"] for item in response.json()]
+
+    def test_campus_filter(self):
+        self.assertEqual(self.names("&campus=arlington"), ["Spice"])
+        self.assertEqual(self.names(), ["Southside", "Spice"])
+
+    def test_invalid_campus(self):
+        response = self.client.get("/api/facilities/?campus=mars")
+        self.assertEqual(response.status_code, 400)
+
+    def test_cached_until_the_campus_changes(self):
+        self.assertEqual(self.names("&campus=arlington"), ["Spice"])
+        # A queryset update does not send any signals
+        Facility.objects.filter(pk=self.spice.pk).update(facility_name="Spice Lab")
+        self.assertEqual(self.names("&campus=arlington"), ["Spice"])
+        self.spice.refresh_from_db()
+        self.spice.save()
+        self.assertEqual(self.names("&campus=arlington"), ["Spice Lab"])
@@ -0,0 +1,142 @@
+import datetime
+import gzip
+import json
+import os
+import shutil
+import tempfile
+import threading
+from io import StringIO
+from unittest import mock
+
+from django.contrib.gis.geos import Point
+from django.core.management import call_command
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from api.export import KEEP_RELEASES, export_static, is_expired, pending, read_manifest
+from api.models import Alert, Category, Facility, Location, Schedule
+
+# Run with `python manage.py test api.tests.ExportTests`
+
+CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "throttle": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+}
+
+
+def facility(name, campus):
+    return Facility.objects.create(
+        facility_name=name,
+        facility_category=Category.objects.get_or_create(name="Dining")[0],
+        facility_location=Location.objects.create(
+            building="%s Hall" % name,
+            address="4400 University Dr",
+            campus_region=campus,
+            coordinate_location=Point(-77.3, 38.8),
+        ),
+        main_schedule=Schedule.objects.create(name="%s [Main]" % name),
+    )
+
+
+class ExportRootMixin(object):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        settings = override_settings(EXPORT_ROOT=self.root, CACHES=CACHES)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+
+class ExportTests(ExportRootMixin, TestCase):
+    def setUp(self):
+        super(ExportTests, self).setUp()
+        facility("Southside", "fairfax")
+        facility("Mason Pond", "prince william")
+        Alert.objects.create(
+            subject="Snow day",
+            body="Snow day",
+            urgency_tag="info",
+            start_datetime=timezone.now() - datetime.timedelta(hours=1),
+            end_datetime=timezone.now() + datetime.timedelta(hours=1),
+        )
+
+    def read(self, url):
+        path = os.path.join(self.root, "current", url.strip("/"), "index.json")
+        with open(path, "rb") as content, open(path + ".gz", "rb") as compressed:
+            data = content.read()
+            self.assertEqual(gzip.decompress(compressed.read()), data)
+        return json.loads(data.decode("utf-8"))
+
+    def test_same_as_the_api(self):
+        export_static()
+        client = APIClient()
+        for url, params, exported in (
+            ("/api/facilities/", {}, "/api/facilities/"),
+            (
+                "/api/facilities/",
+                {"campus": "prince william"},
+                "/api/facilities/campus/prince-william/",
+            ),
+            ("/api/facilities/southside/", {}, "/api/facilities/southside/"),
+            ("/api/categories/", {}, "/api/categories/"),
+            ("/api/locations/", {}, "/api/locations/"),
+            ("/api/alerts/", {}, "/api/alerts/"),
+        ):
+            response = client.get(url, dict(params, format="json"))
+            self.assertEqual(self.read(exported), response.json(), exported)
+        self.assertEqual(self.read("/api/facilities/campus/arlington/"), [])
+
+    def test_manifest(self):
+        export = export_static()
+        manifest = read_manifest()
+        self.assertEqual(manifest["files"], export.files)
+        # The alert ends first
+        self.assertLessEqual(export.expires_at, timezone.now() + datetime.timedelta(hours=1))
+        self.assertFalse(is_expired())
+        self.assertTrue(is_expired(now=export.expires_at))
+
+    def test_swapped_in_and_pruned(self):
+        exports = [export_static() for _ in range(KEEP_RELEASES + 2)]
+        self.assertEqual(
+            os.path.realpath(os.path.join(self.root, "current")),
+            os.path.realpath(exports[-1].path),
+        )
+        releases = os.listdir(os.path.join(self.root, "releases"))
+        self.assertEqual(len(releases), KEEP_RELEASES + 1)
+
+    def test_command(self):
+        out = StringIO()
+        call_command("export_static", stdout=out)
+        self.assertIn("Exported", out.getvalue())
+        out = StringIO()
+        call_command("export_static", if_expired=True, stdout=out)
+        self.assertEqual(out.getvalue(), "")
+
+
+@override_settings(STATIC_EXPORT=True)
+class ExportAfterCommitTests(ExportRootMixin, TransactionTestCase):
+    def setUp(self):
+        super(ExportAfterCommitTests, self).setUp()
+        self.exports = []
+        self.done = threading.Event()
+
+        def record():
+            self.exports.append(1)
+            self.done.set()
+
+        patcher = mock.patch("api.export.export_in_background", record)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(pending.__dict__.clear)
+
+    def test_one_export_per_transaction(self):
+        Category.objects.create(name="Dining")
+        self.assertTrue(self.done.wait(5))
+        del self.exports[:]
+        with transaction.atomic():
+            facility("Southside", "fairfax")
+            facility("Mason Pond", "prince william")
+            self.assertEqual(self.exports, [])
+        self.assertEqual(self.exports, [1])
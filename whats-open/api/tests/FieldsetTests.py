@@ -0,0 +1,154 @@
+from django.contrib.gis.geos import Point
+from django.core.cache import cache
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient, APIRequestFactory
+
+from api.fieldsets import FieldSet, parse_paths, related_lookups
+from api.models import Category, Facility, Location, OpenTime, Schedule
+from api.serializers import FacilitySerializer
+
+# Run with `python manage.py test api.tests.FieldsetTests`
+
+
+class ParsePathsTests(SimpleTestCase):
+    def test_parse(self):
+        self.assertEqual(
+            parse_paths("slug, main_schedule.name,,"),
+            {("slug",), ("main_schedule", "name")},
+        )
+
+
+class FieldSetTests(SimpleTestCase):
+    def test_defaults_include_everything(self):
+        fieldset = FieldSet()
+        self.assertTrue(fieldset.is_empty())
+        self.assertTrue(fieldset.includes(("main_schedule", "name")))
+        self.assertTrue(fieldset.expands(("main_schedule",)))
+
+    def test_fields(self):
+        fieldset = FieldSet(fields=parse_paths("slug,main_schedule.open_times"))
+        self.assertTrue(fieldset.includes(("slug",)))
+        # Parents of a requested field are kept so that it can be reached
+        self.assertTrue(fieldset.includes(("main_schedule",)))
+        # Everything underneath a requested field is kept
+        self.assertTrue(fieldset.includes(("main_schedule", "open_times", "end_day")))
+        self.assertFalse(fieldset.includes(("main_schedule", "name")))
+        self.assertFalse(fieldset.includes(("facility_name",)))
+
+    def test_exclude(self):
+        fieldset = FieldSet(exclude=parse_paths("facility_location.coordinate_location"))
+        self.assertTrue(fieldset.includes(("facility_location", "building")))
+        self.assertFalse(
+            fieldset.includes(("facility_location", "coordinate_location"))
+        )
+
+    def test_expand(self):
+        fieldset = FieldSet(expand=parse_paths("main_schedule"))
+        self.assertTrue(fieldset.expands(("main_schedule",)))
+        self.assertTrue(fieldset.expands(("main_schedule", "open_times")))
+        self.assertFalse(fieldset.expands(("special_schedules",)))
+        self.assertFalse(FieldSet(expand=set()).expands(("main_schedule",)))
+
+
+CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+def facility_serializer(query):
+    request = APIRequestFactory().get("/api/facilities/", query)
+    request.query_params = request.GET
+    return FacilitySerializer(context={"fieldset": FieldSet.from_request(request)})
+
+
+class RelatedLookupsTests(SimpleTestCase):
+    def test_full_payload(self):
+        select, prefetch = related_lookups(facility_serializer({}), Facility)
+        self.assertIn("main_schedule", select)
+        self.assertIn("facility_location", select)
+        self.assertIn("main_schedule__open_times", prefetch)
+        self.assertIn("special_schedules", prefetch)
+
+    def test_fields(self):
+        self.assertEqual(
+            related_lookups(facility_serializer({"fields": "slug"}), Facility), ([], [])
+        )
+        select, prefetch = related_lookups(
+            facility_serializer({"fields": "slug,main_schedule.name"}), Facility
+        )
+        self.assertEqual(select, ["main_schedule"])
+        self.assertNotIn("main_schedule__open_times", prefetch)
+        self.assertNotIn("special_schedules", prefetch)
+
+    def test_collapsed(self):
+        select, prefetch = related_lookups(facility_serializer({"expand": ""}), Facility)
+        self.assertNotIn("main_schedule", select)
+        self.assertNotIn("main_schedule__open_times", prefetch)
+
+
+@override_settings(CACHES=CACHES)
+class SparseFieldsetEndpointTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        for name in ("Southside", "Ike's"):
+            schedule = Schedule.objects.create(name="%s [Main]" % name)
+            OpenTime.objects.create(
+                schedule=schedule,
+                start_day=0,
+                start_time="08:00",
+                end_day=0,
+                end_time="17:00",
+            )
+            facility = Facility.objects.create(
+                facility_name=name,
+                facility_category=Category.objects.get_or_create(name="Dining")[0],
+                facility_location=Location.objects.create(
+                    building="%s Hall" % name,
+                    address="4400 University Dr",
+                    campus_region="fairfax",
+                    coordinate_location=Point(-77.3, 38.8),
+                ),
+                main_schedule=schedule,
+            )
+            facility.special_schedules.add(
+                Schedule.objects.create(name="%s [Break]" % name)
+            )
+
+    def get(self, query):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/facilities/", dict(query, format="json"))
+        self.assertEqual(response.status_code, 200)
+        return response.json(), [query["sql"] for query in queries]
+
+    def test_fields(self):
+        data, queries = self.get({"fields": "slug,main_schedule.name"})
+        self.assertEqual([set(item) for item in data], [{"slug", "main_schedule"}] * 2)
+        self.assertEqual(set(data[0]["main_schedule"]), {"name"})
+
+    def test_exclude(self):
+        data, queries = self.get(
+            {"exclude": "facility_location.coordinate_location,special_schedules"}
+        )
+        self.assertNotIn("special_schedules", data[0])
+        self.assertNotIn("coordinate_location", data[0]["facility_location"])
+        self.assertIn("building", data[0]["facility_location"])
+
+    def test_expand(self):
+        data, queries = self.get({"expand": "main_schedule"})
+        self.assertIsInstance(data[0]["main_schedule"], dict)
+        self.assertIsInstance(data[0]["facility_location"], int)
+        self.assertEqual(len(data[0]["special_schedules"]), 1)
+        self.assertIsInstance(data[0]["special_schedules"][0], int)
+
+    def test_fewer_queries(self):
+        # The facilities joined with their main schedule, location and
+        # category, then the open times of the main schedules, the special
+        # schedules and their open times
+        with self.assertNumQueries(4):
+            self.get({})
+        # Only the facilities themselves, without any related lookup
+        with self.assertNumQueries(1):
+            slugs, queries = self.get({"fields": "slug"})
+        self.assertEqual([set(item) for item in slugs], [{"slug"}] * 2)
+        self.assertNotIn("JOIN", queries[0])
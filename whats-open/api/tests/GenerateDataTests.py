@@ -0,0 +1,42 @@
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from api.models import Alert, Facility, OpenTime, Schedule
+
+# Run with `python manage.py test api.tests.GenerateDataTests`
+
+
+def generate(**options):
+    call_command("generate_data", stdout=StringIO(), **options)
+    return list(
+        Facility.objects.order_by("slug").values_list(
+            "slug", "facility_location__building", "main_schedule__weekly_hours"
+        )
+    )
+
+
+class GenerateDataTests(TestCase):
+    def test_counts(self):
+        generate(facilities=20, seed=1)
+        self.assertEqual(Facility.objects.count(), 20)
+        self.assertEqual(Alert.objects.count(), 4)
+        self.assertTrue(OpenTime.objects.exists())
+        # Every schedule gets its weekly hours without going through save()
+        self.assertFalse(Schedule.objects.filter(weekly_hours="").exists())
+        self.assertTrue(all(f.facility_product_tags.exists() for f in Facility.objects.all()))
+
+    def test_same_seed_same_data(self):
+        first = generate(facilities=20, seed=1)
+        self.assertEqual(generate(facilities=20, seed=1, clear=True), first)
+        self.assertNotEqual(generate(facilities=20, seed=2, clear=True), first)
+
+    def test_adds_to_existing_data(self):
+        generate(facilities=10, seed=1)
+        generate(facilities=10, seed=1)
+        self.assertEqual(Facility.objects.count(), 20)
+
+    def test_scale_limits(self):
+        with self.assertRaises(CommandError):
+            call_command("generate_data", facilities=5)
@@ -0,0 +1,168 @@
+import datetime
+
+from django.contrib.gis.geos import Point
+from django.core.cache import cache
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import translation
+from rest_framework.test import APIClient
+
+from api.hours import hours_summary
+from api.models import Category, Facility, Location, OpenTime, Schedule
+
+# Run with `python manage.py test api.tests.HoursSummaryTests`
+
+
+def open_time(start_day, start, end_day, end, schedule=None):
+    return OpenTime(
+        schedule=schedule,
+        start_day=start_day,
+        start_time=datetime.time(*start),
+        end_day=end_day,
+        end_time=datetime.time(*end),
+    )
+
+
+WEEKDAYS = [open_time(day, (7, 0), day, (21, 0)) for day in range(5)]
+
+
+@override_settings(LANGUAGE_CODE="en-us")
+class HoursSummaryTests(SimpleTestCase):
+    def test_summary(self):
+        rows = WEEKDAYS + [open_time(5, (10, 0), 6, (2, 0))]
+        self.assertEqual(
+            hours_summary(rows), "Mon–Fri 7 a.m. – 9 p.m.; Sat 10 a.m. – 2 a.m."
+        )
+
+    def test_every_day(self):
+        rows = [open_time(day, (8, 30), day, (23, 59)) for day in range(7)]
+        self.assertEqual(hours_summary(rows), "Daily 8:30 a.m. – midnight")
+        self.assertEqual(hours_summary([], True), "Daily Open 24 hours")
+
+    def test_closed(self):
+        self.assertEqual(hours_summary([]), "Closed")
+
+    def test_localized(self):
+        with translation.override("de"):
+            self.assertEqual(hours_summary(WEEKDAYS), "Mo–Fr 07:00 – 21:00")
+
+
+@override_settings(
+    LANGUAGE_CODE="en-us",
+    CACHES={
+        "default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"},
+        "throttle": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    },
+)
+class StoredHoursSummaryTests(TestCase):
+    def setUp(self):
+        self.schedule = Schedule.objects.create(name="Southside [Main]")
+
+    def summary(self):
+        return Schedule.objects.get(pk=self.schedule.pk).hours_summary
+
+    def test_kept_up_to_date(self):
+        self.assertEqual(self.summary(), "Closed")
+        open_time(0, (7, 0), 0, (21, 0), self.schedule).save()
+        self.assertEqual(self.summary(), "Mon 7 a.m. – 9 p.m.")
+        self.schedule.twenty_four_hours = True
+        self.schedule.save()
+        self.assertEqual(self.summary(), "Daily Open 24 hours")
+
+    def test_stored_in_language_code(self):
+        with translation.override("de"):
+            open_time(0, (7, 0), 0, (21, 0), self.schedule).save()
+        self.assertEqual(self.summary(), "Mon 7 a.m. – 9 p.m.")
+
+    def test_served_with_hours_summary(self):
+        for row in WEEKDAYS:
+            open_time(
+                row.start_day, (7, 0), row.end_day, (21, 0), self.schedule
+            ).save()
+        client = APIClient()
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get("/api/schedules/?hours=summary&format=json")
+        # The stored summary is served without loading any open times
+        self.assertFalse([q for q in queries if "api_opentime" in q["sql"]])
+        schedule = response.json()[0]
+        self.assertEqual(schedule["hours_summary"], "Mon–Fri 7 a.m. – 9 p.m.")
+        self.assertNotIn("open_times", schedule)
+        self.assertNotIn("weekly_hours", schedule)
+
+        schedule = client.get("/api/schedules/?format=json").json()[0]
+        self.assertNotIn("hours_summary", schedule)
+
+
+@override_settings(
+    LANGUAGE_CODE="en-us",
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+)
+class LocalizedHoursSummaryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        schedule = Schedule.objects.create(name="Southside [Main]")
+        for row in WEEKDAYS:
+            open_time(row.start_day, (7, 0), row.end_day, (21, 0), schedule).save()
+        Facility.objects.create(
+            facility_name="Southside",
+            facility_category=Category.objects.create(name="Dining"),
+            facility_location=Location.objects.create(
+                building="Southside",
+                address="4400 University Dr",
+                campus_region="fairfax",
+                coordinate_location=Point(-77.3, 38.8),
+            ),
+            main_schedule=schedule,
+        )
+        self.client = APIClient()
+
+    def summary(self, path, language=None):
+        headers = {"HTTP_ACCEPT_LANGUAGE": language} if language else {}
+        response = self.client.get(path, **headers)
+        self.assertEqual(response.status_code, 200)
+        schedule = response.json()[0]
+        return schedule.get("main_schedule", schedule)["hours_summary"]
+
+    def test_schedules(self):
+        path = "/api/schedules/?hours=summary&format=json"
+        self.assertEqual(self.summary(path, "de"), "Mo–Fr 07:00 – 21:00")
+        self.assertEqual(self.summary(path), "Mon–Fri 7 a.m. – 9 p.m.")
+
+    def test_cached_per_language(self):
+        path = "/api/facilities/?hours=summary&format=json&campus=fairfax"
+        self.assertEqual(self.summary(path), "Mon–Fri 7 a.m. – 9 p.m.")
+        self.assertEqual(self.summary(path, "de"), "Mo–Fr 07:00 – 21:00")
+        self.assertEqual(self.summary(path, "en-us"), "Mon–Fri 7 a.m. – 9 p.m.")
+        self.assertEqual(self.summary(path, "de"), "Mo–Fr 07:00 – 21:00")
+
+    def test_queries_for_other_languages(self):
+        def queries(path):
+            cache.clear()
+            with CaptureQueriesContext(connection) as captured:
+                self.summary(path, "de")
+            return len(captured)
+
+        summer = Schedule.objects.create(name="Southside [Summer]")
+        open_time(5, (10, 0), 5, (14, 0), summer).save()
+        Facility.objects.get().special_schedules.add(summer)
+        paths = (
+            "/api/schedules/?hours=summary&format=json",
+            "/api/facilities/?hours=summary&format=json",
+        )
+        before = [queries(path) for path in paths]
+        location = Location.objects.get()
+        for number in range(3):
+            schedule = Schedule.objects.create(name="Kiosk %d [Main]" % number)
+            open_time(0, (7, 0), 0, (21, 0), schedule).save()
+            special = Schedule.objects.create(name="Kiosk %d [Finals]" % number)
+            open_time(1, (7, 0), 1, (21, 0), special).save()
+            kiosk = Facility.objects.create(
+                facility_name="Kiosk %d" % number,
+                facility_category=Category.objects.get(),
+                facility_location=location,
+                main_schedule=schedule,
+            )
+            kiosk.special_schedules.add(special)
+        # The summaries are built from prefetched open times
+        self.assertEqual([queries(path) for path in paths], before)
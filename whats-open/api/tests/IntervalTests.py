@@ -0,0 +1,210 @@
+import base64
+import datetime
+
+from django.test import SimpleTestCase
+
+from api.intervals import (
+    GAP,
+    INVERTED,
+    OVERLAP,
+    ZERO_LENGTH,
+    Interval,
+    MINUTES_PER_DAY,
+    MINUTES_PER_WEEK,
+    SLOTS_PER_WEEK,
+    HoursGroup,
+    canonical_rows,
+    check_open_times,
+    daily_hours,
+    open_time_intervals,
+    weekly_bitmap,
+    weekly_hours,
+)
+from api.models import OpenTime
+
+# Run with `python manage.py test api.tests.IntervalTests`
+# These only use unsaved OpenTime objects so no database rows are needed.
+
+
+def open_time(start_day, start, end_day, end):
+    return OpenTime(
+        start_day=start_day,
+        start_time=datetime.time(*start),
+        end_day=end_day,
+        end_time=datetime.time(*end),
+    )
+
+
+def kinds(conflicts):
+    return sorted(conflict.kind for conflict in conflicts)
+
+
+class OpenTimeIntervalsTests(SimpleTestCase):
+    def test_same_day(self):
+        intervals = open_time_intervals(open_time(0, (8, 0), 0, (17, 0)))
+        self.assertEqual(intervals, [Interval(8 * 60, 17 * 60 + 1)])
+
+    def test_wrap_around(self):
+        intervals = open_time_intervals(open_time(6, (22, 0), 0, (2, 0)))
+        self.assertEqual(
+            intervals,
+            [
+                Interval(6 * MINUTES_PER_DAY + 22 * 60, MINUTES_PER_WEEK),
+                Interval(0, 2 * 60 + 1),
+            ],
+        )
+
+    def test_inverted(self):
+        self.assertEqual(open_time_intervals(open_time(2, (22, 0), 2, (2, 0))), [])
+
+
+class CheckOpenTimesTests(SimpleTestCase):
+    def test_clean_schedule(self):
+        rows = [open_time(day, (8, 0), day, (17, 0)) for day in range(5)]
+        self.assertEqual(check_open_times(rows), [])
+
+    def test_overlap(self):
+        first = open_time(0, (8, 0), 0, (12, 0))
+        second = open_time(0, (11, 0), 0, (17, 0))
+        conflicts = check_open_times([first, second])
+        self.assertEqual(kinds(conflicts), [OVERLAP])
+        self.assertEqual(conflicts[0].open_times, [first, second])
+        self.assertEqual(conflicts[0].interval, Interval(11 * 60, 12 * 60 + 1))
+
+    def test_touching_rows_do_not_overlap(self):
+        rows = [open_time(0, (8, 0), 0, (11, 59)), open_time(0, (12, 0), 0, (17, 0))]
+        self.assertEqual(check_open_times(rows), [])
+
+    def test_inverted_and_zero_length(self):
+        rows = [open_time(1, (9, 0), 1, (8, 0)), open_time(2, (9, 0), 2, (9, 0))]
+        self.assertEqual(kinds(check_open_times(rows)), [INVERTED, ZERO_LENGTH])
+
+    def test_short_gap(self):
+        rows = [open_time(0, (8, 0), 0, (11, 55)), open_time(0, (12, 0), 0, (17, 0))]
+        conflicts = check_open_times(rows)
+        self.assertEqual(kinds(conflicts), [GAP])
+        self.assertEqual(conflicts[0].interval, Interval(11 * 60 + 56, 12 * 60))
+
+
+class CanonicalRowsTests(SimpleTestCase):
+    def test_merges_overlapping_rows(self):
+        rows = [
+            open_time(0, (8, 0), 0, (12, 0)),
+            open_time(0, (11, 0), 0, (17, 0)),
+            open_time(0, (9, 0), 0, (10, 0)),
+        ]
+        self.assertEqual(
+            canonical_rows(rows),
+            [(0, datetime.time(8, 0), 0, datetime.time(17, 0))],
+        )
+
+    def test_drops_inverted_rows(self):
+        rows = [open_time(0, (8, 0), 0, (17, 0)), open_time(1, (9, 0), 1, (8, 0))]
+        self.assertEqual(
+            canonical_rows(rows),
+            [(0, datetime.time(8, 0), 0, datetime.time(17, 0))],
+        )
+
+    def test_keeps_wrap_around_row(self):
+        rows = [open_time(6, (22, 0), 0, (2, 0))]
+        self.assertEqual(
+            canonical_rows(rows),
+            [(6, datetime.time(22, 0), 0, datetime.time(2, 0))],
+        )
+
+    def test_joins_rows_across_the_week_boundary(self):
+        rows = [open_time(6, (20, 0), 6, (23, 59, 59)), open_time(0, (0, 0), 0, (1, 0))]
+        self.assertEqual(
+            canonical_rows(rows),
+            [(6, datetime.time(20, 0), 0, datetime.time(1, 0))],
+        )
+
+    def test_preserves_end_seconds(self):
+        rows = [open_time(4, (7, 0), 4, (23, 59, 59))]
+        self.assertEqual(
+            canonical_rows(rows),
+            [(4, datetime.time(7, 0), 4, datetime.time(23, 59, 59))],
+        )
+
+
+def slots(bitmap):
+    return [
+        slot
+        for slot in range(SLOTS_PER_WEEK)
+        if (bitmap[slot // 8] >> (7 - slot % 8)) & 1
+    ]
+
+
+class WeeklyBitmapTests(SimpleTestCase):
+    def test_size(self):
+        self.assertEqual(len(weekly_bitmap([])), 84)
+        self.assertEqual(len(weekly_hours([])), 112)
+
+    def test_only_whole_slots_are_set(self):
+        # Monday 8:10 through 9:00 only fully covers 8:15 - 8:30 - 8:45
+        bitmap = weekly_bitmap([Interval(8 * 60 + 10, 9 * 60 + 1)])
+        self.assertEqual(slots(bitmap), [33, 34, 35])
+
+    def test_touching_intervals_fill_a_slot(self):
+        bitmap = weekly_bitmap([Interval(480, 485), Interval(485, 495)])
+        self.assertEqual(slots(bitmap), [32])
+
+    def test_wrap_around(self):
+        encoded = weekly_hours([open_time(6, (23, 0), 0, (0, 59))])
+        self.assertEqual(
+            slots(base64.b64decode(encoded)), [0, 1, 2, 3] + list(range(668, 672))
+        )
+
+    def test_twenty_four_hours(self):
+        encoded = weekly_hours([], twenty_four_hours=True)
+        self.assertEqual(base64.b64decode(encoded), b"\xff" * 84)
+
+
+class DailyHoursTests(SimpleTestCase):
+    def test_groups_consecutive_days(self):
+        rows = [open_time(day, (7, 0), day, (21, 0)) for day in range(5)]
+        rows.append(open_time(5, (10, 0), 5, (18, 0)))
+        self.assertEqual(
+            daily_hours(rows),
+            [
+                HoursGroup(0, 4, ((7 * 60, 21 * 60),)),
+                HoursGroup(5, 5, ((10 * 60, 18 * 60),)),
+            ],
+        )
+
+    def test_past_midnight(self):
+        # Open every night until 2:00, Sunday's running into Monday morning
+        rows = [open_time(day, (20, 0), (day + 1) % 7, (2, 0)) for day in range(7)]
+        self.assertEqual(
+            daily_hours(rows), [HoursGroup(0, 6, ((20 * 60, 26 * 60),))]
+        )
+
+    def test_around_the_clock(self):
+        # Friday evening through Monday morning
+        rows = [open_time(4, (20, 0), 0, (8, 30))]
+        self.assertEqual(
+            daily_hours(rows),
+            [
+                HoursGroup(0, 0, ((0, 8 * 60 + 30),)),
+                HoursGroup(4, 4, ((20 * 60, MINUTES_PER_DAY),)),
+                HoursGroup(5, 6, ((0, MINUTES_PER_DAY),)),
+            ],
+        )
+
+    def test_twenty_four_hours(self):
+        self.assertEqual(
+            daily_hours([], twenty_four_hours=True),
+            [HoursGroup(0, 6, ((0, MINUTES_PER_DAY),))],
+        )
+        self.assertEqual(daily_hours([]), [])
+
+    def test_split_hours(self):
+        rows = [
+            open_time(2, (7, 30), 2, (11, 59)),
+            open_time(2, (12, 0), 2, (14, 0)),
+            open_time(2, (17, 0), 2, (23, 59, 59)),
+        ]
+        self.assertEqual(
+            daily_hours(rows),
+            [HoursGroup(2, 2, ((7 * 60 + 30, 14 * 60), (17 * 60, MINUTES_PER_DAY)))],
+        )
@@ -0,0 +1,49 @@
+from django.test import SimpleTestCase
+
+from api.maps import cluster_features, in_extent
+
+# Run with `python manage.py test api.tests.MapTests`
+# These work on plain GeoJSON features so no database rows are needed.
+
+
+def feature(slug, x, y, is_open=True):
+    return {
+        "id": slug,
+        "type": "Feature",
+        "geometry": {"type": "Point", "coordinates": [x, y]},
+        "properties": {"facility_name": slug, "is_open": is_open},
+    }
+
+
+class ClusterFeaturesTests(SimpleTestCase):
+    def setUp(self):
+        self.features = [
+            feature("southside", -77.3075, 38.8297),
+            feature("jc", -77.3057, 38.8298, is_open=False),
+            feature("arlington", -77.1021, 38.8850),
+        ]
+
+    def test_nearby_features_are_clustered(self):
+        clustered = cluster_features(self.features, 12)
+        self.assertEqual(len(clustered), 2)
+        cluster = clustered[0]["properties"]
+        self.assertTrue(cluster["cluster"])
+        self.assertEqual(cluster["count"], 2)
+        self.assertEqual(cluster["open_count"], 1)
+        self.assertEqual(cluster["facilities"], ["southside", "jc"])
+        self.assertEqual(
+            clustered[0]["geometry"]["coordinates"], [-77.3066, (38.8297 + 38.8298) / 2]
+        )
+
+    def test_single_features_are_kept(self):
+        clustered = cluster_features(self.features, 12)
+        self.assertIs(clustered[1], self.features[2])
+
+    def test_high_zoom_splits_clusters(self):
+        self.assertEqual(cluster_features(self.features, 16), self.features)
+
+
+class InExtentTests(SimpleTestCase):
+    def test_in_extent(self):
+        features = [feature("inside", 1, 1), feature("outside", 3, 1)]
+        self.assertEqual(in_extent(features, (0, 0, 2, 2)), features[:1])
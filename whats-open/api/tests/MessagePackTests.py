@@ -0,0 +1,119 @@
+import datetime
+
+import msgpack
+from django.contrib.auth.models import Permission, User
+from django.contrib.gis.geos import Point
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime, parse_time
+from rest_framework.test import APIClient
+
+from api.models import Category, Facility, Location, OpenTime, Schedule
+
+# Run with `python manage.py test api.tests.MessagePackTests`
+
+CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+def unpack(response):
+    return msgpack.unpackb(response.content, raw=False, timestamp=3)
+
+
+def seconds(time):
+    return time.hour * 3600 + time.minute * 60 + time.second
+
+
+@override_settings(CACHES=CACHES)
+class MessagePackRendererTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        schedule = Schedule.objects.create(name="Southside [Main]")
+        OpenTime.objects.create(
+            schedule=schedule,
+            start_day=0,
+            start_time="07:30",
+            end_day=1,
+            end_time="01:15:30",
+        )
+        Facility.objects.create(
+            facility_name="Southside",
+            facility_category=Category.objects.create(name="Dining"),
+            facility_location=Location.objects.create(
+                building="Southside",
+                address="4400 University Dr",
+                campus_region="fairfax",
+                coordinate_location=Point(-77.3, 38.8),
+            ),
+            main_schedule=schedule,
+        )
+        self.client = APIClient()
+
+    def test_matches_json(self):
+        packed = self.client.get("/api/facilities/", {"format": "msgpack"})
+        self.assertEqual(packed.status_code, 200)
+        self.assertEqual(packed["Content-Type"], "application/msgpack")
+        data = unpack(packed)
+        expected = self.client.get("/api/facilities/", {"format": "json"}).json()
+        self.assertEqual(len(data), len(expected))
+        self.assertEqual(data[0]["slug"], expected[0]["slug"])
+
+        # Datetimes are timestamps
+        modified = data[0]["modified"]
+        self.assertIsInstance(modified, datetime.datetime)
+        self.assertEqual(modified, parse_datetime(expected[0]["modified"]))
+
+        # Times of day are seconds since midnight
+        open_time = data[0]["main_schedule"]["open_times"][0]
+        expected_time = expected[0]["main_schedule"]["open_times"][0]
+        self.assertEqual(open_time["start_time"], 7 * 3600 + 30 * 60)
+        self.assertEqual(open_time["end_time"], 3600 + 15 * 60 + 30)
+        for name in ("start_time", "end_time"):
+            self.assertEqual(open_time[name], seconds(parse_time(expected_time[name])))
+
+    def test_accept_header(self):
+        response = self.client.get("/api/facilities/", HTTP_ACCEPT="application/msgpack")
+        self.assertEqual(response["Content-Type"], "application/msgpack")
+        self.assertEqual(unpack(response)[0]["facility_name"], "Southside")
+
+
+class MessagePackParserTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user("editor", password="editor")
+        user.user_permissions.add(Permission.objects.get(codename="add_schedule"))
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+
+    def post(self, body):
+        return self.client.post(
+            "/api/schedules/?format=json", body, content_type="application/msgpack"
+        )
+
+    def test_create(self):
+        valid_start = timezone.now().replace(microsecond=0)
+        valid_end = valid_start + datetime.timedelta(days=7)
+        response = self.post(
+            msgpack.packb(
+                {
+                    "name": "Finals Week",
+                    "valid_start": valid_start,
+                    "valid_end": valid_end,
+                    "twenty_four_hours": True,
+                },
+                use_bin_type=True,
+                datetime=True,
+            )
+        )
+        self.assertEqual(response.status_code, 201)
+        schedule = Schedule.objects.get(name="Finals Week")
+        self.assertEqual(schedule.valid_start, valid_start)
+        self.assertEqual(schedule.valid_end, valid_end)
+        self.assertTrue(schedule.twenty_four_hours)
+        self.assertEqual(parse_datetime(response.json()["valid_start"]), valid_start)
+
+    def test_malformed(self):
+        # A map that says it holds two entries but ends after one key
+        response = self.post(b"\x82\xa4name")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("MessagePack parse error", response.json()["detail"])
+        self.assertFalse(Schedule.objects.exists())
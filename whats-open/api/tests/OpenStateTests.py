@@ -0,0 +1,360 @@
+import datetime
+
+from django.contrib.gis.geos import Point
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from api.intervals import (
+    MINUTES_PER_DAY,
+    Interval,
+    exact_intervals,
+    exact_open_state,
+    open_state,
+    schedule_intervals,
+    tick_of_week,
+)
+from api.models import (
+    Category,
+    Facility,
+    Location,
+    OpenStateContext,
+    OpenTime,
+    Schedule,
+)
+from benchmarks.open_state import (
+    ENGINES,
+    compare,
+    describe,
+    random_schedules,
+    week_moments,
+)
+
+# Run with `python manage.py test api.tests.OpenStateTests`
+
+
+def open_time(start_day, start, end_day, end, schedule=None):
+    return OpenTime(
+        schedule=schedule,
+        start_day=start_day,
+        start_time=datetime.time(*start),
+        end_day=end_day,
+        end_time=datetime.time(*end),
+    )
+
+
+def minute(day, hour, minutes=0):
+    return day * MINUTES_PER_DAY + hour * 60 + minutes
+
+
+class OpenStateTests(SimpleTestCase):
+    def setUp(self):
+        # Weekdays 8:00 - 17:00 and Sunday night through Monday 2:00
+        self.intervals = schedule_intervals(
+            [open_time(day, (8, 0), day, (17, 0)) for day in range(5)]
+            + [open_time(6, (22, 0), 0, (2, 0))]
+        )
+
+    def test_open(self):
+        self.assertEqual(open_state(self.intervals, minute(2, 16, 40)), (True, 20, None))
+
+    def test_closed(self):
+        self.assertEqual(open_state(self.intervals, minute(2, 17, 30)), (False, None, 870))
+
+    def test_closes_through_the_end_of_the_week(self):
+        self.assertEqual(open_state(self.intervals, minute(6, 23)), (True, 180, None))
+
+    def test_opens_next_week(self):
+        self.assertEqual(open_state(self.intervals, minute(6, 12)), (False, None, 600))
+
+    def test_never(self):
+        self.assertEqual(open_state([], minute(0, 12)), (False, None, None))
+        always = [Interval(0, 7 * MINUTES_PER_DAY)]
+        self.assertEqual(open_state(always, minute(0, 12)), (True, None, None))
+
+
+def tick(day, hour, minutes=0, seconds=0, microseconds=0):
+    return tick_of_week(day, datetime.time(hour, minutes, seconds, microseconds))
+
+
+class ExactOpenStateTests(SimpleTestCase):
+    def setUp(self):
+        # Weekdays 8:00 - 17:00, Saturday from 7:00:30 and Sunday night
+        # through Monday 2:00
+        self.intervals = exact_intervals(
+            [open_time(day, (8, 0), day, (17, 0)) for day in range(5)]
+            + [open_time(5, (7, 0, 30), 5, (12, 0))]
+            + [open_time(6, (22, 0), 0, (2, 0))]
+        )
+
+    def test_end_time_is_inclusive(self):
+        self.assertEqual(
+            exact_open_state(self.intervals, tick(2, 16, 59, 30)), (True, 30, None)
+        )
+        self.assertEqual(exact_open_state(self.intervals, tick(2, 17)), (True, 0, None))
+        # Right after the end time and until the end of its minute
+        self.assertEqual(
+            exact_open_state(self.intervals, tick(2, 17, 0, 0, 1)), (False, None, 54000)
+        )
+        self.assertEqual(
+            exact_open_state(self.intervals, tick(2, 17, 0, 30)), (False, None, 53970)
+        )
+
+    def test_start_to_the_second(self):
+        self.assertEqual(
+            exact_open_state(self.intervals, tick(5, 7, 0, 15)), (False, None, 15)
+        )
+        self.assertEqual(
+            exact_open_state(self.intervals, tick(5, 7, 0, 30)), (True, 17970, None)
+        )
+
+    def test_closes_through_the_end_of_the_week(self):
+        self.assertEqual(
+            exact_open_state(self.intervals, tick(6, 23)), (True, 3 * 3600, None)
+        )
+
+    def test_split_at_midnight(self):
+        # The instants between 23:59:59 and midnight are closed
+        intervals = exact_intervals(
+            [open_time(0, (20, 0), 0, (23, 59, 59)), open_time(1, (0, 0), 1, (2, 0))]
+        )
+        self.assertEqual(
+            exact_open_state(intervals, tick(0, 23, 59, 59)), (True, 0, None)
+        )
+        self.assertEqual(
+            exact_open_state(intervals, tick(0, 23, 59, 59, 500000)), (False, None, 1)
+        )
+        self.assertEqual(exact_open_state(intervals, tick(1, 0)), (True, 7200, None))
+
+    def test_inverted_and_always(self):
+        self.assertEqual(exact_intervals([open_time(5, (17, 0), 5, (9, 0))]), [])
+        self.assertEqual(
+            exact_open_state(exact_intervals([], True), tick(3, 12)), (True, None, None)
+        )
+
+
+class OpenStateEquivalenceTests(SimpleTestCase):
+    """
+    The legacy is_open_now() and the interval engines agree twice a minute
+    for the whole week (see benchmarks/open_state.py).
+    """
+
+    def assertEnginesAgree(self, schedules):
+        mismatches, throughput = compare(schedules)
+        self.assertEqual(
+            mismatches, [], "\n".join(describe(mismatch) for mismatch in mismatches[:10])
+        )
+        self.assertEqual(set(throughput), {name for name, engine in ENGINES})
+
+    def test_random_corpus(self):
+        self.assertEnginesAgree(random_schedules(12, seed=50))
+
+    def test_edges(self):
+        schedule = Schedule(pk=1, name="Edges")
+        schedule._prefetched_objects_cache = {
+            "open_times": [
+                # Through the end of the week
+                open_time(6, (22, 0), 0, (2, 0)),
+                # Up to the last minute and second of a day
+                open_time(1, (8, 0), 1, (23, 59)),
+                open_time(2, (8, 0), 2, (23, 59, 59)),
+                # Up to midnight, and from one
+                open_time(3, (20, 0), 4, (0, 0)),
+                open_time(4, (0, 0), 4, (1, 0)),
+                # Inverted
+                open_time(5, (17, 0), 5, (9, 0)),
+                # In the middle of a minute
+                open_time(5, (10, 0, 30), 5, (16, 59, 59)),
+                open_time(6, (7, 0, 30), 6, (12, 0, 30)),
+                open_time(6, (14, 0, 15), 6, (17, 0, 45)),
+            ]
+        }
+        self.assertEnginesAgree([schedule])
+
+    def test_reports_mismatches(self):
+        def always_open(schedules):
+            return lambda local, moment: [True] * len(schedules)
+
+        schedule = Schedule(pk=1, name="Never")
+        schedule._prefetched_objects_cache = {"open_times": []}
+        mismatches, throughput = compare(
+            [schedule], ENGINES[:1] + (("always", always_open),), step=60
+        )
+        self.assertEqual(len(mismatches), len(list(week_moments(60))))
+        self.assertEqual(
+            describe(mismatches[0]),
+            "Monday 00:00:00: always open, legacy closed [never]",
+        )
+
+    def test_reports_mismatches_within_a_minute(self):
+        def minutes(schedules):
+            # open_state() is open for the whole minute an open time ends in
+            intervals = [
+                schedule_intervals(schedule.open_times.all()) for schedule in schedules
+            ]
+            return lambda local, moment: [
+                open_state(schedule, minute(local.weekday(), local.hour, local.minute))[0]
+                for schedule in intervals
+            ]
+
+        schedule = Schedule(pk=1, name="Weekdays")
+        schedule._prefetched_objects_cache = {
+            "open_times": [open_time(0, (8, 0), 0, (17, 0))]
+        }
+        mismatches, throughput = compare(
+            [schedule], ENGINES[:1] + (("minutes", minutes),)
+        )
+        self.assertEqual(
+            [describe(mismatch) for mismatch in mismatches],
+            [
+                "Monday 17:00:30: legacy closed, minutes open "
+                "[Monday 08:00:00 to Monday 17:00:00]"
+            ],
+        )
+
+
+def facility(name, schedule):
+    return Facility.objects.create(
+        facility_name=name,
+        facility_category=Category.objects.get_or_create(name="Dining")[0],
+        facility_location=Location.objects.get_or_create(
+            building="Johnson Center",
+            defaults={"campus_region": "fairfax", "coordinate_location": Point(0, 0)},
+        )[0],
+        main_schedule=schedule,
+    )
+
+
+def weekday_schedule(name):
+    schedule = Schedule.objects.create(name=name)
+    for day in range(5):
+        OpenTime.objects.create(
+            schedule=schedule,
+            start_day=day,
+            start_time=datetime.time(8),
+            end_day=day,
+            end_time=datetime.time(17),
+        )
+    return schedule
+
+
+class FacilityOpenStateTests(TestCase):
+    def setUp(self):
+        self.southside = facility("Southside", weekday_schedule("Southside [Main]"))
+        # A Wednesday afternoon
+        self.moment = timezone.make_aware(datetime.datetime(2019, 3, 6, 16, 40, 30))
+
+    def test_open(self):
+        state = self.southside.open_state(self.moment)
+        self.assertTrue(state.is_open)
+        self.assertEqual(
+            state.closes_at, timezone.make_aware(datetime.datetime(2019, 3, 6, 17, 0))
+        )
+        self.assertIsNone(state.next_opens_at)
+
+    def test_special_schedule(self):
+        closed = Schedule.objects.create(
+            name="Closed",
+            valid_start=self.moment - datetime.timedelta(days=1),
+            valid_end=self.moment + datetime.timedelta(days=1),
+        )
+        self.southside.special_schedules.add(closed)
+        self.assertEqual(self.southside.open_state(self.moment), (False, None, None))
+
+    def test_closed_right_after_closing_time(self):
+        after = timezone.make_aware(datetime.datetime(2019, 3, 6, 17, 0, 30))
+        state = self.southside.open_state(after)
+        self.assertFalse(state.is_open)
+        self.assertIsNone(state.closes_at)
+        self.assertEqual(
+            state.next_opens_at,
+            timezone.make_aware(datetime.datetime(2019, 3, 7, 8, 0)),
+        )
+        sharp = timezone.make_aware(datetime.datetime(2019, 3, 6, 17, 0))
+        self.assertEqual(self.southside.open_state(sharp), (True, sharp, None))
+
+    def test_opens_to_the_second(self):
+        OpenTime.objects.create(
+            schedule=self.southside.main_schedule,
+            start_day=5,
+            start_time=datetime.time(7, 0, 30),
+            end_day=5,
+            end_time=datetime.time(12),
+        )
+        saturday = timezone.make_aware(datetime.datetime(2019, 3, 9, 7, 0, 10))
+        state = self.southside.open_state(saturday)
+        self.assertFalse(state.is_open)
+        self.assertEqual(state.next_opens_at, saturday + datetime.timedelta(seconds=20))
+        state = self.southside.open_state(saturday + datetime.timedelta(seconds=30))
+        self.assertTrue(state.is_open)
+
+    def test_daylight_saving_time(self):
+        # Clocks go forward on Sunday March 10th, Monday 8:00 is still 8:00
+        saturday = timezone.make_aware(datetime.datetime(2019, 3, 9, 12, 0))
+        state = self.southside.open_state(saturday)
+        self.assertEqual(
+            timezone.localtime(state.next_opens_at).replace(tzinfo=None),
+            datetime.datetime(2019, 3, 11, 8, 0),
+        )
+
+
+class OpenStateContextTests(TestCase):
+    def setUp(self):
+        shared = weekday_schedule("Dining [Main]")
+        for name in ("Southside", "Ike's", "The Globe"):
+            facility(name, shared)
+        facility("Starbucks", weekday_schedule("Starbucks [Main]"))
+        self.moment = timezone.make_aware(datetime.datetime(2019, 3, 6, 16, 40, 30))
+
+    def test_one_query_for_every_schedule(self):
+        context = OpenStateContext(self.moment)
+        facilities = list(
+            Facility.objects.prefetch_related("main_schedule", "special_schedules")
+        )
+        with self.assertNumQueries(1):
+            context.prefetch(facilities)
+            states = [context.facility_state(facility) for facility in facilities]
+        self.assertEqual(len(context.states), 2)
+        self.assertEqual(states, [facilities[0].open_state(self.moment)] * 4)
+
+    def test_schedules_are_evaluated_once(self):
+        facilities = list(Facility.objects.select_related("main_schedule"))
+        with OpenStateContext.activate(OpenStateContext(self.moment)):
+            with self.assertNumQueries(4 + 2):
+                # The special schedules of each facility, and the open times
+                # of each distinct schedule
+                self.assertTrue(all(facility.is_open() for facility in facilities))
+
+    def test_open_now_matches_is_open(self):
+        response = APIClient().get("/api/facilities/?format=json&open_now=true")
+        self.assertEqual({item["is_open"] for item in response.json()} - {True}, set())
+
+
+class FacilityPayloadTests(TestCase):
+    def list(self):
+        client = APIClient()
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get("/api/facilities/?format=json")
+        self.assertEqual(response.status_code, 200)
+        return response.json(), len(queries)
+
+    def test_fields(self):
+        facility("Southside", weekday_schedule("Southside [Main]"))
+        data, _ = self.list()
+        self.assertLessEqual({"is_open", "closes_at", "next_opens_at"}, set(data[0]))
+        self.assertTrue(data[0]["closes_at"] or data[0]["next_opens_at"])
+
+    def test_no_queries_per_facility(self):
+        facility("Southside", weekday_schedule("Southside [Main]"))
+        _, one = self.list()
+        facility("Starbucks", weekday_schedule("Starbucks [Main]"))
+        facility("Spice", weekday_schedule("Spice [Main]"))
+        _, three = self.list()
+        self.assertEqual(one, three)
+
+    def test_sparse_fieldset(self):
+        facility("Southside", weekday_schedule("Southside [Main]"))
+        response = APIClient().get("/api/facilities/?format=json&fields=slug,is_open")
+        self.assertEqual(set(response.json()[0]), {"slug", "is_open"})
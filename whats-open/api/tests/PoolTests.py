@@ -0,0 +1,49 @@
+from django.test import SimpleTestCase
+
+from api.backends.pool import ConnectionPool
+
+# Run with `python manage.py test api.tests.PoolTests`
+# The pool only handles DB-API connection objects so fakes are enough here.
+
+
+class FakeConnection(object):
+    def __init__(self, usable=True):
+        self.usable = usable
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def usable(connection):
+    return connection.usable
+
+
+class ConnectionPoolTests(SimpleTestCase):
+    def test_connections_are_reused(self):
+        pool = ConnectionPool(size=2)
+        first = pool.acquire(FakeConnection, usable)
+        pool.release(first)
+        self.assertIs(pool.acquire(FakeConnection, usable), first)
+        self.assertEqual(pool.stats()["created"], 1)
+        self.assertEqual(pool.stats()["reused"], 1)
+        self.assertEqual(pool.stats()["in_use"], 1)
+
+    def test_broken_connections_are_discarded(self):
+        pool = ConnectionPool(size=2)
+        broken = pool.acquire(FakeConnection, usable)
+        pool.release(broken)
+        broken.usable = False
+        connection = pool.acquire(FakeConnection, usable)
+        self.assertIsNot(connection, broken)
+        self.assertTrue(broken.closed)
+        self.assertEqual(pool.stats()["discarded"], 1)
+
+    def test_extra_connections_are_closed(self):
+        pool = ConnectionPool(size=1)
+        connections = [pool.acquire(FakeConnection, usable) for _ in range(3)]
+        for connection in connections:
+            pool.release(connection)
+        self.assertEqual(pool.stats()["idle"], 1)
+        self.assertEqual(pool.stats()["discarded"], 2)
+        self.assertEqual([c.closed for c in connections], [False, True, True])
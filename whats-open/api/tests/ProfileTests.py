@@ -0,0 +1,95 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from api.profiling import frame_counts, parse_folded
+
+# Run with `python manage.py test api.tests.ProfileTests`
+
+
+# Responses are not cached so that every request runs its queries
+@override_settings(
+    CACHES={
+        "default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"},
+        "throttle": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    }
+)
+class ProfileTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        call_command("generate_data", facilities=20, seed=1, stdout=StringIO())
+
+    def setUp(self):
+        self.profile_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.profile_root)
+        settings = override_settings(PROFILE_ROOT=self.profile_root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def login(self, is_staff=True):
+        user = User.objects.create_user("profiler", is_staff=is_staff)
+        self.client.force_login(user)
+
+    def test_report(self):
+        self.login()
+        response = self.client.get("/api/facilities/?format=json&profile=1")
+        self.assertEqual(response.status_code, 200)
+        report = response.json()
+        self.assertEqual(report["status_code"], 200)
+        self.assertEqual(report["path"], "/api/facilities/?format=json&profile=1")
+        self.assertGreater(report["sql"]["count"], 0)
+        self.assertIn("SELECT", report["sql"]["queries"][0]["sql"])
+        self.assertEqual(report["samples"], sum(parse_folded(report["folded"]).values()))
+
+        with open(os.path.join(self.profile_root, report["saved_as"])) as saved:
+            self.assertEqual(json.load(saved)["folded"], report["folded"])
+        self.assertIn("facility-list", report["saved_as"])
+
+    def test_header_and_folded(self):
+        self.login()
+        response = self.client.get("/api/alerts/", HTTP_X_PROFILE="folded")
+        self.assertEqual(response["Content-Type"], "text/plain")
+        for line in response.content.decode().splitlines():
+            stack, count = line.rsplit(" ", 1)
+            self.assertTrue(stack and int(count) > 0)
+
+    def test_staff_only(self):
+        self.login(is_staff=False)
+        response = self.client.get("/api/facilities/?format=json&profile=1")
+        self.assertIsInstance(response.json(), list)
+        self.assertEqual(os.listdir(self.profile_root), [])
+
+    def test_only_documented_values(self):
+        self.login()
+        for value in ("0", "false", "yes"):
+            response = self.client.get("/api/facilities/?format=json&profile=" + value)
+            self.assertIsInstance(response.json(), list)
+            response = self.client.get("/api/alerts/?format=json", HTTP_X_PROFILE=value)
+            self.assertIsInstance(response.json(), list)
+        self.assertEqual(os.listdir(self.profile_root), [])
+
+    def test_only_api_views(self):
+        self.login()
+        response = self.client.get("/api/?format=json&profile=1")
+        self.assertNotIn("folded", response.json())
+
+    def test_frame_counts(self):
+        own, total = frame_counts({"a;b;c": 2, "a;b": 1, "a;c": 1})
+        self.assertEqual(own, {"c": 3, "b": 1})
+        self.assertEqual(total, {"a": 4, "b": 3, "c": 3})
+
+    def test_compare_profiles(self):
+        self.login()
+        names = [
+            self.client.get("/api/facilities/?format=json&profile=1").json()["saved_as"]
+            for _ in range(2)
+        ]
+        out = StringIO()
+        call_command("compare_profiles", *names, stdout=out)
+        self.assertIn("queries", out.getvalue())
@@ -0,0 +1,219 @@
+import re
+import sys
+import time
+from collections import Counter, OrderedDict, namedtuple
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from rest_framework import serializers
+from rest_framework.test import APIClient
+
+from api.urls import ROUTER
+
+# Run with `python manage.py test api.tests.QueryBudgetTests`
+#
+# Every route on the API ROUTER is requested with every example query that
+# its documentation links to, first against a small generated dataset and
+# then against a larger one. A request fails when it goes over the budget of
+# its route, or when more of its queries are repeats of the same statement on
+# the larger dataset, which is what an N+1 query looks like. Comparing plain
+# counts would also flag prefetches that only run once there are related
+# rows to fetch. Failures list the queries per serializer field that issued
+# them.
+
+# The most queries (and optionally milliseconds of SQL) a request to a route
+# may take, by route basename and "list" or "detail".
+Budget = namedtuple("Budget", ["queries", "milliseconds"])
+Budget.__new__.__defaults__ = (None,)
+
+BUDGETS = {
+    ("alert", "list"): Budget(2),
+    ("alert", "detail"): Budget(2),
+    ("category", "list"): Budget(1),
+    ("category", "detail"): Budget(1),
+    # open_now and closed_now find the open facilities before listing them
+    ("facility", "list"): Budget(12),
+    ("facility", "detail"): Budget(7),
+    ("location", "list"): Budget(1),
+    ("location", "detail"): Budget(1),
+    ("map", "list"): Budget(6),
+    ("open-hours", "list"): Budget(1),
+    ("schedule", "list"): Budget(4),
+    ("schedule", "detail"): Budget(4),
+}
+
+SMALL_DATASET = 10
+LARGE_DATASET = 40
+
+# Links in the browsable API documentation look like [GET /api/...](/api/...)
+DOCUMENTED_URL = re.compile(r"\]\((/api/[^)\s]+)\)")
+
+
+def field_path(field):
+    """
+    Return a dotted "FacilitySerializer.main_schedule.open_times" path for a
+    serializer field.
+    """
+    names = []
+    root = field
+    while root.parent is not None:
+        if root.field_name:
+            names.append(root.field_name)
+        root = root.parent
+    if isinstance(root, serializers.ListSerializer):
+        root = root.child
+    return ".".join([type(root).__name__] + names[::-1])
+
+
+class QueryRecorder(object):
+    """
+    Database execute wrapper that records every query along with the
+    serializer field that was being rendered when it ran.
+    """
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        source = "view"
+        frame = sys._getframe(1)
+        while frame is not None:
+            field = frame.f_locals.get("self")
+            if isinstance(field, serializers.Field):
+                source = field_path(field)
+                break
+            frame = frame.f_back
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((source, sql, time.perf_counter() - start))
+
+    @property
+    def milliseconds(self):
+        return sum(duration for source, sql, duration in self.queries) * 1000
+
+    def by_source(self):
+        return Counter(source for source, sql, duration in self.queries)
+
+    @property
+    def repeated(self):
+        """
+        The number of queries that run a statement that already ran.
+        """
+        return len(self.queries) - len(set(sql for source, sql, duration in self.queries))
+
+
+def routes():
+    """
+    Yield the (basename, kind, viewset) of every route on the ROUTER.
+    """
+    for prefix, viewset, basename in ROUTER.registry:
+        yield basename, "list", prefix, viewset
+        if hasattr(viewset, "retrieve"):
+            yield basename, "detail", prefix, viewset
+
+
+def documented_urls(prefix, viewset):
+    """
+    Return the list URL of a route along with every example in its docs.
+    """
+    urls = OrderedDict([("/api/%s/?format=json" % prefix, None)])
+    for url in DOCUMENTED_URL.findall(viewset.__doc__ or ""):
+        if url.startswith("/api/%s/" % prefix):
+            urls[url if "format=" in url else url + "?format=json"] = None
+    return list(urls)
+
+
+def detail_url(prefix, viewset):
+    lookup_field = getattr(viewset, "lookup_field", "pk")
+    instance = viewset.serializer_class.Meta.model.objects.order_by("pk").first()
+    return "/api/%s/%s/?format=json" % (prefix, getattr(instance, lookup_field))
+
+
+# Responses are not cached so that every request runs its queries
+@override_settings(
+    CACHES={
+        "default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"},
+        "throttle": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    }
+)
+class QueryBudgetTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        # Signed in so that no throttle applies, which leaves permissions
+        # alone for safe requests
+        self.client.force_authenticate(User.objects.create_user("budget"))
+
+    def generate(self, facilities, seed):
+        call_command("generate_data", facilities=facilities, seed=seed, stdout=StringIO())
+
+    def measure(self):
+        """
+        Request every URL once and return its QueryRecorder by URL, along
+        with the budget key of each URL.
+        """
+        results = OrderedDict()
+        for basename, kind, prefix, viewset in routes():
+            if kind == "list":
+                urls = documented_urls(prefix, viewset)
+            else:
+                urls = [detail_url(prefix, viewset)]
+            for url in urls:
+                recorder = QueryRecorder()
+                with connection.execute_wrapper(recorder):
+                    response = self.client.get(url)
+                self.assertLess(response.status_code, 500, url)
+                results[url] = ((basename, kind), recorder)
+        return results
+
+    def test_query_budgets(self):
+        self.generate(SMALL_DATASET, seed=1)
+        small = self.measure()
+        self.generate(LARGE_DATASET - SMALL_DATASET, seed=2)
+        large = self.measure()
+
+        failures = []
+        for url, (key, recorder) in large.items():
+            budget = BUDGETS.get(key)
+            if budget is None:
+                failures.append("%s: no budget for %s %s" % (url, *key))
+                continue
+            count = len(recorder.queries)
+            if count > budget.queries:
+                failures.append(
+                    "%s: %d queries, over the budget of %d\n%s"
+                    % (url, count, budget.queries, self.describe(recorder))
+                )
+            if budget.milliseconds and recorder.milliseconds > budget.milliseconds:
+                failures.append(
+                    "%s: %.1fms of SQL, over the budget of %dms"
+                    % (url, recorder.milliseconds, budget.milliseconds)
+                )
+            small_recorder = small.get(url, (None, None))[1]
+            # Detail URLs point at different objects, compare the lists
+            if small_recorder is not None and recorder.repeated > small_recorder.repeated:
+                failures.append(
+                    "%s: %d repeated queries with %d facilities but %d with %d\n%s"
+                    % (
+                        url,
+                        small_recorder.repeated,
+                        SMALL_DATASET,
+                        recorder.repeated,
+                        LARGE_DATASET,
+                        self.describe(recorder, small_recorder),
+                    )
+                )
+        self.assertFalse(failures, "\n\n".join(failures))
+
+    def describe(self, recorder, baseline=None):
+        counts = recorder.by_source()
+        before = baseline.by_source() if baseline is not None else Counter()
+        lines = []
+        for source, count in counts.most_common():
+            extra = " (%+d)" % (count - before[source]) if baseline is not None else ""
+            lines.append("    %3d%s  %s" % (count, extra, source))
+        return "\n".join(lines)
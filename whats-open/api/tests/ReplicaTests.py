@@ -0,0 +1,151 @@
+from django.contrib.auth.models import Permission, User
+from django.contrib.gis.geos import Point
+from django.core.cache import cache
+from django.db import connections
+from django.http import HttpResponse
+from django.test import (
+    RequestFactory,
+    SimpleTestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from api.middleware import ReplicaMiddleware
+from api.models import Category, Facility, Location, Schedule
+from api.routers import ReplicaRouter, pin_to_primary, replica_reads
+
+# Run with `python manage.py test api.tests.ReplicaTests`
+# The router and middleware tests only look at database aliases. The request
+# tests go through "replica1", which the test settings add as a mirror of the
+# primary's test database with a connection of its own.
+
+ROUTER = ReplicaRouter()
+
+
+def read_alias(request):
+    """
+    A view that reports the database a read would be sent to.
+    """
+    return HttpResponse(ROUTER.db_for_read(Facility))
+
+
+def write_alias(request):
+    ROUTER.db_for_write(Facility)
+    return read_alias(request)
+
+
+@override_settings(DATABASE_REPLICAS=["replica1"], REPLICA_PIN_SECONDS=10)
+class ReplicaRouterTests(SimpleTestCase):
+    def test_primary_by_default(self):
+        self.assertEqual(ROUTER.db_for_read(Facility), "default")
+        self.assertEqual(ROUTER.db_for_write(Facility), "default")
+
+    def test_replica_reads(self):
+        with replica_reads():
+            self.assertEqual(ROUTER.db_for_read(Facility), "replica1")
+            self.assertEqual(ROUTER.db_for_write(Facility), "default")
+        self.assertEqual(ROUTER.db_for_read(Facility), "default")
+
+    def test_write_pins_reads_to_primary(self):
+        with replica_reads():
+            ROUTER.db_for_write(Facility)
+            self.assertEqual(ROUTER.db_for_read(Facility), "default")
+
+    def test_pin_to_primary(self):
+        with replica_reads():
+            pin_to_primary()
+            self.assertEqual(ROUTER.db_for_read(Facility), "default")
+
+    def test_migrations_only_run_on_the_primary(self):
+        self.assertTrue(ROUTER.allow_migrate("default", "api"))
+        self.assertFalse(ROUTER.allow_migrate("replica1", "api"))
+
+
+@override_settings(DATABASE_REPLICAS=["replica1"], REPLICA_PIN_SECONDS=10)
+class ReplicaMiddlewareTests(SimpleTestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def test_safe_requests_read_from_a_replica(self):
+        response = ReplicaMiddleware(read_alias)(self.factory.get("/api/facilities/"))
+        self.assertEqual(response.content, b"replica1")
+
+    def test_writes_use_the_primary_and_pin_the_client(self):
+        response = ReplicaMiddleware(write_alias)(
+            self.factory.post("/api/schedules/")
+        )
+        self.assertEqual(response.content, b"default")
+        self.assertEqual(response.cookies[ReplicaMiddleware.PIN_COOKIE]["max-age"], 10)
+
+    def test_pinned_clients_read_from_the_primary(self):
+        request = self.factory.get("/api/schedules/")
+        request.COOKIES[ReplicaMiddleware.PIN_COOKIE] = "1"
+        response = ReplicaMiddleware(read_alias)(request)
+        self.assertEqual(response.content, b"default")
+
+    def test_admin_uses_the_primary(self):
+        response = ReplicaMiddleware(read_alias)(self.factory.get("/admin/api/"))
+        self.assertEqual(response.content, b"default")
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_without_replicas(self):
+        response = ReplicaMiddleware(read_alias)(self.factory.get("/api/facilities/"))
+        self.assertEqual(response.content, b"default")
+
+
+@override_settings(
+    DATABASE_REPLICAS=["replica1"],
+    DATABASE_ROUTERS=["api.routers.ReplicaRouter"],
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+)
+class ReplicaRequestTests(TransactionTestCase):
+    # The replica's connection only sees rows once they are committed
+    multi_db = True
+
+    def setUp(self):
+        cache.clear()
+        Facility.objects.create(
+            facility_name="Southside",
+            facility_category=Category.objects.create(name="Dining"),
+            facility_location=Location.objects.create(
+                building="Southside",
+                address="4400 University Dr",
+                campus_region="fairfax",
+                coordinate_location=Point(-77.3, 38.8),
+            ),
+            main_schedule=Schedule.objects.create(name="Southside [Main]"),
+        )
+        user = User.objects.create_user("editor", password="editor")
+        user.user_permissions.add(Permission.objects.get(codename="add_schedule"))
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+
+    def request(self, method, path, data=None):
+        with CaptureQueriesContext(connections["default"]) as primary:
+            with CaptureQueriesContext(connections["replica1"]) as replica:
+                response = getattr(self.client, method)(path, data, format="json")
+        return response, len(primary), len(replica)
+
+    def test_reads_from_the_replica(self):
+        response, primary, replica = self.request("get", "/api/facilities/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()[0]["facility_name"], "Southside")
+        self.assertEqual(primary, 0)
+        self.assertGreater(replica, 0)
+
+    def test_write_then_read_stays_on_the_primary(self):
+        response, primary, replica = self.request(
+            "post", "/api/schedules/", {"name": "Finals Week"}
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertGreater(primary, 0)
+        self.assertEqual(replica, 0)
+
+        # The client is pinned to the primary, which has its new schedule
+        response, primary, replica = self.request("get", "/api/schedules/")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("Finals Week", [item["name"] for item in response.json()])
+        self.assertGreater(primary, 0)
+        self.assertEqual(replica, 0)
@@ -0,0 +1,146 @@
+import datetime
+
+from django.contrib.gis.geos import Point
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from api.intervals import daily_open_minutes
+from api.models import Category, Facility, Location, OpenHoursRollup, OpenTime, Schedule
+from api.rollups import open_hours_report
+
+# Run with `python manage.py test api.tests.RollupTests`
+
+
+def open_time(start_day, start, end_day, end, schedule=None):
+    return OpenTime(
+        schedule=schedule,
+        start_day=start_day,
+        start_time=datetime.time(*start),
+        end_day=end_day,
+        end_time=datetime.time(*end),
+    )
+
+
+class DailyOpenMinutesTests(SimpleTestCase):
+    def test_same_day(self):
+        days = daily_open_minutes([open_time(4, (8, 0), 4, (17, 0))])
+        self.assertEqual(days[4], (9 * 60, 8 * 60, 17 * 60))
+        self.assertEqual(days[3], (0, None, None))
+
+    def test_past_midnight(self):
+        days = daily_open_minutes([open_time(4, (18, 0), 5, (2, 0))])
+        self.assertEqual(days[4], (6 * 60, 18 * 60, 24 * 60))
+        self.assertEqual(days[5], (2 * 60, 0, 2 * 60))
+
+    def test_end_of_day(self):
+        days = daily_open_minutes([open_time(0, (7, 0), 0, (23, 59, 59))])
+        self.assertEqual(days[0], (17 * 60, 7 * 60, 24 * 60))
+
+    def test_wraps_around_the_week(self):
+        days = daily_open_minutes([open_time(6, (22, 0), 0, (1, 0))])
+        self.assertEqual(days[6], (2 * 60, 22 * 60, 24 * 60))
+        self.assertEqual(days[0], (60, 0, 60))
+
+    def test_twenty_four_hours(self):
+        self.assertEqual(daily_open_minutes([], True), [(24 * 60, 0, 24 * 60)] * 7)
+
+
+def facility(name, category, building, campus, closes):
+    schedule = Schedule.objects.create(name="%s [Main]" % name)
+    for day in range(5):
+        OpenTime.objects.create(
+            schedule=schedule,
+            start_day=day,
+            start_time=datetime.time(8),
+            end_day=day,
+            end_time=datetime.time(closes),
+        )
+    return Facility.objects.create(
+        facility_name=name,
+        facility_category=Category.objects.get_or_create(name=category)[0],
+        facility_location=Location.objects.get_or_create(
+            building=building,
+            campus_region=campus,
+            defaults={"address": "4400 University Dr", "coordinate_location": Point(0, 0)},
+        )[0],
+        main_schedule=schedule,
+    )
+
+
+class OpenHoursRollupTests(TestCase):
+    def setUp(self):
+        self.southside = facility("Southside", "Dining", "Southside", "fairfax", 20)
+        self.starbucks = facility("Starbucks", "Coffee", "Johnson Center", "fairfax", 17)
+        self.spice = facility("Spice", "Dining", "Founders Hall", "arlington", 15)
+
+    def report(self, group_by, **kwargs):
+        return [
+            dict(row) for row in open_hours_report(timezone.now(), group_by, **kwargs)
+        ]
+
+    def test_rows_are_kept_up_to_date(self):
+        self.assertEqual(OpenHoursRollup.objects.count(), 3 * 7)
+        OpenTime.objects.create(
+            schedule=self.spice.main_schedule,
+            start_day=5,
+            start_time=datetime.time(10),
+            end_day=5,
+            end_time=datetime.time(14),
+        )
+        saturday = OpenHoursRollup.objects.get(facility=self.spice, day=5)
+        self.assertEqual(saturday.open_minutes, 4 * 60)
+
+    def test_moving_a_facility(self):
+        self.spice.facility_category = Category.objects.get(name="Coffee")
+        self.spice.save()
+        rows = OpenHoursRollup.objects.filter(facility=self.spice)
+        self.assertEqual(set(rows.values_list("category__name", flat=True)), {"Coffee"})
+
+    def test_weekly_hours_per_category(self):
+        report = self.report(["category"])
+        self.assertEqual(
+            [(row["category"], row["facilities"], row["total_hours"]) for row in report],
+            [("Coffee", 1, 45.0), ("Dining", 2, 95.0)],
+        )
+
+    def test_buildings_closing_earliest_on_friday(self):
+        report = self.report(["building"], day=4, ordering=["closes_at"])
+        self.assertEqual(
+            [(row["building"], row["closes_at"]) for row in report],
+            [("Founders Hall", "15:00"), ("Johnson Center", "17:00"), ("Southside", "20:00")],
+        )
+
+    def test_special_schedule_in_effect(self):
+        now = timezone.now()
+        closed = Schedule.objects.create(
+            name="Closed",
+            valid_start=now - datetime.timedelta(days=1),
+            valid_end=now + datetime.timedelta(days=1),
+        )
+        self.southside.special_schedules.add(closed)
+        report = self.report(["facility"], campus="fairfax")
+        self.assertEqual(
+            [(row["facility"], row["total_minutes"]) for row in report],
+            [("southside", 0), ("starbucks", 45 * 60)],
+        )
+        # A week later the main schedule is back
+        later = now + datetime.timedelta(days=7)
+        report = open_hours_report(later, ["facility"], campus="fairfax")
+        self.assertEqual(report[0]["total_minutes"], 60 * 60)
+
+    def test_endpoint(self):
+        response = APIClient().get(
+            "/api/analytics/open-hours/?group_by=campus,day&day=0&format=json"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [(row["campus"], row["day"], row["total_minutes"]) for row in response.json()],
+            [("arlington", 0, 7 * 60), ("fairfax", 0, 21 * 60)],
+        )
+
+    def test_endpoint_errors(self):
+        client = APIClient()
+        for query in ("group_by=color", "day=7", "at=yesterday", "ordering=color"):
+            response = client.get("/api/analytics/open-hours/?" + query)
+            self.assertEqual(response.status_code, 400, query)
@@ -0,0 +1,147 @@
+import datetime
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from api.forms import grid_lines, parse_ranges
+from api.models import OpenTime, Schedule
+
+# Run with `python manage.py test api.tests.ScheduleAdminTests`
+
+
+def time(hour, minute=0, second=0):
+    return datetime.time(hour, minute, second)
+
+
+def rows(schedule):
+    return sorted(
+        schedule.open_times.values_list("start_day", "start_time", "end_day", "end_time")
+    )
+
+
+class GridTests(TestCase):
+    def test_round_trip(self):
+        rows = [
+            (0, time(7), 0, time(11)),
+            (0, time(12), 0, time(21)),
+            (4, time(20), 5, time(2)),
+            (5, time(20), 0, time(8, 30)),
+            (6, time(9), 6, time(23, 59, 59)),
+        ]
+        lines = grid_lines(rows)
+        self.assertEqual(lines[0], "7:00-11:00, 12:00-21:00")
+        self.assertEqual(lines[4], "20:00-2:00")
+        self.assertEqual(lines[5], "20:00-Mon 8:30")
+        self.assertEqual(lines[6], "9:00-23:59:59")
+        parsed = [row for day, line in enumerate(lines) for row in parse_ranges(day, line)]
+        self.assertEqual(sorted(parsed), sorted(rows))
+
+    def test_past_midnight_on_sunday(self):
+        self.assertEqual(parse_ranges(6, "22:00-2:00"), [(6, time(22), 0, time(2))])
+
+
+class SetOpenTimesTests(TestCase):
+    def setUp(self):
+        self.schedule = Schedule.objects.create(name="Southside [Main]")
+        for day in range(5):
+            OpenTime.objects.create(
+                schedule=self.schedule,
+                start_day=day,
+                start_time=time(7),
+                end_day=day,
+                end_time=time(21),
+            )
+
+    def test_diff(self):
+        kept = OpenTime.objects.get(schedule=self.schedule, start_day=0)
+        wanted = [(day, time(7), day, time(21)) for day in (0, 1)] + [
+            (5, time(10), 5, time(18))
+        ]
+        # The stored rows, one UPDATE and one DELETE (with its SELECT) inside
+        # a savepoint, and no INSERT
+        with self.assertNumQueries(6):
+            self.assertTrue(self.schedule.set_open_times(wanted))
+        self.assertEqual(rows(self.schedule), sorted(wanted))
+        self.assertTrue(OpenTime.objects.filter(pk=kept.pk).exists())
+        self.assertFalse(self.schedule.set_open_times(wanted))
+
+    def test_derived_data_rebuilt_once(self):
+        wanted = [(day, time(8), day, time(20)) for day in range(7)]
+        with mock.patch("api.signals.refresh_open_hours") as refresh, mock.patch(
+            "api.signals.invalidate_campuses"
+        ) as invalidate:
+            self.schedule.set_open_times(wanted)
+            self.assertFalse(refresh.called or invalidate.called)
+            self.schedule.save()
+        self.assertEqual(refresh.call_count, 1)
+        self.assertEqual(invalidate.call_count, 1)
+        self.assertEqual(
+            Schedule.objects.get(pk=self.schedule.pk).hours_summary,
+            "Daily 8 a.m. – 8 p.m.",
+        )
+
+
+class ScheduleAdminTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_superuser("admin", "admin@example.com", "admin")
+        self.client.force_login(user)
+
+    def post(self, url, **lines):
+        data = {
+            "name": "Southside [Main]",
+            "valid_start_0": "",
+            "valid_start_1": "",
+            "valid_end_0": "",
+            "valid_end_1": "",
+        }
+        for day in range(7):
+            data["open_times_%d" % day] = lines.get("day%d" % day, "")
+        return self.client.post(url, data)
+
+    def test_add_and_change(self):
+        with mock.patch("api.signals.refresh_open_hours") as refresh, mock.patch(
+            "api.signals.invalidate_campuses"
+        ) as invalidate, mock.patch.object(
+            Schedule, "update_hours", autospec=True, side_effect=Schedule.update_hours
+        ) as update_hours:
+            response = self.post(
+                "/admin/api/schedule/add/",
+                day0="7:00-11:00, 10:00-21:00",
+                day6="22:00-2:00",
+            )
+        self.assertEqual(response.status_code, 302)
+        # The derived data is rebuilt once, after the open times are written
+        self.assertEqual(refresh.call_count, 1)
+        self.assertEqual(invalidate.call_count, 1)
+        self.assertEqual(update_hours.call_count, 1)
+        schedule = Schedule.objects.get()
+        # The overlapping times were merged
+        self.assertEqual(
+            rows(schedule),
+            [(0, time(7), 0, time(21)), (6, time(22), 0, time(2))],
+        )
+        self.assertEqual(schedule.hours_summary, "Mon 7 a.m. – 9 p.m.; Sun 10 p.m. – 2 a.m.")
+
+        url = "/admin/api/schedule/%d/change/" % schedule.pk
+        response = self.client.get(url)
+        self.assertContains(response, 'value="22:00-2:00"')
+        self.assertContains(response, "Sunday")
+
+        with mock.patch("api.signals.refresh_open_hours") as refresh:
+            response = self.post(url, day0="7:00-21:00", day2="7:00-21:00")
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(refresh.call_count, 1)
+        self.assertEqual(
+            rows(schedule), [(0, time(7), 0, time(21)), (2, time(7), 2, time(21))]
+        )
+
+    def test_invalid(self):
+        response = self.post(
+            "/admin/api/schedule/add/", day0="7:00 to 9:00", day1="8:00-Tue 8:00"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "is not a range of times")
+        self.assertFalse(Schedule.objects.exists())
+        response = self.post("/admin/api/schedule/add/", day1="8:00-Tue 8:00")
+        self.assertContains(response, "starts and ends at the same time")
@@ -0,0 +1,122 @@
+from django.contrib.gis.geos import Point
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.exceptions import ParseError
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+from taggit.models import Tag
+
+from api.filters import TagFilter
+from api.models import Category, Facility, Location, Schedule, join_tags, split_tags
+
+# Run with `python manage.py test api.tests.TagTests`
+
+
+def facility(name, *tags):
+    facility = Facility.objects.create(
+        facility_name=name,
+        facility_category=Category.objects.get_or_create(name="Dining")[0],
+        facility_location=Location.objects.get_or_create(
+            building="Johnson Center",
+            defaults={"coordinate_location": Point(-77.3, 38.8)},
+        )[0],
+        main_schedule=Schedule.objects.create(name="%s [Main]" % name),
+    )
+    facility.facility_product_tags.add(*tags)
+    return facility
+
+
+def tag_names(facility):
+    return Facility.objects.values_list("tag_names", flat=True).get(pk=facility.pk)
+
+
+class TagNamesTests(SimpleTestCase):
+    def test_join(self):
+        self.assertEqual(join_tags(["tea", "Coffee", "tea"]), ",Coffee,tea,")
+        self.assertEqual(join_tags([]), "")
+
+    def test_split(self):
+        self.assertEqual(split_tags(",Coffee,tea,"), ["Coffee", "tea"])
+        self.assertEqual(split_tags(""), [])
+
+
+class TagSignalTests(TestCase):
+    def test_add_remove_and_clear(self):
+        starbucks = facility("Starbucks", "coffee", "tea")
+        self.assertEqual(tag_names(starbucks), ",coffee,tea,")
+        starbucks.facility_product_tags.remove("tea")
+        self.assertEqual(tag_names(starbucks), ",coffee,")
+        starbucks.facility_product_tags.set("late night", "coffee")
+        self.assertEqual(tag_names(starbucks), ",coffee,late night,")
+        starbucks.facility_product_tags.clear()
+        self.assertEqual(tag_names(starbucks), "")
+
+    def test_rename_and_delete_tag(self):
+        starbucks = facility("Starbucks", "coffee", "tea")
+        tag = Tag.objects.get(name="tea")
+        tag.name = "chai"
+        tag.save()
+        self.assertEqual(tag_names(starbucks), ",chai,coffee,")
+        tag.delete()
+        self.assertEqual(tag_names(starbucks), ",coffee,")
+
+
+class TagFilterTests(TestCase):
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        facility("Starbucks", "coffee", "tea")
+        facility("Dunkin", "coffee", "late night")
+        facility("Panda Express", "asian")
+
+    def filter(self, query):
+        request = Request(self.factory.get("/api/facilities/", query))
+        queryset = TagFilter().filter_queryset(request, Facility.objects.all(), None)
+        return sorted(queryset.values_list("facility_name", flat=True))
+
+    def test_any(self):
+        self.assertEqual(self.filter({"tags": "tea,asian"}), ["Panda Express", "Starbucks"])
+
+    def test_all(self):
+        self.assertEqual(
+            self.filter({"tags": "Coffee, late night", "tags_match": "all"}), ["Dunkin"]
+        )
+
+    def test_whole_names_only(self):
+        self.assertEqual(self.filter({"tags": "late"}), [])
+
+    def test_no_tags(self):
+        self.assertEqual(len(self.filter({"tags": ","})), 3)
+
+    def test_bad_match(self):
+        with self.assertRaises(ParseError):
+            self.filter({"tags": "tea", "tags_match": "some"})
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+)
+class TagEndpointTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        facility("Starbucks", "coffee", "tea")
+        facility("Dunkin", "coffee", "late night")
+        facility("Panda Express", "asian")
+
+    def names(self, query):
+        response = self.client.get("/api/facilities/", dict(query, format="json"))
+        self.assertEqual(response.status_code, 200)
+        return [item["facility_name"] for item in response.json()]
+
+    def test_tags(self):
+        self.assertEqual(self.names({"tags": "tea,asian"}), ["Panda Express", "Starbucks"])
+
+    def test_tag_name_lookup(self):
+        # Clients from before ?tags= filter on the tag relation
+        self.assertEqual(self.names({"facility_product_tags__name": "tea"}), ["Starbucks"])
+        self.assertEqual(
+            self.names({"facility_product_tags__name": "coffee"}), ["Dunkin", "Starbucks"]
+        )
+
+    def test_search(self):
+        self.assertEqual(self.names({"search": "late night"}), ["Dunkin"])
@@ -0,0 +1,101 @@
+from django.contrib.auth.models import AnonymousUser
+from django.test import SimpleTestCase, override_settings
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.throttling import AnonFixedWindowThrottle, throttle_cache
+
+# Run with `python manage.py test api.tests.ThrottleTests`
+
+CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"},
+    "throttle": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+}
+
+
+class ThreePerMinute(AnonFixedWindowThrottle):
+    rate = "3/min"
+
+
+class BrokenCache(object):
+    def incr(self, key):
+        raise ConnectionError("cache is down")
+
+
+class BrokenCacheThrottle(ThreePerMinute):
+    cache = BrokenCache()
+
+
+def request(address="192.0.2.1"):
+    request = Request(APIRequestFactory().get("/api/facilities/", REMOTE_ADDR=address))
+    request.user = AnonymousUser()
+    return request
+
+
+@override_settings(CACHES=CACHES)
+class AnonFixedWindowThrottleTests(SimpleTestCase):
+    def setUp(self):
+        throttle_cache().clear()
+        self.now = 600.0
+
+    def throttle(self, throttle_class=ThreePerMinute):
+        throttle = throttle_class()
+        throttle.timer = lambda: self.now
+        return throttle
+
+    def test_limits_requests_per_window(self):
+        allowed = [self.throttle().allow_request(request(), None) for _ in range(4)]
+        self.assertEqual(allowed, [True, True, True, False])
+
+    def test_wait_until_next_window(self):
+        throttle = self.throttle()
+        self.now = 630.0
+        throttle.allow_request(request(), None)
+        self.assertEqual(throttle.wait(), 30.0)
+
+    def test_new_window_resets_the_count(self):
+        for _ in range(3):
+            self.throttle().allow_request(request(), None)
+        self.now += 60
+        self.assertTrue(self.throttle().allow_request(request(), None))
+
+    def test_clients_are_counted_separately(self):
+        for _ in range(3):
+            self.throttle().allow_request(request(), None)
+        self.assertTrue(self.throttle().allow_request(request("192.0.2.2"), None))
+
+    def test_fails_open_without_cache(self):
+        throttle = self.throttle(BrokenCacheThrottle)
+        with self.assertLogs("api.throttling", "WARNING"):
+            self.assertTrue(throttle.allow_request(request(), None))
+
+
+@override_settings(
+    CACHES={
+        "default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"},
+        "throttle": {"BACKEND": "api.tests.fakes.FakeRedisCache"},
+    }
+)
+class RedisFixedWindowThrottleTests(SimpleTestCase):
+    def setUp(self):
+        throttle_cache().clear()
+        self.redis = throttle_cache().client
+
+    def throttle(self):
+        throttle = ThreePerMinute()
+        throttle.timer = lambda: 600.0
+        return throttle
+
+    def test_one_round_trip_per_request(self):
+        allowed = []
+        for _ in range(4):
+            before = self.redis.round_trips
+            allowed.append(self.throttle().allow_request(request(), None))
+            self.assertEqual(self.redis.round_trips - before, 1)
+        self.assertEqual(allowed, [True, True, True, False])
+
+    def test_counter_expires(self):
+        self.throttle().allow_request(request(), None)
+        (key,) = self.redis.data
+        self.assertEqual(self.redis.data[key], 1)
+        self.assertEqual(self.redis.expiry[key], 120)
@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+api/throttling.py
+
+Fixed window request throttling on top of atomic cache counters.
+
+DRF's SimpleRateThrottle keeps the timestamp of every request a client made
+in the last period and reads and rewrites that whole list on every request,
+so a client allowed 1000 requests a day costs a 1000 item list per request.
+Here each client has one counter per window (ex. per day) which is bumped
+with a single atomic increment. With Redis that is one round trip per request,
+an INCR pipelined with the EXPIRE that keeps the counter from outliving its
+window. Other backends go through the cache API (incr, and add on the first
+request of a window).
+
+Counters live in the "throttle" cache when it is configured, so that
+throttling also works in development where the default cache is a
+DummyCache. If the cache is unreachable requests are let through.
+
+http://www.django-rest-framework.org/api-guide/throttling/
+"""
+# Python std. lib. imports
+import logging
+
+# Django Imports
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+
+# Other Imports
+from rest_framework.throttling import SimpleRateThrottle
+
+# App Imports
+from .caching import redis_client
+
+logger = logging.getLogger(__name__)
+
+THROTTLE_CACHE_ALIAS = "throttle"
+
+
+def throttle_cache():
+    """
+    Return the cache that holds the throttle counters.
+    """
+    if THROTTLE_CACHE_ALIAS in settings.CACHES:
+        return caches[THROTTLE_CACHE_ALIAS]
+    return caches[DEFAULT_CACHE_ALIAS]
+
+
+class FixedWindowRateThrottle(SimpleRateThrottle):
+    """
+    Allow `num_requests` per client in every window of `duration` seconds.
+
+    Windows are aligned to the epoch, so a client can make up to twice its
+    rate across the boundary between two windows.
+    """
+
+    cache_format = "throttle_%(scope)s_%(ident)s"
+
+    @property
+    def cache(self):
+        return throttle_cache()
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        self.now = self.timer()
+        window = int(self.now // self.duration)
+        self.window_ends = (window + 1) * self.duration
+        try:
+            self.count = self.increment("%s_%d" % (self.key, window))
+        except Exception:
+            # Fail open, an outage of the cache should not take the API down
+            logger.warning("Throttle cache unavailable", exc_info=True)
+            return True
+
+        if self.count > self.num_requests:
+            return self.throttle_failure()
+        return True
+
+    def increment(self, key):
+        """
+        Count a request in a window and return the number of requests so far.
+        """
+        # The counter outlives the window a little so that it never expires
+        # while it is still used
+        timeout = self.duration + 60
+        client, redis_key = redis_client(self.cache, key)
+        if client is not None:
+            # One round trip, where django-redis-cache's incr() sends an
+            # EXISTS and then an INCR
+            pipeline = client.pipeline()
+            pipeline.incr(redis_key)
+            pipeline.expire(redis_key, timeout)
+            return pipeline.execute()[0]
+        try:
+            return self.cache.incr(key)
+        except ValueError:
+            # First request of the window
+            if self.cache.add(key, 1, timeout):
+                return 1
+            # Another request created it first
+            return self.cache.incr(key)
+
+    def wait(self):
+        """
+        Return the number of seconds until the next window starts.
+        """
+        return self.window_ends - self.now
+
+
+class AnonFixedWindowThrottle(FixedWindowRateThrottle):
+    """
+    Limit the rate of API calls made by anonymous users, by IP address.
+
+    A drop in replacement of DRF's AnonRateThrottle, using the "anon" rate.
+    """
+
+    scope = "anon"
+
+    def get_cache_key(self, request, view):
+        if request.user.is_authenticated:
+            # Only throttle unauthenticated requests
+            return None
+        return self.cache_format % {
+            "scope": self.scope,
+            "ident": self.get_ident(request),
+        }
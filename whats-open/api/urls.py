@@ -18,9 +18,11 @@ from rest_framework.routers import DefaultRouter
 from .views import (
     CategoryViewSet,
     FacilityViewSet,
+    FacilityMapViewSet,
     ScheduleViewSet,
     LocationViewSet,
     AlertViewSet,
+    OpenHoursViewSet,
 )
 
 # Instantiate our DefaultRouter
@@ -28,9 +30,11 @@ ROUTER = DefaultRouter()
 
 # Register views to the API router
 ROUTER.register(r"alerts", AlertViewSet, "alert")
+ROUTER.register(r"analytics/open-hours", OpenHoursViewSet, "open-hours")
 ROUTER.register(r"categories", CategoryViewSet, "category")
 ROUTER.register(r"facilities", FacilityViewSet, "facility")
 ROUTER.register(r"locations", LocationViewSet, "location")
+ROUTER.register(r"map", FacilityMapViewSet, "map")
 ROUTER.register(r"schedules", ScheduleViewSet, "schedule")
 
 urlpatterns = [
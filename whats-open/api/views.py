@@ -10,9 +10,42 @@ addition, we define filtering and documentation for each of these endpoints.
 """
 # Python std. lib. imports
 import datetime
+import math
+
+# Django Imports
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 
 # App Imports
-from .models import Facility, OpenTime, Category, Schedule, Location, Alert
+from .alerts import active_alerts, alerts_cache_key, alerts_stale_key, wait_for_change
+from .caching import cached
+from .campuses import (
+    CATALOG_CACHE_SECONDS,
+    get_campus,
+    request_cache_key,
+    request_stale_key,
+)
+from .fieldsets import SparseFieldsetsViewMixin
+from .filters import TagFilter
+from .maps import (
+    CLUSTER_MAX_ZOOM,
+    cluster_features,
+    facility_layer,
+    feature_collection,
+    in_extent,
+)
+from .models import (
+    Facility,
+    OpenTime,
+    Category,
+    Schedule,
+    Location,
+    Alert,
+    OpenHoursRollup,
+    OpenStateContext,
+)
+from .parsers import MessagePackParser
+from .rollups import DIMENSIONS, open_hours_report, ordering_lookups
 from .serializers import (
     CategorySerializer,
     FacilitySerializer,
@@ -24,10 +57,16 @@ from .serializers import (
 
 # Other Imports
 from rest_framework import viewsets, filters
+from rest_framework.decorators import list_route
+from rest_framework.exceptions import ParseError
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework_gis.filters import InBBoxFilter
 from django_filters.rest_framework import DjangoFilterBackend
 
 
-class AlertViewSet(viewsets.ReadOnlyModelViewSet):
+class AlertViewSet(SparseFieldsetsViewMixin, viewsets.ReadOnlyModelViewSet):
     """
     Some type of notification that is displayed to clients that conveys a message.
 
@@ -95,6 +134,34 @@ class AlertViewSet(viewsets.ReadOnlyModelViewSet):
     [GET /api/alerts/?all_alerts](/api/alerts/?all_alerts&format=json)
 
     Return all Alert objects.
+
+    ### **wait**
+
+    [GET /api/alerts/?wait=25&since=](/api/alerts/?wait=25&since=&format=json)
+
+    Long-poll for the next change to the active alerts. Every response comes with the state of the active alerts as its `ETag`. Pass it back as `since` and the request waits up to `wait` seconds (25 at most) until an alert starts, ends or is edited, then returns the new list. When nothing changes in that time the response is a 304 Not Modified. Without `since`, or with an outdated one, the list is returned right away. It is also returned right away when the server has too many requests waiting already, so wait a little before polling again after a response with an unchanged `ETag`.
+
+    **Example Usage**
+
+    [GET /api/alerts/?wait=25&since=4f1c2a9e0b7d3e65](/api/alerts/?wait=25&since=4f1c2a9e0b7d3e65&format=json)
+
+    Return the active alerts as soon as they are no longer in the state "4f1c2a9e0b7d3e65".
+
+    ### **Sparse fieldsets**
+
+    [GET /api/alerts/?fields=](/api/alerts/?fields=&format=json)
+
+    Query parameters that trim the returned objects. `fields` only returns the listed fields, `exclude` drops them. Nested fields are named with dots.
+
+    **Example Usage**
+
+    [GET /api/alerts/?fields=subject,urgency_tag](/api/alerts/?fields=subject,urgency_tag&format=json)
+
+    Return only the subject and urgency_tag of each object.
+
+    [GET /api/alerts/?exclude=body](/api/alerts/?exclude=body&format=json)
+
+    Return every field except body.
     """
 
     # All model fields that are available for filtering
@@ -128,13 +195,59 @@ class AlertViewSet(viewsets.ReadOnlyModelViewSet):
             return Alert.objects.all()
         # Default behavior
         else:
-            # Enumerate all Alert objects that are active
-            alertable = [alert.pk for alert in Alert.objects.all() if alert.is_active()]
-            # Return active Alerts
-            return Alert.objects.filter(pk__in=alertable)
-
-
-class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
+            # Return active Alerts, the same ones as Alert.is_active(). The
+            # queryset stays lazy, the permission check asks for it on
+            # requests that are answered from the cache.
+            return Alert.objects.filter(pk__in=self.active_alerts().ids)
+
+    def active_alerts(self):
+        # One ActiveAlerts for the whole request (see api/alerts.py)
+        if getattr(self, "_active_alerts", None) is None:
+            self._active_alerts = active_alerts()
+        return self._active_alerts
+
+    def list(self, request, *args, **kwargs):
+        """
+        Return the cached list of alerts for the current set of active
+        alerts (see api/alerts.py), or wait for the set to change.
+        """
+        since = request.query_params.get("since")
+        wait = request.query_params.get("wait")
+        if wait is not None:
+            try:
+                wait = float(wait)
+            except ValueError:
+                raise ParseError("Invalid wait value: %s. Expected seconds." % wait)
+            # nan would never run out
+            if not math.isfinite(wait) or wait < 0:
+                raise ParseError("Invalid wait value: %s. Expected seconds." % wait)
+
+        if wait and since == self.active_alerts().state:
+            changed = wait_for_change(since, wait)
+            # Without a free spot to wait in, the current alerts are returned
+            # right away
+            if changed is not None:
+                self._active_alerts = changed
+                if changed.state == since:
+                    return Response(status=304, headers={"ETag": '"%s"' % since})
+
+        active = self.active_alerts()
+
+        def compute():
+            serializer = self.get_serializer(
+                self.filter_queryset(self.get_queryset()), many=True
+            )
+            return (active.state, serializer.data), CATALOG_CACHE_SECONDS
+
+        # The state is kept with the data so that a stale response is sent
+        # with the state it belongs to
+        state, data = cached(
+            alerts_cache_key(request, active), alerts_stale_key(request), compute
+        )
+        return Response(data, headers={"ETag": '"%s"' % state})
+
+
+class CategoryViewSet(SparseFieldsetsViewMixin, viewsets.ReadOnlyModelViewSet):
     """
     A Category is a grouping of Facilities that serve a common/similar purpose.
 
@@ -191,6 +304,24 @@ class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
     [GET /api/categories/?name=dining](/api/categories/?name=dining&format=json)
 
     Return the Category object that is named "dining".
+
+    ## Custom query parameters
+
+    ### **Sparse fieldsets**
+
+    [GET /api/categories/?fields=](/api/categories/?fields=&format=json)
+
+    Query parameters that trim the returned objects. `fields` only returns the listed fields, `exclude` drops them. Nested fields are named with dots.
+
+    **Example Usage**
+
+    [GET /api/categories/?fields=name](/api/categories/?fields=name&format=json)
+
+    Return only the name of each object.
+
+    [GET /api/categories/?exclude=created](/api/categories/?exclude=created&format=json)
+
+    Return every field except created.
     """
 
     # All model fields that are available for filtering
@@ -215,7 +346,7 @@ class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
         return Category.objects.all()
 
 
-class LocationViewSet(viewsets.ReadOnlyModelViewSet):
+class LocationViewSet(SparseFieldsetsViewMixin, viewsets.ReadOnlyModelViewSet):
     """
     Represents a specific location that a Facility can be found.
 
@@ -266,6 +397,24 @@ class LocationViewSet(viewsets.ReadOnlyModelViewSet):
     [GET /api/locations/?building=Johnson+Center](/api/locations/?building=Johnson+Center&format=json)
 
     Return all Location objects located in the "Johnson Center" building.
+
+    ## Custom query parameters
+
+    ### **Sparse fieldsets**
+
+    [GET /api/locations/?fields=](/api/locations/?fields=&format=json)
+
+    Query parameters that trim the returned objects. `fields` only returns the listed fields, `exclude` drops them. Nested fields are named with dots.
+
+    **Example Usage**
+
+    [GET /api/locations/?fields=building,campus_region](/api/locations/?fields=building,campus_region&format=json)
+
+    Return only the building and campus_region of each object.
+
+    [GET /api/locations/?exclude=coordinate_location](/api/locations/?exclude=coordinate_location&format=json)
+
+    Return every field except coordinate_location.
     """
 
     # All model fields that are available for filtering
@@ -293,7 +442,7 @@ class LocationViewSet(viewsets.ReadOnlyModelViewSet):
         return Location.objects.all()
 
 
-class FacilityViewSet(viewsets.ReadOnlyModelViewSet):
+class FacilityViewSet(SparseFieldsetsViewMixin, viewsets.ReadOnlyModelViewSet):
     """
     A Facility is some type of establishment that has a schedule of open hours and a location that serves a specific purpose that can be categorized.
 
@@ -305,6 +454,8 @@ class FacilityViewSet(viewsets.ReadOnlyModelViewSet):
 
     Return all Facility objects. Additionally, we filter out stale special_schedules to reduce client side calculations.
 
+    Every Facility comes with `is_open`, `closes_at` and `next_opens_at`, all evaluated at the same instant for the whole response. `closes_at` is set when the facility is open and `next_opens_at` when it is closed, following the schedule in effect at that instant. Either one is null when the facility never closes (24 hours) or never opens. Open times hold to the second and include their end time: a facility that closes at 17:00 is open at 17:00:00, closed from 17:00:01 on, and has a `closes_at` of 17:00:00.
+
     ## Built-in query parameters
 
     ### **Search**
@@ -358,8 +509,87 @@ class FacilityViewSet(viewsets.ReadOnlyModelViewSet):
     [GET /api/facilities/?closed_now](/api/facilities/?closed_now&format=json)
 
     Only return closed Facility objects.
+
+    ### **campus**
+
+    [GET /api/facilities/?campus=](/api/facilities/?campus=&format=json)
+
+    Only return the Facility objects on one campus_region: `fairfax`, `arlington`, `prince william` or `front royal`.
+
+    **Example Usage**
+
+    [GET /api/facilities/?campus=arlington](/api/facilities/?campus=arlington&format=json)
+
+    Return all Facility objects on the Arlington campus.
+
+    Responses are cached per campus for up to five minutes, or until the next facility opens or closes (except with `open_now` or `closed_now`), and a change to a facility only drops the cached responses of its own campus.
+
+    ### **tags**
+
+    [GET /api/facilities/?tags=](/api/facilities/?tags=&format=json)
+
+    Only return Facility objects that have any of the comma separated tags. With `tags_match=all` they must have every one of them. Tags are matched case insensitively.
+
+    **Example Usage**
+
+    [GET /api/facilities/?tags=coffee,tea](/api/facilities/?tags=coffee,tea&format=json)
+
+    Return all Facility objects tagged with "coffee" or "tea".
+
+    [GET /api/facilities/?tags=coffee,late night&tags_match=all](/api/facilities/?tags=coffee,late%20night&tags_match=all&format=json)
+
+    Return all Facility objects tagged with both "coffee" and "late night".
+
+    ### **Sparse fieldsets**
+
+    [GET /api/facilities/?fields=](/api/facilities/?fields=&format=json)
+
+    Query parameters that trim the returned objects. `fields` only returns the listed fields, `exclude` drops them. Nested fields are named with dots.
+
+    **Example Usage**
+
+    [GET /api/facilities/?fields=slug,facility_name,main_schedule.open_times](/api/facilities/?fields=slug,facility_name,main_schedule.open_times&format=json)
+
+    Return only the slug, facility_name and main schedule open times of each object.
+
+    [GET /api/facilities/?exclude=special_schedules,facility_location.coordinate_location](/api/facilities/?exclude=special_schedules,facility_location.coordinate_location&format=json)
+
+    Return every field except the special schedules and the location coordinates.
+
+    [GET /api/facilities/?expand=main_schedule](/api/facilities/?expand=main_schedule&format=json)
+
+    Only return main_schedule (and its open times) as a nested object. Every other nested object (location, category, special schedules) is replaced by its id. An empty `?expand=` replaces all of them.
+
+    ### **hours**
+
+    [GET /api/facilities/?hours=bitmap](/api/facilities/?hours=bitmap&format=json)
+
+    Replace the open_times of each schedule with weekly_hours, a base64 encoded bitmap of 672 bits (84 bytes). Bit `i` stands for the 15 minutes starting at `i * 15` minutes past Monday 00:00 and is set when the schedule is open for that whole stretch. Bits are packed most significant bit first, so bit `i` is `(bytes[i >> 3] >> (7 - (i & 7))) & 1`.
+
+    [GET /api/facilities/?hours=summary](/api/facilities/?hours=summary&format=json)
+
+    Replace the open_times of each schedule with hours_summary, a human readable summary of its hours (ex. "Mon–Fri 7 a.m. – 9 p.m.; Sat 10 a.m. – 2 a.m."). Consecutive days with the same hours are grouped together and hours that run past midnight are listed under the day they start on. Summaries are in the language asked for with the Accept-Language header.
+
+    ## Batch lookup
+
+    [GET /api/facilities/batch/?slugs=](/api/facilities/batch/?slugs=southside,the-globe&format=json)
+
+    Return the facilities with the given comma separated slugs (up to 100) in one request, in the order they were asked for. Slugs that do not match any facility are listed under `missing`. The other query parameters of this endpoint (ex. `?campus=`, `?fields=`, `?hours=`) apply as well.
+
+    **Example Usage**
+
+    [GET /api/facilities/batch/?slugs=southside,the-globe](/api/facilities/batch/?slugs=southside,the-globe&format=json)
+
+    Return `{"facilities": [...], "missing": [...]}` with Southside and The Globe.
+
+    [POST /api/facilities/batch/](/api/facilities/batch/)
+
+    The slugs can also be sent as a `{"slugs": ["southside", "the-globe"]}` request body, for lists that are too long for a URL.
     """
 
+    # The most facilities that can be looked up in one batch request
+    MAX_BATCH_SLUGS = 100
+
     # All model fields that are available for filtering
     FILTER_FIELDS = (
         # Facility fields
@@ -391,7 +621,12 @@ class FacilityViewSet(viewsets.ReadOnlyModelViewSet):
     # Associate a serializer with the ViewSet
     serializer_class = FacilitySerializer
 
-    search_fields = FILTER_FIELDS
+    filter_backends = tuple(api_settings.DEFAULT_FILTER_BACKENDS) + (TagFilter,)
+    # Tags are searched through their denormalized column instead of a join,
+    # see ?tags= to filter on any or all of several of them
+    search_fields = tuple(
+        field for field in FILTER_FIELDS if field != "facility_product_tags__name"
+    ) + ("tag_names",)
     ordering_fields = FILTER_FIELDS
     filter_fields = FILTER_FIELDS
     lookup_field = "slug"
@@ -406,23 +641,123 @@ class FacilityViewSet(viewsets.ReadOnlyModelViewSet):
         # Define ?closed_now
         closed_now = self.request.query_params.get("closed_now", None)
 
-        if open_now is not None:
-            open_now = [
-                facility.pk for facility in Facility.objects.all() if facility.is_open()
-            ]
-            return Facility.objects.filter(pk__in=open_now)
-        elif closed_now is not None:
-            closed_now = [
-                facility.pk
-                for facility in Facility.objects.all()
-                if not facility.is_open()
-            ]
-            return Facility.objects.filter(pk__in=closed_now)
-        else:
-            return Facility.objects.all()
-
+        facilities = Facility.objects.all()
+        campus = get_campus(self.request)
+        if campus is not None:
+            facilities = facilities.filter(facility_location__campus_region=campus)
+
+        if open_now is None and closed_now is None:
+            return facilities
+
+        # Evaluate each schedule once, with the open times of the schedules
+        # in effect loaded in one query. The response's is_open reuses it.
+        states = OpenStateContext.current() or OpenStateContext()
+        scheduled = list(facilities.prefetch_related("main_schedule", "special_schedules"))
+        states.prefetch(scheduled)
+        wanted = open_now is not None
+        matching = [
+            facility.pk
+            for facility in scheduled
+            if states.facility_state(facility).is_open == wanted
+        ]
+        return Facility.objects.filter(pk__in=matching)
 
-class ScheduleViewSet(viewsets.ModelViewSet):
+    def list(self, request, *args, **kwargs):
+        """
+        Return the cached list of facilities for the request's campus (or
+        every campus), see api/campuses.py.
+        """
+        # Open state changes with the time rather than with the data
+        params = request.query_params
+        if "open_now" in params or "closed_now" in params:
+            return super(FacilityViewSet, self).list(request, *args, **kwargs)
+
+        def compute():
+            serializer = self.get_serializer(
+                self.filter_queryset(self.get_queryset()), many=True
+            )
+            # Keep is_open, closes_at and next_opens_at exact by expiring the
+            # response when the first facility opens or closes
+            timeout = CATALOG_CACHE_SECONDS
+            next_change = serializer.context.get("next_change")
+            if next_change is not None:
+                seconds = (next_change - serializer.context["now"]).total_seconds()
+                timeout = int(max(1, min(timeout, seconds)))
+            return serializer.data, timeout
+
+        campus = get_campus(request)
+        data = cached(
+            request_cache_key("facilities", request, campus),
+            request_stale_key("facilities", request, campus),
+            compute,
+        )
+        return Response(data)
+
+    def get_batch_slugs(self, request):
+        """
+        Return the slugs of a batch request in the order they were given,
+        without duplicates.
+        """
+        if request.method == "POST":
+            data = request.data
+            if isinstance(data, list):
+                values = data
+            elif hasattr(data, "getlist"):
+                values = data.getlist("slugs")
+            else:
+                values = data.get("slugs", [])
+        else:
+            values = request.query_params.getlist("slugs")
+        if isinstance(values, str):
+            values = [values]
+        if not isinstance(values, list) or not all(
+            isinstance(value, str) for value in values
+        ):
+            raise ParseError("Invalid slugs value. Expected a list of facility slugs.")
+
+        slugs = []
+        seen = set()
+        for value in values:
+            for slug in value.split(","):
+                slug = slug.strip()
+                if slug and slug not in seen:
+                    seen.add(slug)
+                    slugs.append(slug)
+        if not slugs:
+            raise ParseError("Expected slugs of the facilities to return.")
+        if len(slugs) > self.MAX_BATCH_SLUGS:
+            raise ParseError(
+                "Too many slugs: %s. Expected at most %s."
+                % (len(slugs), self.MAX_BATCH_SLUGS)
+            )
+        return slugs
+
+    # Looking facilities up is read only even when the slugs are POSTed
+    @list_route(methods=["get", "post"], permission_classes=(AllowAny,))
+    def batch(self, request):
+        """
+        Return the facilities with the given slugs, in the order they were
+        given, along with the slugs that no facility has.
+        """
+        slugs = self.get_batch_slugs(request)
+        facilities = {
+            facility.slug: facility
+            for facility in self.filter_queryset(self.get_queryset()).filter(
+                slug__in=slugs
+            )
+        }
+        serializer = self.get_serializer(
+            [facilities[slug] for slug in slugs if slug in facilities], many=True
+        )
+        return Response(
+            {
+                "facilities": serializer.data,
+                "missing": [slug for slug in slugs if slug not in facilities],
+            }
+        )
+
+
+class ScheduleViewSet(SparseFieldsetsViewMixin, viewsets.ModelViewSet):
     """
     A period of time between two dates that represents the beginning and end of a "schedule" or rather, a collection of open times for a facility.
 
@@ -476,6 +811,38 @@ class ScheduleViewSet(viewsets.ModelViewSet):
     [GET /api/schedules/?name=southside_main](/api/schedules/?name=southside_main&format=json)
 
     Return the Schedule object that has "southside_main" as its name.
+
+    ## Custom query parameters
+
+    ### **Sparse fieldsets**
+
+    [GET /api/schedules/?fields=](/api/schedules/?fields=&format=json)
+
+    Query parameters that trim the returned objects. `fields` only returns the listed fields, `exclude` drops them. Nested fields are named with dots.
+
+    **Example Usage**
+
+    [GET /api/schedules/?fields=name,open_times.start_day](/api/schedules/?fields=name,open_times.start_day&format=json)
+
+    Return only the name and the start_day of each open time of each object.
+
+    [GET /api/schedules/?exclude=open_times.schedule](/api/schedules/?exclude=open_times.schedule&format=json)
+
+    Return every field except the schedule id repeated in each open time.
+
+    [GET /api/schedules/?expand=](/api/schedules/?expand=&format=json)
+
+    Replace open_times with a list of OpenTime ids.
+
+    ### **hours**
+
+    [GET /api/schedules/?hours=bitmap](/api/schedules/?hours=bitmap&format=json)
+
+    Replace the open_times of each schedule with weekly_hours, a base64 encoded bitmap of 672 bits (84 bytes). Bit `i` stands for the 15 minutes starting at `i * 15` minutes past Monday 00:00 and is set when the schedule is open for that whole stretch. Bits are packed most significant bit first, so bit `i` is `(bytes[i >> 3] >> (7 - (i & 7))) & 1`.
+
+    [GET /api/schedules/?hours=summary](/api/schedules/?hours=summary&format=json)
+
+    Replace the open_times of each schedule with hours_summary, a human readable summary of its hours (ex. "Mon–Fri 7 a.m. – 9 p.m.; Sat 10 a.m. – 2 a.m."). Consecutive days with the same hours are grouped together and hours that run past midnight are listed under the day they start on. Summaries are in the language asked for with the Accept-Language header.
     """
 
     # All model fields that are available for filtering
@@ -489,6 +856,8 @@ class ScheduleViewSet(viewsets.ModelViewSet):
 
     # Associate a serializer with the ViewSet
     serializer_class = ScheduleSerializer
+    # Accept MessagePack request bodies in addition to the defaults
+    parser_classes = tuple(api_settings.DEFAULT_PARSER_CLASSES) + (MessagePackParser,)
 
     search_fields = FILTER_FIELDS
     ordering_fields = FILTER_FIELDS
@@ -511,7 +880,7 @@ class ScheduleViewSet(viewsets.ModelViewSet):
         return Schedule.objects.exclude(pk__in=filter_old_schedules)
 
 
-class OpenTimeViewSet(viewsets.ModelViewSet):
+class OpenTimeViewSet(SparseFieldsetsViewMixin, viewsets.ModelViewSet):
     """
     Represents a time period when a Facility is open.
 
@@ -530,3 +899,218 @@ class OpenTimeViewSet(viewsets.ModelViewSet):
         the API.
         """
         return OpenTime.objects.all()
+
+
+class FacilityMapViewSet(viewsets.ViewSet):
+    """
+    A GeoJSON FeatureCollection of every Facility, ready to be drawn on a map.
+
+    Each Feature is a point at the facility's location with its slug as the id and the facility_name, category, building, campus_region and is_open as properties.
+
+    Layers are cached for up to a minute, so is_open can lag behind by that much.
+
+    ---
+
+    ## Default behavior
+
+    [GET /api/map/](/api/map/?format=json)
+
+    Return a Feature for every Facility on every campus.
+
+    ## Custom query parameters
+
+    ### **campus**
+
+    [GET /api/map/?campus=](/api/map/?campus=&format=json)
+
+    Only return the facilities on one campus_region.
+
+    **Example Usage**
+
+    [GET /api/map/?campus=fairfax](/api/map/?campus=fairfax&format=json)
+
+    Return the facilities on the Fairfax campus.
+
+    ### **in_bbox**
+
+    [GET /api/map/?in_bbox=](/api/map/?in_bbox=&format=json)
+
+    Only return the facilities inside a bounding box given as `min_lon,min_lat,max_lon,max_lat`.
+
+    **Example Usage**
+
+    [GET /api/map/?in_bbox=-77.32,38.82,-77.30,38.84](/api/map/?in_bbox=-77.32,38.82,-77.30,38.84&format=json)
+
+    Return the facilities in the middle of the Fairfax campus.
+
+    ### **zoom**
+
+    [GET /api/map/?zoom=](/api/map/?zoom=&format=json)
+
+    Cluster the facilities for a map zoom level below 17. Facilities that fall in the same grid cell (a quarter of a map tile wide) are replaced by a single Feature with the properties `cluster` (true), `count`, `open_count` and `facilities` (the slugs of its members).
+
+    **Example Usage**
+
+    [GET /api/map/?zoom=15](/api/map/?zoom=15&format=json)
+
+    Return the facilities clustered for zoom level 15.
+    """
+
+    # Only used to look up model permissions, layers are built in api/maps.py
+    queryset = Facility.objects.all()
+
+    def get_zoom(self):
+        zoom = self.request.query_params.get("zoom") or None
+        if zoom is None:
+            return None
+        try:
+            zoom = int(zoom)
+        except ValueError:
+            raise ParseError("Invalid zoom value: %s" % zoom)
+        if not 0 <= zoom <= 22:
+            raise ParseError("Invalid zoom value: %s" % zoom)
+        return zoom
+
+    def list(self, request):
+        """
+        Handle incoming GET requests and return the facility layer.
+        """
+        campus = get_campus(request)
+        zoom = self.get_zoom()
+        bbox = InBBoxFilter().get_filter_bbox(request)
+        if bbox is None:
+            return Response(facility_layer(campus, zoom))
+
+        # A bounding box is cut out of the cached layer before clustering
+        features = in_extent(facility_layer(campus)["features"], bbox.extent)
+        if zoom is not None and zoom < CLUSTER_MAX_ZOOM:
+            features = cluster_features(features, zoom)
+        return Response(feature_collection(features))
+
+
+class OpenHoursViewSet(viewsets.ViewSet):
+    """
+    Reports on the open hours of facilities, aggregated from precomputed rollups of the open minutes of every facility for each day of the week under each of its schedules.
+
+    ---
+
+    ## Default behavior
+
+    [GET /api/analytics/open-hours/](/api/analytics/open-hours/?format=json)
+
+    Return one row per category with the number of facilities, their total weekly open minutes and hours (`total_minutes`, `total_hours`), the earliest opening (`opens_at`) and the latest closing (`closes_at`) time, for the schedules in effect right now. Closing times are clipped to the day, a facility that is open past midnight closes at 24:00.
+
+    ## Custom query parameters
+
+    ### **group_by**
+
+    [GET /api/analytics/open-hours/?group_by=](/api/analytics/open-hours/?group_by=&format=json)
+
+    Comma separated list of what to group rows by: `facility`, `category`, `building`, `campus` and `day` (0 is Monday).
+
+    **Example Usage**
+
+    [GET /api/analytics/open-hours/?group_by=campus,day](/api/analytics/open-hours/?group_by=campus,day&format=json)
+
+    Return the open hours of every campus for each day of the week.
+
+    ### **day**
+
+    [GET /api/analytics/open-hours/?day=](/api/analytics/open-hours/?day=&format=json)
+
+    Only look at one day of the week, 0 is Monday and 6 is Sunday.
+
+    ### **campus**
+
+    [GET /api/analytics/open-hours/?campus=](/api/analytics/open-hours/?campus=&format=json)
+
+    Only look at the facilities on one campus_region.
+
+    ### **at**
+
+    [GET /api/analytics/open-hours/?at=](/api/analytics/open-hours/?at=&format=json)
+
+    Report on the schedules in effect at a date (or date and time) instead of right now, which picks up the special schedules of that date.
+
+    ### **ordering**
+
+    [GET /api/analytics/open-hours/?ordering=](/api/analytics/open-hours/?ordering=&format=json)
+
+    Comma separated list of columns to order rows by, prefixed with `-` for descending order.
+
+    **Example Usage**
+
+    [GET /api/analytics/open-hours/?group_by=building&day=4&ordering=closes_at](/api/analytics/open-hours/?group_by=building&day=4&ordering=closes_at&format=json)
+
+    Return the buildings that close earliest on Fridays first.
+    """
+
+    # Only used to look up model permissions, reports are built in
+    # api/rollups.py
+    queryset = OpenHoursRollup.objects.all()
+
+    def get_list(self, name, default=()):
+        value = self.request.query_params.get(name)
+        if not value:
+            return list(default)
+        return [item.strip() for item in value.split(",") if item.strip()]
+
+    def get_group_by(self):
+        group_by = self.get_list("group_by", ["category"])
+        for dimension in group_by:
+            if dimension not in DIMENSIONS:
+                raise ParseError(
+                    "Invalid group_by value: %s. Expected any of: %s"
+                    % (dimension, ", ".join(DIMENSIONS))
+                )
+        return group_by
+
+    def get_day(self):
+        day = self.request.query_params.get("day") or None
+        if day is None:
+            return None
+        if day not in [str(choice) for choice, name in OpenTime.DAY_CHOICES]:
+            raise ParseError("Invalid day value: %s. Expected 0 (Monday) to 6" % day)
+        return int(day)
+
+    def get_at(self):
+        at = self.request.query_params.get("at") or None
+        if at is None:
+            return timezone.now()
+        try:
+            moment = parse_datetime(at) or parse_date(at)
+        except ValueError:
+            moment = None
+        if moment is None:
+            raise ParseError("Invalid at value: %s" % at)
+        if not isinstance(moment, datetime.datetime):
+            moment = datetime.datetime.combine(moment, datetime.time())
+        if timezone.is_naive(moment):
+            moment = timezone.make_aware(moment)
+        return moment
+
+    def get_ordering(self, group_by):
+        ordering = self.get_list("ordering")
+        lookups = ordering_lookups(group_by)
+        for column in ordering:
+            if column.lstrip("-") not in lookups:
+                raise ParseError(
+                    "Invalid ordering value: %s. Expected any of: %s"
+                    % (column, ", ".join(sorted(lookups)))
+                )
+        return ordering
+
+    def list(self, request):
+        """
+        Handle incoming GET requests and return the report.
+        """
+        group_by = self.get_group_by()
+        return Response(
+            open_hours_report(
+                self.get_at(),
+                group_by,
+                day=self.get_day(),
+                campus=get_campus(request),
+                ordering=self.get_ordering(group_by),
+            )
+        )
@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+api/warming.py
+
+Compute the most requested API responses (HOT_REQUESTS) before clients ask
+for them.
+
+`manage.py warm_cache` fills the cache after a deploy or a flush. With
+CACHE_WARMING on, every change that drops cached responses (see
+api/campuses.py and api/alerts.py) also recomputes the hot ones in a
+background thread once its transaction commits, while clients are still
+served the stale copies.
+"""
+# Python std. lib. imports
+import logging
+import threading
+import time
+
+# Django Imports
+from django.conf import settings
+from django.db import connections, transaction
+from django.dispatch import receiver
+
+# Other Imports
+from rest_framework.test import APIRequestFactory
+
+# App Imports
+from .alerts import alerts_invalidated
+from .campuses import CAMPUSES, campuses_invalidated
+
+logger = logging.getLogger(__name__)
+
+# (path, query parameters) of the responses that polling clients ask for
+HOT_REQUESTS = (("/api/facilities/", {"format": "json"}),)
+HOT_ALERT_REQUESTS = (("/api/alerts/", {"format": "json"}),)
+
+# The changes of the current thread's transaction whose responses are
+# recomputed once it commits
+pending = threading.local()
+
+
+def hot_requests(campuses=None, alerts=True):
+    """
+    Yield the (path, query parameters, view) of the hot requests of some
+    campuses, or of every campus, along with the alert requests.
+    """
+    # Imported here, the views import the models this module is loaded with
+    from .views import AlertViewSet, FacilityViewSet
+
+    # Warming requests are not counted against anyone's throttle
+    facilities = FacilityViewSet.as_view({"get": "list"}, throttle_classes=())
+    if campuses is None:
+        campuses = CAMPUSES
+    campuses = [campus for campus in CAMPUSES if campus in campuses]
+    if campuses:
+        # The responses for every campus include the changed ones
+        for campus in [None] + campuses:
+            for path, params in HOT_REQUESTS:
+                if campus is not None:
+                    params = dict(params, campus=campus)
+                yield path, params, facilities
+
+    if alerts:
+        view = AlertViewSet.as_view({"get": "list"}, throttle_classes=())
+        for path, params in HOT_ALERT_REQUESTS:
+            yield path, params, view
+
+
+def warm_cache(campuses=None, alerts=True):
+    """
+    Compute the hot responses of some campuses (or every campus) that are
+    not cached, and return the (path, query parameters, seconds) of each.
+    """
+    factory = APIRequestFactory()
+    results = []
+    for path, params, view in hot_requests(campuses, alerts):
+        start = time.perf_counter()
+        response = view(factory.get(path, params))
+        if response.status_code != 200:
+            logger.warning("Warming %s %s failed: %s", path, params, response.status_code)
+        results.append((path, params, time.perf_counter() - start))
+    return results
+
+
+def warm_in_background(campuses, alerts):
+    try:
+        warm_cache(campuses, alerts)
+    except Exception:
+        logger.exception("Cache warming failed")
+    finally:
+        # The thread's connections are not closed at the end of a request
+        connections.close_all()
+
+
+def start_warming():
+    if not hasattr(pending, "campuses"):
+        # Another callback of the same transaction already started it
+        return
+    campuses = None if pending.every else pending.campuses
+    alerts = pending.alerts
+    del pending.campuses, pending.every, pending.alerts
+    threading.Thread(
+        target=warm_in_background, args=(campuses, alerts), daemon=True
+    ).start()
+
+
+def warm_after_commit(campuses=(), alerts=False):
+    """
+    Recompute the hot responses of some campuses (None for every campus)
+    and of the alerts in the background, once the current transaction
+    commits. Changes made in one transaction are warmed together.
+    """
+    if not settings.CACHE_WARMING:
+        return
+    if not hasattr(pending, "campuses"):
+        pending.campuses = set()
+        pending.every = False
+        pending.alerts = False
+    if campuses is None:
+        pending.every = True
+    else:
+        pending.campuses.update(campuses)
+    pending.alerts = pending.alerts or alerts
+    # Registered every time, the changes of a transaction that was rolled
+    # back are left pending until the next one commits
+    transaction.on_commit(start_warming)
+
+
+@receiver(campuses_invalidated)
+def campuses_changed(sender, campuses, **kwargs):
+    if campuses is not None and not any(campuses):
+        return
+    warm_after_commit(campuses=campuses)
+
+
+@receiver(alerts_invalidated)
+def alerts_changed(sender, **kwargs):
+    warm_after_commit(alerts=True)
@@ -0,0 +1,24 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+benchmarks/__init__.py
+
+Performance benchmarks for the API, run against the configured database with
+
+    python manage.py benchmark [name ...]
+
+Each module listed in BENCHMARKS defines a `run(repeat)` function that yields
+(label, value, unit) tuples.
+"""
+# Python std. lib. imports
+import timeit
+
+# The benchmark modules that `manage.py benchmark` runs by default
+BENCHMARKS = ("formats", "connections", "concurrency", "startup", "throttling", "open_state")
+
+
+def best_of(func, repeat):
+    """
+    Call `func` `repeat` times and return the fastest call in milliseconds.
+    """
+    return min(timeit.repeat(func, number=1, repeat=repeat)) * 1000
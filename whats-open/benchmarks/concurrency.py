@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+benchmarks/concurrency.py
+
+Compare how many slow clients a worker with a fixed number of threads (and so
+a fixed memory and database connection budget) can serve through WSGI, the
+way gunicorn's gthread worker serves it, and through ASGI (api/asgi.py).
+
+Every client takes CLIENT_SECONDS to receive its response. A WSGI thread is
+held for that time, an ASGI thread is not.
+
+Only clients that are slow on the network are modeled. A long poll of
+/api/alerts/?wait= waits in the view, so it holds a thread under both servers
+and these numbers say nothing about it (see api/alerts.py).
+"""
+# Python std. lib. imports
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Django Imports
+from django.core.wsgi import get_wsgi_application
+
+# App Imports
+from api.asgi import ThreadPoolASGIHandler, build_environ
+
+THREADS = 4
+CLIENTS = 64
+CLIENT_SECONDS = 0.05
+PATHS = ("/api/facilities/", "/api/categories/")
+
+
+def scope(path, client):
+    return {
+        "type": "http",
+        "method": "GET",
+        "path": path,
+        "query_string": b"",
+        "headers": [(b"accept", b"application/json")],
+        # Every client has its own address, so they are throttled separately
+        "client": ("10.0.%d.%d" % divmod(client, 256), 50000),
+    }
+
+
+def wsgi_round(application, path):
+    def client(number):
+        def start_response(status, headers, exc_info=None):
+            pass
+
+        result = application(build_environ(scope(path, number), b""), start_response)
+        try:
+            for chunk in result:
+                # Writing to a slow client blocks the thread
+                time.sleep(CLIENT_SECONDS)
+        finally:
+            result.close()
+
+    with ThreadPoolExecutor(THREADS) as executor:
+        list(executor.map(client, range(CLIENTS)))
+
+
+def asgi_round(application, path):
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        if message["type"] == "http.response.body":
+            await asyncio.sleep(CLIENT_SECONDS)
+
+    async def clients():
+        await asyncio.gather(
+            *(application(scope(path, number), receive, send) for number in range(CLIENTS))
+        )
+
+    asyncio.get_event_loop().run_until_complete(clients())
+
+
+def best_rate(func, repeat):
+    """
+    Return the best requests per second of `repeat` rounds.
+    """
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return CLIENTS / min(timings)
+
+
+def run(repeat):
+    wsgi = get_wsgi_application()
+    asgi = ThreadPoolASGIHandler(wsgi, THREADS)
+    try:
+        for path in PATHS:
+            yield (
+                "wsgi %s (%d threads)" % (path, THREADS),
+                best_rate(lambda: wsgi_round(wsgi, path), repeat),
+                "req/s",
+            )
+            yield (
+                "asgi %s (%d threads)" % (path, THREADS),
+                best_rate(lambda: asgi_round(asgi, path), repeat),
+                "req/s",
+            )
+    finally:
+        asgi.executor.shutdown()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+benchmarks/connections.py
+
+Compare the latency of a cheap request (/api/categories/) when every request
+opens a new database connection, when connections persist (CONN_MAX_AGE) and
+when they are borrowed from a connection pool (api/backends/pool.py).
+"""
+# Django Imports
+from django.core.signals import request_finished, request_started
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# Other Imports
+from rest_framework.test import APIRequestFactory
+
+# App Imports
+from api.backends.pool import PooledDatabaseWrapperMixin, get_pool
+from api.views import CategoryViewSet
+
+from . import best_of
+
+
+def pooled_wrapper(connection):
+    """
+    Return a copy of a connection's DatabaseWrapper that uses the pool.
+    """
+    wrapper_class = connection.__class__
+    if not issubclass(wrapper_class, PooledDatabaseWrapperMixin):
+        wrapper_class = type(
+            "Pooled" + wrapper_class.__name__,
+            (PooledDatabaseWrapperMixin, wrapper_class),
+            {},
+        )
+    return wrapper_class(dict(connection.settings_dict, CONN_MAX_AGE=0), connection.alias)
+
+
+def run(repeat):
+    factory = APIRequestFactory()
+    view = CategoryViewSet.as_view({"get": "list"}, throttle_classes=())
+
+    def request():
+        # Go through the request signals so connections are handled the way
+        # they are for a real request
+        request_started.send(sender=__name__)
+        try:
+            view(factory.get("/api/categories/")).render()
+        finally:
+            request_finished.send(sender=__name__)
+
+    original = connections[DEFAULT_DB_ALIAS]
+    modes = (
+        ("new connection", dict(original.settings_dict, CONN_MAX_AGE=0), None),
+        ("persistent", dict(original.settings_dict, CONN_MAX_AGE=600), None),
+        ("pooled", None, pooled_wrapper(original)),
+    )
+    try:
+        for label, settings_dict, wrapper in modes:
+            if wrapper is None:
+                wrapper = original.__class__(settings_dict, original.alias)
+            connections[DEFAULT_DB_ALIAS] = wrapper
+            request()
+            yield ("%s request" % label, best_of(request, repeat), "ms")
+            wrapper.close()
+    finally:
+        connections[DEFAULT_DB_ALIAS] = original
+
+    stats = get_pool(DEFAULT_DB_ALIAS, 0).stats()
+    yield ("pooled connections created", stats["created"], "")
+    yield ("pooled connections reused", stats["reused"], "")
@@ -0,0 +1,52 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+benchmarks/formats.py
+
+Compare the payload size and encode / decode time of the full facility
+catalog (/api/facilities/) rendered as JSON and as MessagePack.
+"""
+# Python std. lib. imports
+import gzip
+import json
+
+# Other Imports
+import msgpack
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+
+# App Imports
+from api.renderers import MessagePackRenderer
+from api.views import FacilityViewSet
+
+from . import best_of
+
+FORMATS = (
+    ("json", JSONRenderer(), "application/json", json.loads),
+    (
+        "msgpack",
+        MessagePackRenderer(),
+        "application/msgpack",
+        lambda content: msgpack.unpackb(content, raw=False),
+    ),
+)
+
+
+def run(repeat):
+    factory = APIRequestFactory()
+    view = FacilityViewSet.as_view({"get": "list"}, throttle_classes=())
+
+    for name, renderer, media_type, decode in FORMATS:
+        response = view(factory.get("/api/facilities/", HTTP_ACCEPT=media_type))
+        response.render()
+        content = response.content
+        data = response.data
+
+        yield ("%s payload" % name, len(content), "bytes")
+        yield ("%s payload (gzip)" % name, len(gzip.compress(content)), "bytes")
+        yield (
+            "%s encode" % name,
+            best_of(lambda: renderer.render(data, media_type), repeat),
+            "ms",
+        )
+        yield ("%s decode" % name, best_of(lambda: decode(content), repeat), "ms")
@@ -0,0 +1,243 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+benchmarks/open_state.py
+
+Check that the ways of telling whether a schedule is open agree with each
+other, and compare how fast they are.
+
+Every engine is evaluated for a randomized corpus of schedules twice a
+minute (at :00 and :30) for a whole week, and any moment at which they
+disagree is reported. The corpus leans on the cases that are easy to get
+wrong: open times that wrap around the end of the week (start_day after
+end_day), that end at 23:59, 23:59:59 or 0:00, that start or end in the
+middle of a minute, inverted and empty ones and 24 hour schedules.
+
+The engines are
+
+- legacy: Schedule.is_open_now(), which reads the time from
+  datetime.datetime.today() (frozen at each moment here)
+- intervals: api/intervals.py's exact_open_state() on intervals computed once
+  per schedule
+- context: OpenStateContext.schedule_state(), which is what requests and
+  Facility.is_open() go through (intervals computed again for every instant)
+
+Both interval engines work to the second, like the legacy one. The minute
+based open_state() is not one of them, it is open for the whole minute an
+open time ends in (see api/intervals.py).
+"""
+# Python std. lib. imports
+import datetime
+import random
+import time
+import types
+from collections import namedtuple
+from contextlib import contextmanager
+from unittest import mock
+
+# Django Imports
+from django.utils import timezone
+
+# App Imports
+from api import models
+from api.intervals import (
+    MINUTES_PER_WEEK,
+    exact_intervals,
+    exact_open_state,
+    tick_of_week,
+)
+from api.models import OpenStateContext, OpenTime, Schedule
+
+# A week without a daylight saving time change, starting on a Monday
+WEEK_START = datetime.datetime(2018, 1, 1)
+
+# Schedules in the corpus that `manage.py benchmark` evaluates
+CORPUS_SIZE = 200
+# Mismatches that are listed, besides their total
+MISMATCH_EXAMPLES = 10
+
+# Times of day that sit on the edges the engines have to agree on
+EDGE_TIMES = (
+    datetime.time(0, 0),
+    datetime.time(0, 0, 30),
+    datetime.time(0, 1),
+    datetime.time(11, 59),
+    datetime.time(11, 59, 59),
+    datetime.time(12, 0),
+    datetime.time(12, 0, 30),
+    datetime.time(23, 59),
+    datetime.time(23, 59, 59),
+)
+
+# Seconds of every minute at which the engines are compared
+PROBE_SECONDS = (0, 30)
+
+# A moment at which the engines disagree on a schedule
+Mismatch = namedtuple("Mismatch", ["schedule", "moment", "results"])
+
+
+class FrozenDatetime(datetime.datetime):
+    """
+    A datetime.datetime whose today() is a set moment.
+    """
+
+    moment = None
+
+    @classmethod
+    def today(cls):
+        return cls.moment
+
+
+@contextmanager
+def frozen_today():
+    """
+    Have the legacy engine in api/models.py read the time from FrozenDatetime.
+    """
+    frozen = types.SimpleNamespace(**vars(datetime))
+    frozen.datetime = FrozenDatetime
+    with mock.patch.object(models, "datetime", frozen):
+        yield
+
+
+def random_time(rng):
+    if rng.random() < 0.5:
+        return rng.choice(EDGE_TIMES)
+    # Half of the other times are not on a whole minute
+    second = rng.randrange(60) if rng.random() < 0.5 else 0
+    return datetime.time(rng.randrange(24), rng.randrange(60), second)
+
+
+def random_schedules(count, seed=0):
+    """
+    Return a corpus of unsaved schedules with their open times prefetched.
+    """
+    rng = random.Random(seed)
+    schedules = []
+    for number in range(count):
+        schedule = Schedule(
+            pk=number + 1,
+            name="Schedule %d" % (number + 1),
+            twenty_four_hours=rng.random() < 0.05,
+        )
+        open_times = []
+        for _ in range(rng.randint(0, 5)):
+            start_day = rng.randrange(7)
+            # Mostly same day and overnight rows, some that span days or wrap
+            # around the end of the week
+            end_day = rng.choice(
+                (start_day, start_day, (start_day + 1) % 7, rng.randrange(7))
+            )
+            open_times.append(
+                OpenTime(
+                    schedule_id=schedule.pk,
+                    start_day=start_day,
+                    start_time=random_time(rng),
+                    end_day=end_day,
+                    end_time=random_time(rng),
+                )
+            )
+        schedule._prefetched_objects_cache = {"open_times": open_times}
+        schedules.append(schedule)
+    return schedules
+
+
+def week_moments(step=1, seconds=PROBE_SECONDS):
+    """
+    Yield the (naive local, aware) moments of a week at the given seconds of
+    every `step` minutes.
+    """
+    for minute in range(0, MINUTES_PER_WEEK, step):
+        for second in seconds:
+            local = WEEK_START + datetime.timedelta(minutes=minute, seconds=second)
+            yield local, timezone.make_aware(local)
+
+
+def legacy_engine(schedules):
+    def evaluate(local, moment):
+        FrozenDatetime.moment = FrozenDatetime.combine(local.date(), local.time())
+        return [schedule.is_open_now() for schedule in schedules]
+
+    return evaluate
+
+
+def intervals_engine(schedules):
+    intervals = [
+        exact_intervals(schedule.open_times.all(), schedule.twenty_four_hours)
+        for schedule in schedules
+    ]
+
+    def evaluate(local, moment):
+        tick = tick_of_week(local.weekday(), local.time())
+        return [exact_open_state(schedule, tick)[0] for schedule in intervals]
+
+    return evaluate
+
+
+def context_engine(schedules):
+    def evaluate(local, moment):
+        states = OpenStateContext(moment)
+        return [states.schedule_state(schedule).is_open for schedule in schedules]
+
+    return evaluate
+
+
+ENGINES = (
+    ("legacy", legacy_engine),
+    ("intervals", intervals_engine),
+    ("context", context_engine),
+)
+
+
+def compare(schedules, engines=ENGINES, step=1):
+    """
+    Evaluate every engine for some schedules at the week_moments() of every
+    `step` minutes. Return the Mismatches along with the number of
+    evaluations per second of each engine.
+    """
+    evaluators = [(name, engine(schedules)) for name, engine in engines]
+    seconds = {name: 0.0 for name, engine in engines}
+    mismatches = []
+    evaluations = 0
+    with frozen_today():
+        for local, moment in week_moments(step):
+            results = {}
+            for name, evaluate in evaluators:
+                start = time.perf_counter()
+                results[name] = evaluate(local, moment)
+                seconds[name] += time.perf_counter() - start
+            evaluations += len(schedules)
+            for index, schedule in enumerate(schedules):
+                answers = {name: results[name][index] for name in results}
+                if len(set(answers.values())) > 1:
+                    mismatches.append(Mismatch(schedule, local, answers))
+    return mismatches, {
+        name: evaluations / seconds[name] if seconds[name] else None
+        for name in seconds
+    }
+
+
+def describe(mismatch):
+    """
+    Return a one line description of a Mismatch.
+    """
+    schedule = mismatch.schedule
+    rows = "; ".join(str(open_time) for open_time in schedule.open_times.all())
+    if schedule.twenty_four_hours:
+        rows = "24 hours"
+    answers = ", ".join(
+        "%s %s" % (name, "open" if is_open else "closed")
+        for name, is_open in sorted(mismatch.results.items())
+    )
+    return "%s: %s [%s]" % (
+        mismatch.moment.strftime("%A %H:%M:%S"), answers, rows or "never"
+    )
+
+
+def run(repeat):
+    schedules = random_schedules(CORPUS_SIZE)
+    mismatches, throughput = compare(schedules)
+    yield "mismatching moments", len(mismatches), "moments"
+    for mismatch in mismatches[:MISMATCH_EXAMPLES]:
+        yield "mismatch", describe(mismatch), ""
+    for name, engine in ENGINES:
+        yield "%s engine" % name, throughput[name], "evaluations/s"
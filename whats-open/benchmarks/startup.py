@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+benchmarks/startup.py
+
+Measure the cold start of a worker with the full settings and with the API
+only settings (settings/api.py): the time to import and set up Django, the
+time until the first response is rendered and the number of modules loaded.
+
+Every measurement runs in a fresh Python process.
+"""
+# Python std. lib. imports
+import json
+import os
+import subprocess
+import sys
+
+# Django Imports
+from django.conf import settings
+
+PROFILES = ("settings.settings", "settings.api")
+
+# Run in the child process, prints its measurements as JSON
+SCRIPT = """
+import json, sys, time
+started = time.perf_counter()
+import django
+django.setup()
+setup = time.perf_counter()
+from django.test import Client
+response = Client().get("/api/categories/", HTTP_ACCEPT="application/json")
+assert response.status_code == 200, response.status_code
+print(json.dumps({
+    "setup": (setup - started) * 1000,
+    "first_response": (time.perf_counter() - started) * 1000,
+    "modules": len(sys.modules),
+}))
+"""
+
+
+def start(profile):
+    """
+    Start a worker process with a settings module and return its timings.
+    """
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE=profile)
+    output = subprocess.check_output(
+        [sys.executable, "-c", SCRIPT], cwd=settings.DJANGO_ROOT, env=env
+    )
+    return json.loads(output.decode().strip().splitlines()[-1])
+
+
+def run(repeat):
+    for profile in PROFILES:
+        runs = [start(profile) for _ in range(repeat)]
+        yield ("%s setup" % profile, min(run["setup"] for run in runs), "ms")
+        yield (
+            "%s first response" % profile,
+            min(run["first_response"] for run in runs),
+            "ms",
+        )
+        yield ("%s modules" % profile, runs[0]["modules"], "")
@@ -0,0 +1,163 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+benchmarks/throttling.py
+
+Compare the per request overhead of DRF's AnonRateThrottle (a list of
+timestamps per client) with AnonFixedWindowThrottle (one counter per client)
+as a client's request history grows. Both use the throttle cache.
+
+Besides the time, the round trips to the cache per request are counted: with
+django-redis-cache every command or pipeline sent to Redis, with any other
+backend every cache call. The first request of a window is counted apart.
+"""
+# Python std. lib. imports
+from contextlib import ExitStack, contextmanager
+from unittest import mock
+
+# Other Imports
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from rest_framework.throttling import AnonRateThrottle
+
+# App Imports
+from api.throttling import AnonFixedWindowThrottle, throttle_cache
+
+from . import best_of
+
+# Requests a client already made when it is measured
+HISTORY = (0, 100, 1000)
+CALLS = 100
+
+# The cache calls that make a round trip with backends other than Redis
+CACHE_CALLS = ("get", "set", "add", "incr", "delete")
+
+
+class TimestampListThrottle(AnonRateThrottle):
+    rate = "1000000/day"
+
+    @property
+    def cache(self):
+        return throttle_cache()
+
+
+class CounterThrottle(AnonFixedWindowThrottle):
+    rate = "1000000/day"
+
+
+class RoundTrips(object):
+    """
+    The number of round trips made to a cache.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.depth = 0
+
+    def counted(self, func):
+        def call(*args, **kwargs):
+            # Calls that a cache makes to itself are part of the outer one
+            if not self.depth:
+                self.count += 1
+            self.depth += 1
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.depth -= 1
+
+        return call
+
+
+class CountingClient(object):
+    """
+    A Redis client that counts every command it sends, and every pipeline
+    as one.
+    """
+
+    def __init__(self, client, round_trips):
+        self.client = client
+        self.round_trips = round_trips
+
+    def pipeline(self, *args, **kwargs):
+        pipeline = self.client.pipeline(*args, **kwargs)
+        pipeline.execute = self.round_trips.counted(pipeline.execute)
+        return pipeline
+
+    def __getattr__(self, name):
+        attribute = getattr(self.client, name)
+        if not callable(attribute):
+            return attribute
+        return self.round_trips.counted(attribute)
+
+
+@contextmanager
+def counting_round_trips(cache):
+    """
+    Count the round trips made to a cache while in the block.
+    """
+    round_trips = RoundTrips()
+    with ExitStack() as stack:
+        if hasattr(cache, "get_client"):
+            get_client = cache.get_client
+            stack.enter_context(
+                mock.patch.object(
+                    cache,
+                    "get_client",
+                    lambda *args, **kwargs: CountingClient(
+                        get_client(*args, **kwargs), round_trips
+                    ),
+                )
+            )
+        else:
+            for name in CACHE_CALLS:
+                stack.enter_context(
+                    mock.patch.object(
+                        cache, name, round_trips.counted(getattr(cache, name))
+                    )
+                )
+        yield round_trips
+
+
+def run(repeat):
+    factory = APIRequestFactory()
+    cache = throttle_cache()
+    client = 0
+    for history in HISTORY:
+        for name, throttle_class in (
+            ("timestamp list", TimestampListThrottle),
+            ("counter", CounterThrottle),
+        ):
+            # Every measurement is made by a different client (from an address
+            # range reserved for documentation)
+            client += 1
+            request = Request(
+                factory.get("/api/facilities/", REMOTE_ADDR="192.0.2.%d" % client)
+            )
+            throttle = throttle_class()
+            if not history:
+                with counting_round_trips(cache) as round_trips:
+                    throttle.allow_request(request, None)
+                yield (
+                    "%s, first request of a window" % name,
+                    round_trips.count,
+                    "round trips",
+                )
+            for _ in range(history):
+                throttle.allow_request(request, None)
+
+            def requests():
+                for _ in range(CALLS):
+                    throttle.allow_request(request, None)
+
+            with counting_round_trips(cache) as round_trips:
+                requests()
+            yield (
+                "%s, %d earlier requests" % (name, history),
+                round_trips.count / CALLS,
+                "round trips/request",
+            )
+            yield (
+                "%s, %d earlier requests" % (name, history),
+                best_of(requests, repeat) * 1000 / CALLS,
+                "us/request",
+            )
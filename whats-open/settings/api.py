@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+settings/api.py
+
+API only Django settings for whats-open.
+
+Workers that only serve /api/ do not need the admin, its documentation or the
+development apps, and importing them (and the admin modules of every app)
+makes up a good part of a worker's start up time. Run API workers with
+
+    DJANGO_SETTINGS_MODULE=settings.api
+
+and serve the admin from workers that use settings.settings.
+"""
+# App Imports
+from .settings import *  # noqa: F401,F403
+from .settings import INSTALLED_APPS, MIDDLEWARE, TEMPLATES
+
+# Apps that only the admin (or development) needs. django.contrib.gis stays,
+# the models and rest_framework_gis need GEOS and GDAL either way.
+ADMIN_APPS = (
+    "django.contrib.admin",
+    "django.contrib.admindocs",
+    "django.contrib.messages",
+    "django.contrib.sites",
+    "django_extensions",
+    "crispy_forms",
+)
+
+INSTALLED_APPS = tuple(app for app in INSTALLED_APPS if app not in ADMIN_APPS)
+
+MIDDLEWARE = [
+    middleware
+    for middleware in MIDDLEWARE
+    if middleware != "django.contrib.messages.middleware.MessageMiddleware"
+]
+
+TEMPLATES = [
+    dict(
+        template,
+        OPTIONS=dict(
+            template["OPTIONS"],
+            context_processors=[
+                processor
+                for processor in template["OPTIONS"]["context_processors"]
+                if not processor.startswith("django.contrib.messages")
+            ],
+        ),
+    )
+    for template in TEMPLATES
+]
+
+ROOT_URLCONF = "settings.api_urls"
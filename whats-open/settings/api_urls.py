@@ -0,0 +1,18 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+settings/api_urls.py
+
+Top level url patterns of the API only settings (settings/api.py). Unlike
+settings/urls.py this does not import or autodiscover the admin.
+"""
+# Django Imports
+from django.urls import include, path
+
+# Define all the top level url patterns in a list
+urlpatterns = [
+    # / - Load in all urls from the `api` app
+    path("", include("api.urls")),
+    # /auth - API Auth page
+    path("auth/", include("rest_framework.urls", namespace="rest_framework")),
+]
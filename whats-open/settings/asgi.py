@@ -0,0 +1,23 @@
+"""
+settings/asgi.py
+
+ASGI config for whats_open project.
+
+This module exposes the ASGI application used by ASGI servers, ex.
+
+    uvicorn settings.asgi:application
+    gunicorn -c settings/gunicorn.py -k uvicorn.workers.UvicornWorker settings.asgi:application
+
+Django requests run in a pool of WOPEN_ASGI_THREADS threads, see api/asgi.py.
+"""
+import os
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "settings.settings")
+
+from django.core.wsgi import get_wsgi_application
+
+from api.asgi import ThreadPoolASGIHandler
+
+application = ThreadPoolASGIHandler(
+    get_wsgi_application(), int(os.environ.get("WOPEN_ASGI_THREADS", 8))
+)
@@ -0,0 +1,33 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+settings/gunicorn.py
+
+Gunicorn configuration for whats-open. Run from the whats-open/ directory with
+
+    gunicorn -c settings/gunicorn.py settings.wsgi
+
+http://docs.gunicorn.org/en/stable/settings.html
+"""
+# Python std. lib. imports
+import json
+from os import environ
+
+bind = environ.get("WOPEN_BIND", "0.0.0.0:8000")
+workers = int(environ.get("WOPEN_WORKERS", 3))
+
+# Threaded workers share one connection pool per process when
+# WOPEN_DB_POOL_SIZE is set (see api/backends/pool.py). Serve settings.asgi
+# with WOPEN_WORKER_CLASS=uvicorn.workers.UvicornWorker instead, where the
+# threads are set with WOPEN_ASGI_THREADS.
+worker_class = environ.get("WOPEN_WORKER_CLASS", "gthread")
+threads = int(environ.get("WOPEN_THREADS", 4))
+
+
+def worker_exit(server, worker):
+    """
+    Log the connection metrics of a worker when it shuts down.
+    """
+    from api.backends.pool import pool_stats
+
+    server.log.info("database connections: %s", json.dumps(pool_stats()))
@@ -13,12 +13,28 @@ from os import path, environ
 if environ["WOPEN_ENV"] != "production":
     DEBUG = True
     # dummy cache for development-- doesn't actually cache things
-    CACHES = {"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}}
+    CACHES = {
+        "default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"},
+        # throttle counters still need to be kept (see api/throttling.py)
+        "throttle": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "throttle",
+        },
+    }
+    # nothing to warm (see api/warming.py)
+    CACHE_WARMING = False
 else:
     DEBUG = False
     CACHES = {
-        "default": {"BACKEND": "redis_cache.RedisCache", "LOCATION": "localhost:6379"}
+        "default": {"BACKEND": "redis_cache.RedisCache", "LOCATION": "localhost:6379"},
+        "throttle": {
+            "BACKEND": "redis_cache.RedisCache",
+            "LOCATION": "localhost:6379",
+            "KEY_PREFIX": "throttle",
+        },
     }
+    # recompute the hot responses in the background after a change
+    CACHE_WARMING = True
     ALLOWED_HOSTS = ["*"]
     SECRET_KEY = environ["WOPEN_SECRET_KEY"]
 
@@ -148,6 +164,9 @@ DATABASES = {
         "PASSWORD": environ["WOPEN_DB_PASSWORD"],
         "HOST": environ["WOPEN_DB_HOST"],
         "PORT": environ["WOPEN_DB_PORT"],
+        # Keep connections open between requests for this many seconds
+        # See: https://docs.djangoproject.com/en/dev/ref/databases/#persistent-connections
+        "CONN_MAX_AGE": int(environ.get("WOPEN_DB_CONN_MAX_AGE", 60)),
         'TEST': {
             'NAME': environ["WOPEN_DB_NAME"],
             'OPTIONS': {
@@ -157,6 +176,51 @@ DATABASES = {
     }
 }
 
+# Optionally share a pool of connections between the threads of each worker
+# (ex. gunicorn's gthread workers) instead of keeping one per thread. Requests
+# borrow a connection and hand it back when they finish, and at most
+# WOPEN_DB_POOL_SIZE idle connections are kept. See api/backends/pool.py.
+if int(environ.get("WOPEN_DB_POOL_SIZE", 0)):
+    DATABASES["default"].update(
+        ENGINE="api.backends.mysql",
+        CONN_MAX_AGE=0,
+        POOL_SIZE=int(environ["WOPEN_DB_POOL_SIZE"]),
+    )
+
+# Ping persistent connections that have been idle for this many seconds before
+# a request uses them. See api/backends/health.py.
+DB_HEALTH_CHECK_SECONDS = int(environ.get("WOPEN_DB_HEALTH_CHECK_SECONDS", 30))
+
+# Optional read replicas, listed as host[:port] in WOPEN_DB_REPLICAS
+# (ex. "replica1.example.com,replica2.example.com:3307"). They use the same
+# database name and credentials as the primary. Safe API requests are routed to
+# them by api.middleware.ReplicaMiddleware and api.routers.ReplicaRouter.
+DATABASE_REPLICAS = []
+for replica in filter(None, environ.get("WOPEN_DB_REPLICAS", "").split(",")):
+    host, _, port = replica.strip().partition(":")
+    alias = "replica%d" % (len(DATABASE_REPLICAS) + 1)
+    DATABASES[alias] = dict(
+        DATABASES["default"],
+        HOST=host,
+        PORT=port or DATABASES["default"]["PORT"],
+        # Tests run everything against the primary
+        TEST={"MIRROR": "default"},
+    )
+    DATABASE_REPLICAS.append(alias)
+
+# See: https://docs.djangoproject.com/en/dev/ref/settings/#database-routers
+DATABASE_ROUTERS = ["api.routers.ReplicaRouter"] if DATABASE_REPLICAS else []
+
+# Without any replicas configured, tests still get one that mirrors the test
+# database of the primary through a connection of its own (see
+# api/tests/ReplicaTests.py). Nothing is routed to it outside of the tests.
+if sys.argv[1:2] == ["test"] and not DATABASE_REPLICAS:
+    DATABASES["replica1"] = dict(DATABASES["default"], TEST={"MIRROR": "default"})
+
+# How long a client reads from the primary after making a change, so that it
+# sees its own writes while the replicas catch up.
+REPLICA_PIN_SECONDS = int(environ.get("WOPEN_DB_REPLICA_PIN_SECONDS", 10))
+
 """
 TEMPLATE CONFIGURATION
 """
@@ -197,15 +261,56 @@ MIDDLEWARE CONFIGURATION
 """
 # See: https://docs.djangoproject.com/en/dev/ref/settings/#middleware-classes
 MIDDLEWARE = [
+    # Route safe requests to the read replicas, if there are any.
+    "api.middleware.ReplicaMiddleware",
+    # Evaluate the open state of facilities once per schedule and request.
+    "api.middleware.OpenStateMiddleware",
     # Default Django middleware.
     "django.middleware.common.CommonMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
+    # Activate the language asked for with Accept-Language (hours summaries).
+    "django.middleware.locale.LocaleMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    # Profile single requests for staff users with ?profile=1.
+    "api.middleware.ProfileMiddleware",
 ]
 
+"""
+PROFILING CONFIGURATION
+"""
+# Where the reports of profiled requests (see api/profiling.py) are saved.
+PROFILE_ROOT = environ.get(
+    "WOPEN_PROFILE_ROOT", path.normpath(path.join(SITE_ROOT, "profiles"))
+)
+
+# Seconds between two samples of a profiled request's call stack. Code that
+# holds the GIL is sampled at most once every sys.getswitchinterval().
+PROFILE_INTERVAL = float(environ.get("WOPEN_PROFILE_INTERVAL", 0.001))
+
+"""
+LONG-POLLING CONFIGURATION
+"""
+# How many requests of each process may wait for the active alerts to change
+# with /api/alerts/?wait= at a time. A waiting request holds a worker thread
+# (one of WOPEN_THREADS) for up to 25 seconds, requests beyond this many are
+# answered right away.
+ALERTS_MAX_WAITERS = int(environ.get("WOPEN_ALERTS_MAX_WAITERS", 1))
+
+"""
+STATIC EXPORT CONFIGURATION
+"""
+# Where `manage.py export_static` writes the static JSON tree of the API
+# (see api/export.py), nginx serves EXPORT_ROOT/current.
+EXPORT_ROOT = environ.get(
+    "WOPEN_EXPORT_ROOT", path.normpath(path.join(SITE_ROOT, "export"))
+)
+
+# Export the tree again after every change to the data.
+STATIC_EXPORT = bool(int(environ.get("WOPEN_STATIC_EXPORT", 0)))
+
 """
 URL CONFIGURATION
 """
@@ -273,8 +378,18 @@ REST_FRAMEWORK = {
         "rest_framework.permissions.DjangoModelPermissionsOrAnonReadOnly"
     ],
     # http://www.django-rest-framework.org/api-guide/throttling/#throttling
-    "DEFAULT_THROTTLE_CLASSES": ("rest_framework.throttling.AnonRateThrottle",),
+    # Counts requests with an atomic counter instead of DRF's AnonRateThrottle
+    # timestamp list, see api/throttling.py
+    "DEFAULT_THROTTLE_CLASSES": ("api.throttling.AnonFixedWindowThrottle",),
     "DEFAULT_THROTTLE_RATES": {"anon": "1000/day"},
+    # http://www.django-rest-framework.org/api-guide/renderers/#setting-the-renderers
+    # MessagePack is served to clients that ask for it with
+    # `Accept: application/msgpack` or `?format=msgpack`
+    "DEFAULT_RENDERER_CLASSES": (
+        "rest_framework.renderers.JSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+        "api.renderers.MessagePackRenderer",
+    ),
     'DEFAULT_FILTER_BACKENDS': [
         #'url_filter.integrations.drf.URLFilterBackend', #url_filters
         "django_filters.rest_framework.DjangoFilterBackend", #rest_framework.filters